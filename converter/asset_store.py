@@ -0,0 +1,488 @@
+import errno
+import hashlib
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+
+# Linux FICLONE ioctl number (_IOW(0x94, 9, int)), used for copy-on-write reflinks.
+FICLONE = 0x40049409
+HASH_CHUNK_SIZE = 1024 * 1024
+# Maps logical to content-hashed file names when an export uses hashed names.
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+# Hex digits of the content hash in a hashed name (name.<hash>.ext).
+HASHED_NAME_LENGTH = 16
+
+
+def hashed_name(basename, content_hash):
+    """Returns name.<hash>.ext for name.ext."""
+    stem, ext = os.path.splitext(basename)
+    return f"{stem}.{content_hash[:HASHED_NAME_LENGTH]}{ext}"
+
+
+def hash_file(path):
+    """Returns the hex SHA-256 digest of a file, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src, dest):
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+        fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(src, dest):
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def place_file(src, dest, hardlink=False):
+    """
+    Materializes src at dest using the cheapest method the filesystem allows:
+    a hardlink (only if requested), a reflink, copy_file_range, and finally a
+    plain byte copy. Returns the name of the method that succeeded.
+    """
+    if hardlink:
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass
+    try:
+        _reflink(src, dest)
+        return "reflink"
+    except (ImportError, OSError):
+        pass
+    if hasattr(os, "copy_file_range"):
+        try:
+            _copy_file_range(src, dest)
+            return "copy_file_range"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+                raise
+    shutil.copyfile(src, dest)
+    return "copy"
+
+
+class _HashingReader:
+    """Wraps a binary stream and hashes everything read through it."""
+    def __init__(self, stream):
+        self.stream = stream
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.digest.update(chunk)
+        return chunk
+
+
+class AssetStore:
+    """
+    Content-addressed store for the files copied into an export's assets folder.
+
+    Each unique blob is written once. Files with identical content share one
+    output name, and different files that happen to share a basename get a
+    short hash suffix instead of overwriting each other.
+
+    `previous` takes the `entries` of an earlier run into the same folder; sources
+    whose size and mtime are unchanged and whose output still exists are reused
+    without being hashed or copied again.
+
+    With `output` (a converter.zip_output.ZipOutput), files are written into the
+    archive under `assets_dir` (a path inside it) instead of to the filesystem.
+    Placements then have to run one at a time. Files are hashed while they are
+    written, in the same read: only files whose size matches an earlier one are
+    hashed up front, to find duplicates. With hashed_names the name, and so the
+    hash, is needed before the entry is started, so those files are read twice.
+
+    With `hashed_names`, every file is written as name.<hash>.ext so it can be
+    cached forever; `manifest` maps the name it would otherwise have had (its
+    logical name) to the hashed one.
+    """
+    def __init__(self, assets_dir, hardlink=False, previous=None, output=None, hashed_names=False):
+        self.assets_dir = assets_dir
+        self.output = output
+        self.hashed_names = hashed_names
+        self.manifest = {}
+        self._logical_by_name = {}
+        self.hardlink = hardlink
+        self.previous = previous or {}
+        self.names_by_hash = {}
+        self.hashes_by_name = {}
+        self.entries = {}
+        self._metadata = {}
+        self.stats = {"files_seen": 0, "unique_blobs": 0, "files_reused": 0, "bytes_written": 0, "bytes_deduplicated": 0, "methods": {}}
+        # Hardlinks pointing at the same source inode never need re-hashing.
+        self._hash_by_inode = {}
+        # Sizes of the unique blobs so far; in an archive, files of a new size cannot
+        # be duplicates and are named before they are hashed.
+        self._blob_sizes = set()
+        # Archive placements not hashed yet, by size.
+        self._unhashed_by_size = {}
+        self._stats_lock = threading.Lock()
+
+    def _content_hash(self, path):
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        if key not in self._hash_by_inode:
+            self._hash_by_inode[key] = hash_file(path)
+        return self._hash_by_inode[key]
+
+    def _stream_hash(self, stream):
+        digest = hashlib.sha256()
+        with stream:
+            for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _stream_to_temp(self, stream):
+        """Copies a stream into a temporary file in the assets folder, hashing it on the way."""
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(prefix=".incoming-", dir=self.assets_dir)
+        with stream, os.fdopen(fd, 'wb') as f:
+            for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                f.write(chunk)
+        return digest.hexdigest(), temp_path
+
+    def _name_for(self, basename, content_hash):
+        logical = basename
+        if basename in self.hashes_by_name or basename in self.manifest:
+            stem, ext = os.path.splitext(basename)
+            logical = f"{stem}-{content_hash[:12]}{ext}"
+        if not self.hashed_names:
+            return logical
+        name = hashed_name(basename, content_hash)
+        self.manifest[logical] = name
+        self._logical_by_name[name] = logical
+        return name
+
+    def _record_name(self, key, name):
+        self.entries[key]["name"] = name
+        if self.hashed_names:
+            self.entries[key]["logical"] = self._logical_by_name[name]
+
+    def add(self, src_path, source=None):
+        """
+        Adds a file to the store and returns its name relative to the assets folder.
+
+        src_path is a filesystem path, or a path relative to `source` (a converter.vfs
+        source) when one is given. Entries without a local file, such as zip members,
+        are streamed straight into the assets folder in a single pass.
+        """
+        name, placement = self.commit(self.prepare(src_path, source))
+        if placement:
+            self.place(placement)
+        return name
+
+    def prepare(self, src_path, source=None):
+        """
+        First step of add(): stats and hashes the file (or streams an archive member
+        into a temporary file) without touching the store's state, so calls may run
+        concurrently. Pass the result to commit().
+        """
+        if source is not None:
+            key = source.uri(src_path)
+            local_path = source.local_path(src_path)
+            size, mtime_ns = source.stat(src_path)
+        else:
+            key = local_path = src_path
+            st = os.stat(src_path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        pending = {"src_path": src_path, "source": source, "key": key, "local_path": local_path, "size": size, "mtime_ns": mtime_ns,
+                   "sha256": None, "temp_path": None}
+
+        previous = self.previous.get(key)
+        if previous and (previous["size"], previous["mtime_ns"]) == (size, mtime_ns) \
+                and os.path.isfile(os.path.join(self.assets_dir, previous["name"])):
+            # Likely reusable; commit() confirms it against the names taken so far.
+            return pending
+        if self.output is not None and not self.hashed_names:
+            # Hashed while written into the archive, unless commit() needs it sooner.
+            return pending
+        if local_path is not None:
+            pending["sha256"] = self._content_hash(local_path)
+        elif self.output is not None:
+            # The hashed name has to be known before the entry is written, so the file is read twice.
+            pending["sha256"] = self._stream_hash(source.open(src_path))
+        else:
+            pending["sha256"], pending["temp_path"] = self._stream_to_temp(source.open(src_path))
+        return pending
+
+    def commit(self, pending):
+        """
+        Second step of add(): names a prepared file and records it. Commits must run
+        one at a time; committing in a fixed order gives deterministic names.
+        Returns (name, placement); placement is None when nothing needs writing,
+        otherwise it is passed to place().
+        """
+        self.stats["files_seen"] += 1
+        key, size = pending["key"], pending["size"]
+        reused = self._reuse_previous(key, size, pending["mtime_ns"])
+        if reused:
+            if pending["temp_path"]:
+                os.remove(pending["temp_path"])
+            return reused, None
+
+        if pending["sha256"] is None and self.output is not None and not self.hashed_names:
+            if size not in self._blob_sizes:
+                return self._commit_unhashed(pending)
+            # Same size as an earlier file: compare hashes so duplicates are written once.
+            for placement in self._unhashed_by_size.pop(size, []):
+                self._hash_placement(placement)
+        if pending["sha256"] is None:
+            # Prepared for reuse, but the previous name is now taken by other content.
+            if pending["local_path"] is not None:
+                pending["sha256"] = self._content_hash(pending["local_path"])
+            elif self.output is not None:
+                pending["sha256"] = self._stream_hash(pending["source"].open(pending["src_path"]))
+            else:
+                pending["sha256"], pending["temp_path"] = self._stream_to_temp(pending["source"].open(pending["src_path"]))
+        content_hash = pending["sha256"]
+        self.entries[key] = {"size": size, "mtime_ns": pending["mtime_ns"], "sha256": content_hash}
+        if content_hash in self.names_by_hash:
+            if pending["temp_path"]:
+                os.remove(pending["temp_path"])
+            self.stats["bytes_deduplicated"] += size
+            self._record_name(key, self.names_by_hash[content_hash])
+            return self.names_by_hash[content_hash], None
+
+        name = self._name_for(os.path.basename(pending["src_path"]), content_hash)
+        self.names_by_hash[content_hash] = name
+        self.hashes_by_name[name] = content_hash
+        self._blob_sizes.add(size)
+        self.stats["unique_blobs"] += 1
+        self.stats["bytes_written"] += size
+        self._record_name(key, name)
+        return name, {"name": name, "key": key, "size": size, "sha256": content_hash, "local_path": pending["local_path"],
+                      "temp_path": pending["temp_path"], "source": pending["source"], "src_path": pending["src_path"]}
+
+    def _commit_unhashed(self, pending):
+        """
+        Names an archive file of a size not seen before without hashing it; place()
+        hashes it as it is written. A clashing basename gets a suffix derived from
+        the source path instead of the content.
+        """
+        key, size = pending["key"], pending["size"]
+        name = self._name_for(os.path.basename(pending["src_path"]), hashlib.sha256(key.encode('utf-8')).hexdigest())
+        self.hashes_by_name[name] = None
+        self._blob_sizes.add(size)
+        self.entries[key] = {"size": size, "mtime_ns": pending["mtime_ns"], "sha256": None}
+        self.stats["unique_blobs"] += 1
+        self.stats["bytes_written"] += size
+        self._record_name(key, name)
+        placement = {"name": name, "key": key, "size": size, "sha256": None, "local_path": pending["local_path"],
+                     "temp_path": None, "source": pending["source"], "src_path": pending["src_path"]}
+        self._unhashed_by_size.setdefault(size, []).append(placement)
+        return name, placement
+
+    def _record_hash(self, placement, content_hash):
+        placement["sha256"] = content_hash
+        self.entries[placement["key"]]["sha256"] = content_hash
+        self.hashes_by_name[placement["name"]] = content_hash
+        self.names_by_hash.setdefault(content_hash, placement["name"])
+
+    def _hash_placement(self, placement):
+        """Hashes a committed but unhashed archive file ahead of its placement."""
+        if placement["local_path"] is not None:
+            content_hash = self._content_hash(placement["local_path"])
+        else:
+            content_hash = self._stream_hash(placement["source"].open(placement["src_path"]))
+        self._record_hash(placement, content_hash)
+
+    def place(self, placement):
+        """
+        Last step of add(): writes a committed file into the assets folder. Different
+        placements never share a destination, so they may run concurrently.
+        Returns the method used (see place_file, "stream" for archive members, or
+        "zip" when writing into an output archive).
+        """
+        if self.output is not None:
+            rel_path = posixpath.join(self.assets_dir, placement["name"])
+            if placement["local_path"] is not None:
+                stream = open(placement["local_path"], 'rb')
+            else:
+                stream = placement["source"].open(placement["src_path"])
+            with stream:
+                if placement["sha256"] is None:
+                    reader = _HashingReader(stream)
+                    self.output.write_stream(rel_path, reader, placement["size"])
+                    self._unhashed_by_size.get(placement["size"], []).remove(placement)
+                    self._record_hash(placement, reader.digest.hexdigest())
+                else:
+                    self.output.write_stream(rel_path, stream, placement["size"])
+            self.stats["methods"]["zip"] = self.stats["methods"].get("zip", 0) + 1
+            return "zip"
+        dest_path = os.path.join(self.assets_dir, placement["name"])
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        if placement["temp_path"]:
+            os.replace(placement["temp_path"], dest_path)
+            method = "stream"
+        else:
+            method = place_file(placement["local_path"], dest_path, hardlink=self.hardlink)
+        with self._stats_lock:
+            self.stats["methods"][method] = self.stats["methods"].get(method, 0) + 1
+        return method
+
+    def add_derived(self, src_path, source, variant, produce, suffix=""):
+        """
+        Adds a file derived from src_path, such as a decoded texture, and returns its
+        name relative to the assets folder. The name is the source's stem plus
+        `suffix` and the extension chosen by produce.
+
+        produce(stream) receives the opened source file and returns (data, extension)
+        or (data, extension, metadata); metadata (e.g. pixel size) is kept in the
+        entry and available from metadata(name). variant names the conversion
+        settings; a previous result for the same source and variant is reused
+        without calling produce again.
+        """
+        self.stats["files_seen"] += 1
+        if source is not None:
+            key = f"{source.uri(src_path)}#{variant}"
+            size, mtime_ns = source.stat(src_path)
+            opener = lambda: source.open(src_path)
+        else:
+            key = f"{src_path}#{variant}"
+            st = os.stat(src_path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+            opener = lambda: open(src_path, 'rb')
+
+        reused = self._reuse_previous(key, size, mtime_ns)
+        if reused:
+            return reused
+
+        with opener() as stream:
+            data, extension, *rest = produce(stream)
+        metadata = rest[0] if rest else None
+        content_hash = hashlib.sha256(data).hexdigest()
+        for placement in self._unhashed_by_size.pop(len(data), []):
+            self._hash_placement(placement)
+        self.entries[key] = {"size": size, "mtime_ns": mtime_ns, "sha256": content_hash}
+        if metadata is not None:
+            self.entries[key]["meta"] = metadata
+        if content_hash in self.names_by_hash:
+            self.stats["bytes_deduplicated"] += len(data)
+            self._record_name(key, self.names_by_hash[content_hash])
+            self._metadata[self.names_by_hash[content_hash]] = metadata
+            return self.names_by_hash[content_hash]
+
+        stem = os.path.splitext(os.path.basename(src_path))[0]
+        name = self._name_for(stem + suffix + extension, content_hash)
+        if self.output is not None:
+            self.output.write_bytes(posixpath.join(self.assets_dir, name), data)
+        else:
+            dest_path = os.path.join(self.assets_dir, name)
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+            with open(dest_path, 'wb') as f:
+                f.write(data)
+
+        self.names_by_hash[content_hash] = name
+        self.hashes_by_name[name] = content_hash
+        self._blob_sizes.add(len(data))
+        self.stats["unique_blobs"] += 1
+        self.stats["bytes_written"] += len(data)
+        self.stats["methods"]["derived"] = self.stats["methods"].get("derived", 0) + 1
+        self._record_name(key, name)
+        self._metadata[name] = metadata
+        return name
+
+    def add_generated(self, basename, data):
+        """
+        Writes a file the generator produced itself, such as an atlas page, and returns
+        its name relative to the assets folder. It is named like any other asset, so it
+        never overwrites a copied one, and it is recorded in `entries` so a later run's
+        prune_previous() removes it once it is no longer generated.
+        """
+        content_hash = hashlib.sha256(data).hexdigest()
+        name = self._name_for(basename, content_hash)
+        dest_path = os.path.join(self.assets_dir, name)
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        with open(dest_path, 'wb') as f:
+            f.write(data)
+        self.names_by_hash.setdefault(content_hash, name)
+        self.hashes_by_name[name] = content_hash
+        # Generated files have no source; the key can never match one.
+        self.entries[f"generated:{name}"] = {"size": len(data), "mtime_ns": 0, "sha256": content_hash}
+        self._record_name(f"generated:{name}", name)
+        self.stats["bytes_written"] += len(data)
+        return name
+
+    def remove(self, names):
+        """
+        Deletes files written by this run (e.g. images packed into an atlas) and
+        forgets them, so a later run copies their sources again instead of reusing
+        files that no longer exist.
+        """
+        names = set(names)
+        for key in [key for key, entry in self.entries.items() if entry["name"] in names]:
+            del self.entries[key]
+        for logical in [logical for logical, name in self.manifest.items() if name in names]:
+            del self.manifest[logical]
+        for name in names:
+            content_hash = self.hashes_by_name.pop(name, None)
+            if self.names_by_hash.get(content_hash) == name:
+                del self.names_by_hash[content_hash]
+            self._logical_by_name.pop(name, None)
+            self._metadata.pop(name, None)
+            path = os.path.join(self.assets_dir, name)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def prune_previous(self):
+        """
+        Removes files an earlier run wrote that this run no longer uses, e.g. the
+        old hashed names of changed assets. Returns the names removed.
+        """
+        current = {entry["name"] for entry in self.entries.values()}
+        removed = []
+        for name in sorted({entry["name"] for entry in self.previous.values()} - current):
+            path = os.path.join(self.assets_dir, name)
+            if os.path.isfile(path):
+                os.remove(path)
+                removed.append(name)
+        return removed
+
+    def metadata(self, name):
+        """Returns the metadata recorded by add_derived for an output name, if any."""
+        return self._metadata.get(name)
+
+    def _reuse_previous(self, key, size, mtime_ns):
+        entry = self.previous.get(key)
+        if not entry:
+            return None
+        if (entry["size"], entry["mtime_ns"]) != (size, mtime_ns):
+            return None
+        # Entries from a run with the other naming scheme are not reused.
+        if self.hashed_names != ("logical" in entry):
+            return None
+        name, content_hash = entry["name"], entry["sha256"]
+        if self.hashes_by_name.get(name, content_hash) != content_hash:
+            return None
+        logical = entry.get("logical")
+        if logical is not None and self.manifest.get(logical, name) != name:
+            return None
+        if not os.path.isfile(os.path.join(self.assets_dir, name)):
+            return None
+        self.names_by_hash.setdefault(content_hash, name)
+        self.hashes_by_name[name] = content_hash
+        self.entries[key] = dict(entry)
+        if logical is not None:
+            self.manifest[logical] = name
+            self._logical_by_name[name] = logical
+        if "meta" in entry:
+            self._metadata[name] = entry["meta"]
+        self.stats["files_reused"] += 1
+        return name
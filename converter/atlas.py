@@ -0,0 +1,215 @@
+"""
+Build-time texture atlas packing.
+
+Small layer images and UI sprites are packed into one or more atlas pages with a
+MaxRects bin packer (best short side fit). Each page is written as a PNG together
+with a Pixi spritesheet JSON whose frame names are the original asset URLs, so
+the runtime can swap individual textures for atlas frames without renaming.
+"""
+import io
+import struct
+import zlib
+
+from converter.textures import encode_png
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: without it only png sprites are packed.
+    Image = None
+
+DEFAULT_PAGE_SIZE = 2048
+DEFAULT_PADDING = 2
+
+
+class MaxRectsPacker:
+    """MaxRects bin packer for a single page, using the best short side fit heuristic."""
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free_rects = [(0, 0, width, height)]
+
+    def insert(self, width, height):
+        """Places a width x height rectangle and returns its (x, y), or None if it does not fit."""
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free_rects:
+            if width <= fw and height <= fh:
+                leftover_x, leftover_y = fw - width, fh - height
+                score = (min(leftover_x, leftover_y), max(leftover_x, leftover_y))
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy), score
+        if best is None:
+            return None
+        self._split(best[0], best[1], width, height)
+        return best
+
+    def _split(self, x, y, width, height):
+        new_rects = []
+        for rect in self.free_rects:
+            fx, fy, fw, fh = rect
+            if x >= fx + fw or x + width <= fx or y >= fy + fh or y + height <= fy:
+                new_rects.append(rect)
+                continue
+            # Keep the parts of the free rectangle that the placed one does not cover.
+            if x > fx:
+                new_rects.append((fx, fy, x - fx, fh))
+            if x + width < fx + fw:
+                new_rects.append((x + width, fy, fx + fw - x - width, fh))
+            if y > fy:
+                new_rects.append((fx, fy, fw, y - fy))
+            if y + height < fy + fh:
+                new_rects.append((fx, y + height, fw, fy + fh - y - height))
+        self.free_rects = _prune_contained(new_rects)
+
+
+def _prune_contained(rects):
+    rects = sorted(set(rects), key=lambda r: r[2] * r[3], reverse=True)
+    kept = []
+    for rect in rects:
+        x, y, w, h = rect
+        if not any(x >= kx and y >= ky and x + w <= kx + kw and y + h <= ky + kh for kx, ky, kw, kh in kept):
+            kept.append(rect)
+    return kept
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def decode_png(data):
+    """
+    Minimal PNG decoder for 8-bit, non-interlaced gray, gray+alpha, RGB and RGBA
+    images. Returns (width, height, rgba) or None for anything else. Meant for the
+    small sprites the atlas packs, where a pure-Python unfilter is fast enough.
+    """
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    pos, idat = 8, []
+    width = height = color_type = None
+    while pos + 8 <= len(data):
+        length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if tag == b"IHDR":
+            width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if bit_depth != 8 or interlace or color_type not in (0, 2, 4, 6):
+                return None
+        elif tag == b"IDAT":
+            idat.append(body)
+        elif tag == b"IEND":
+            break
+    if width is None:
+        return None
+
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}[color_type]
+    stride = width * channels
+    raw = zlib.decompress(b"".join(idat))
+    pixels = bytearray(stride * height)
+    previous = bytearray(stride)
+    for y in range(height):
+        filter_type = raw[y * (stride + 1)]
+        line = bytearray(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        if filter_type == 1:
+            for i in range(channels, stride):
+                line[i] = (line[i] + line[i - channels]) & 0xFF
+        elif filter_type == 2:
+            line = bytearray((a + b) & 0xFF for a, b in zip(line, previous))
+        elif filter_type == 3:
+            for i in range(stride):
+                left = line[i - channels] if i >= channels else 0
+                line[i] = (line[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif filter_type == 4:
+            for i in range(stride):
+                left = line[i - channels] if i >= channels else 0
+                up_left = previous[i - channels] if i >= channels else 0
+                line[i] = (line[i] + _paeth(left, previous[i], up_left)) & 0xFF
+        pixels[y * stride:(y + 1) * stride] = line
+        previous = line
+
+    if channels == 4:
+        return width, height, bytes(pixels)
+    rgba = bytearray(width * height * 4)
+    if channels in (1, 2):
+        rgba[0::4] = rgba[1::4] = rgba[2::4] = pixels[0::channels]
+    else:
+        rgba[0::4], rgba[1::4], rgba[2::4] = pixels[0::3], pixels[1::3], pixels[2::3]
+    rgba[3::4] = pixels[1::2] if channels == 2 else b"\xff" * (width * height)
+    return width, height, bytes(rgba)
+
+
+def decode_rgba(data):
+    """Decodes an image file to (width, height, rgba), or None if it cannot be decoded here."""
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert("RGBA")
+                return image.width, image.height, image.tobytes()
+        except OSError:
+            return None
+    return decode_png(data)
+
+
+def pack_sprites(sprites, page_size=DEFAULT_PAGE_SIZE, padding=DEFAULT_PADDING):
+    """
+    Packs sprites into atlas pages. sprites is a list of (key, width, height, rgba).
+    Returns a list of pages, each {"width", "height", "rgba", "frames": {key: (x, y, w, h)}}.
+    Sprites are placed tallest first, which keeps MaxRects pages dense.
+    """
+    pages = []
+    packers = []
+    for key, width, height, rgba in sorted(sprites, key=lambda s: (s[2], s[1]), reverse=True):
+        padded_width, padded_height = width + padding, height + padding
+        if padded_width > page_size or padded_height > page_size:
+            continue
+        position = None
+        for page, packer in zip(pages, packers):
+            position = packer.insert(padded_width, padded_height)
+            if position:
+                break
+        if position is None:
+            packer = MaxRectsPacker(page_size, page_size)
+            page = {"frames": {}, "sprites": []}
+            pages.append(page)
+            packers.append(packer)
+            position = packer.insert(padded_width, padded_height)
+        page["frames"][key] = (position[0], position[1], width, height)
+        page["sprites"].append((position, width, height, rgba))
+
+    for page in pages:
+        # Trim the page to the used area to avoid shipping empty pixels.
+        page["width"] = max(x + w for x, y, w, h in page["frames"].values())
+        page["height"] = max(y + h for x, y, w, h in page["frames"].values())
+        canvas = bytearray(page["width"] * page["height"] * 4)
+        stride = page["width"] * 4
+        for (x, y), width, height, rgba in page.pop("sprites"):
+            row = width * 4
+            for sy in range(height):
+                offset = (y + sy) * stride + x * 4
+                canvas[offset:offset + row] = rgba[sy * row:(sy + 1) * row]
+        page["rgba"] = bytes(canvas)
+    return pages
+
+
+def spritesheet_json(page, image_name):
+    """Returns the Pixi spritesheet data for a packed page."""
+    frames = {}
+    for key, (x, y, w, h) in sorted(page["frames"].items()):
+        frames[key] = {
+            "frame": {"x": x, "y": y, "w": w, "h": h},
+            "rotated": False,
+            "trimmed": False,
+            "spriteSourceSize": {"x": 0, "y": 0, "w": w, "h": h},
+            "sourceSize": {"w": w, "h": h},
+        }
+    return {
+        "frames": frames,
+        "meta": {"image": image_name, "format": "RGBA8888", "size": {"w": page["width"], "h": page["height"]}, "scale": "1"},
+    }
+
+
+def encode_page(page):
+    return encode_png(page["width"], page["height"], page["rgba"])
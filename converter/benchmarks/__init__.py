@@ -0,0 +1,4 @@
+"""
+Benchmarks for the converter: a synthetic wallpaper corpus and a stage-by-stage
+timing runner with JSON baselines. Run with `python -m converter.benchmarks`.
+"""
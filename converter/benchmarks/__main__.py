@@ -0,0 +1,45 @@
+import argparse
+import sys
+
+from converter.benchmarks.corpus import PRESETS
+from converter.benchmarks.runner import DEFAULT_THRESHOLD, cases_for, compare, load_baseline, run_suite, save_baseline, scale_cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wallpaper Engine Web Exporter benchmarks")
+    parser.add_argument("--sizes", type=str, default="small,medium",
+                        help=f"Comma-separated corpus sizes to run ({', '.join(PRESETS)}).")
+    parser.add_argument("--scale", type=str, action="append", default=[],
+                        help="Add a sweep over one corpus parameter on top of the small preset, e.g. layers=10,100,1000.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per case; the median is recorded.")
+    parser.add_argument("--out", type=str,
+                        help="Write the results as a JSON baseline to this file.")
+    parser.add_argument("--compare", type=str,
+                        help="Compare the results against a stored baseline and exit non-zero on regressions.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown before a stage counts as a regression (0.2 = 20%%).")
+    parser.add_argument("--work-dir", type=str,
+                        help="Directory for the temporary corpus (default: the system temp directory).")
+    args = parser.parse_args()
+
+    cases = cases_for([name.strip() for name in args.sizes.split(",") if name.strip()])
+    for spec in args.scale:
+        cases.update(scale_cases(spec))
+    results = run_suite(cases, args.repeat, args.work_dir)
+    if args.out:
+        save_baseline(results, args.out)
+        print(f"Baseline written to {args.out}")
+
+    if args.compare:
+        regressions = compare(load_baseline(args.compare), results, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression['case']}/{regression['stage']} took {regression['current'] * 1000:.2f} ms "
+                  f"vs {regression['baseline'] * 1000:.2f} ms ({regression['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
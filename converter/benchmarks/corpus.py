@@ -0,0 +1,69 @@
+"""
+Synthetic wallpaper corpus for benchmarks.
+
+make_wallpaper() writes an unpacked scene wallpaper with a chosen number of image
+layers, distinct image assets of a given size, effects, particle emitters and an
+optional amount of padding per object to inflate scene.json.
+"""
+import json
+import os
+import random
+
+from converter.textures import encode_png
+
+# Named corpus sizes; each value is a set of make_wallpaper() keyword arguments.
+PRESETS = {
+    "small": {"layers": 10, "assets": 5, "asset_size": 64, "effects": 2, "particles": 1},
+    "medium": {"layers": 200, "assets": 50, "asset_size": 256, "effects": 50, "particles": 10},
+    "large": {"layers": 2000, "assets": 200, "asset_size": 512, "effects": 500, "particles": 50, "object_padding": 2048},
+}
+
+EFFECT_NAMES = ("scroll", "opacity", "blurPrecise", "colorGrading", "waterRipple", "foliageSway")
+
+
+def make_wallpaper(path, layers=10, assets=5, asset_size=64, effects=0, particles=0, object_padding=0, seed=0):
+    """
+    Writes a synthetic wallpaper to path and returns path. Layers reuse the
+    `assets` distinct PNG images round-robin, so asset deduplication is exercised
+    too. The output is deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    materials = os.path.join(str(path), "materials")
+    os.makedirs(materials, exist_ok=True)
+
+    asset_names = []
+    for index in range(max(assets, 1)):
+        name = f"materials/asset{index}.png"
+        color = bytes([rng.randrange(256), rng.randrange(256), rng.randrange(256), 255])
+        with open(os.path.join(str(path), name), 'wb') as f:
+            f.write(encode_png(asset_size, asset_size, color * (asset_size * asset_size)))
+        asset_names.append(name)
+
+    objects = []
+    for index in range(layers):
+        obj = {
+            "name": f"Layer {index}",
+            "image": asset_names[index % len(asset_names)],
+            "origin": f"{rng.uniform(0, 1920):.3f} {rng.uniform(0, 1080):.3f} 0",
+            "scale": "1 1 1",
+            "depth": round(rng.random(), 4),
+        }
+        if object_padding:
+            obj["notes"] = "x" * object_padding
+        objects.append(obj)
+    for index in range(effects):
+        if not objects:
+            break
+        objects[index % len(objects)].setdefault("effects", []).append({
+            "name": EFFECT_NAMES[index % len(EFFECT_NAMES)],
+            "file": f"effects/{EFFECT_NAMES[index % len(EFFECT_NAMES)]}/effect.json",
+        })
+    for index in range(particles):
+        objects.append({"name": f"Particles {index}", "particle": f"particles/emitter{index}.json"})
+
+    scene = {"general": {"properties": {}}, "objects": objects}
+    with open(os.path.join(str(path), "scene.json"), 'w', encoding='utf-8') as f:
+        json.dump(scene, f)
+    with open(os.path.join(str(path), "project.json"), 'w', encoding='utf-8') as f:
+        json.dump({"title": f"Synthetic {layers} layers", "type": "scene", "file": "scene.json"}, f)
+    return path
@@ -0,0 +1,150 @@
+"""
+Times each conversion stage over synthetic wallpapers and compares runs against
+stored JSON baselines.
+"""
+import contextlib
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+
+from converter.benchmarks.corpus import PRESETS, make_wallpaper
+from converter.detector import detect_wallpaper_type
+from converter.generator_scene import SceneGenerator
+from converter.parser import parse_project_to_ir
+from converter.validator import validate_output
+from converter.vfs import ProjectIndex
+
+BASELINE_VERSION = 1
+STAGES = ("detect", "parse", "generate", "validate")
+# A stage regresses when its median is this much slower than the baseline (0.2 = 20%).
+DEFAULT_THRESHOLD = 0.2
+# Stages faster than this (in seconds) in the baseline are too noisy to compare.
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def _timed(timings, stage, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings.setdefault(stage, []).append(time.perf_counter() - start)
+    return result
+
+
+def _detect(wallpaper):
+    # Indexing the folder is part of detection in the orchestrator.
+    project = ProjectIndex(wallpaper)
+    detect_wallpaper_type(project)
+    return project
+
+
+def _generate(ir, output, project):
+    SceneGenerator(ir, output, source_dir=project, write_debug_json=False).generate()
+
+
+def run_case(params, repeat=3, work_dir=None):
+    """
+    Builds one synthetic wallpaper from params (see corpus.make_wallpaper) and
+    times every stage `repeat` times. Returns {stage: {"median", "min", "runs"}}.
+    Each repetition starts from a fresh index and an empty output folder.
+    """
+    root = tempfile.mkdtemp(prefix="wpe-bench-", dir=work_dir)
+    try:
+        wallpaper = make_wallpaper(os.path.join(root, "wallpaper"), **params)
+        timings = {}
+        for run in range(repeat):
+            output = os.path.join(root, f"output{run}")
+            # Stage output goes to the log and stdout; keep the measurements quiet.
+            with contextlib.redirect_stdout(io.StringIO()):
+                project = _timed(timings, "detect", _detect, wallpaper)
+                ir = _timed(timings, "parse", parse_project_to_ir, project)
+                _timed(timings, "generate", _generate, ir, output, project)
+                _timed(timings, "validate", validate_output, output)
+        return {
+            stage: {"median": statistics.median(runs), "min": min(runs), "runs": len(runs)}
+            for stage, runs in timings.items()
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def run_suite(cases, repeat=3, work_dir=None):
+    """Runs named cases ({name: params}) and returns a baseline document."""
+    results = {}
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        for name, params in cases.items():
+            print(f"Benchmarking {name}: {params}")
+            results[name] = {"params": params, "stages": run_case(params, repeat, work_dir)}
+            for stage in STAGES:
+                print(f"  {stage:<9} {results[name]['stages'][stage]['median'] * 1000:10.2f} ms")
+    finally:
+        logging.getLogger().setLevel(previous_level)
+    return {
+        "version": BASELINE_VERSION,
+        "created": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "cases": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two baseline documents. Returns a list of regressions, each
+    {"case", "stage", "baseline", "current", "ratio"}, for stages whose median
+    grew by more than threshold. Cases or stages missing from either side are skipped.
+    """
+    regressions = []
+    for name, case in current.get("cases", {}).items():
+        base_case = baseline.get("cases", {}).get(name)
+        if not base_case or base_case.get("params") != case.get("params"):
+            continue
+        for stage, timing in case["stages"].items():
+            base_timing = base_case["stages"].get(stage)
+            if not base_timing or base_timing["median"] < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = timing["median"] / base_timing["median"]
+            if ratio > 1 + threshold:
+                regressions.append({
+                    "case": name, "stage": stage,
+                    "baseline": base_timing["median"], "current": timing["median"], "ratio": round(ratio, 3),
+                })
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(document, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+
+
+def cases_for(names):
+    """Maps preset names (see corpus.PRESETS) to their parameters."""
+    unknown = [name for name in names if name not in PRESETS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark size(s): {', '.join(unknown)}. Choose from {', '.join(PRESETS)}.")
+    return {name: PRESETS[name] for name in names}
+
+
+def scale_cases(spec, base="small"):
+    """
+    Builds a sweep from a spec like "layers=10,100,1000": one case per value, each
+    a copy of the `base` preset with that parameter replaced.
+    """
+    param, _, values = spec.partition("=")
+    param = param.strip()
+    if param not in PRESETS[base] and param not in ("object_padding", "seed"):
+        raise ValueError(f"Unknown corpus parameter: {param}")
+    return {f"{param}={value}": dict(PRESETS[base], **{param: int(value)}) for value in values.split(",") if value.strip()}
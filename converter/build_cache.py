@@ -0,0 +1,145 @@
+import json
+import os
+
+from converter.asset_store import hash_file
+from converter.profiling import PROFILE_NAME, TRACE_NAME
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 1
+
+# Outputs that are rewritten on every run (e.g. the orchestrator's conversion log
+# and --profile dumps) and therefore never take part in freshness checks.
+VOLATILE_OUTPUTS = {MANIFEST_NAME, "debug.json", PROFILE_NAME, TRACE_NAME}
+
+
+def fingerprint_file(path, with_hash=False):
+    """Returns a fingerprint (size, mtime and optionally a content hash) for a single file."""
+    st = os.stat(path)
+    fingerprint = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        fingerprint["sha256"] = hash_file(path)
+    return fingerprint
+
+
+def fingerprint_tree(root, with_hash=False, exclude=()):
+    """
+    Fingerprints every file below root with a single os.scandir walk.
+    Returns a dict keyed by POSIX-style path relative to root.
+    """
+    fingerprints = {}
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                rel_path = prefix + entry.name
+                if rel_path in exclude:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path + "/"))
+                elif entry.is_file():
+                    st = entry.stat()
+                    fingerprint = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+                    if with_hash:
+                        fingerprint["sha256"] = hash_file(entry.path)
+                    fingerprints[rel_path] = fingerprint
+    return fingerprints
+
+
+def fingerprints_match(old, new):
+    """
+    Two fingerprints match when size and mtime agree, or, failing that, when both
+    carry a content hash (SHA-256, or the CRC-32 stored for zip entries) and the
+    hashes agree (e.g. a file that was only touched).
+    """
+    if old is None or new is None:
+        return False
+    if old.get("size") != new.get("size"):
+        return False
+    if old.get("mtime_ns") == new.get("mtime_ns"):
+        return True
+    return any(key in old and old.get(key) == new.get(key) for key in ("sha256", "crc32"))
+
+
+def fingerprint_sets_match(old, new):
+    if old is None or new is None or old.keys() != new.keys():
+        return False
+    return all(fingerprints_match(old[key], new[key]) for key in new)
+
+
+class BuildManifest:
+    """
+    Per-output record of the inputs each conversion stage consumed and the outputs
+    it produced. A stage is fresh when its recorded inputs and options still match
+    and every output it wrote is still present and unchanged.
+    """
+    def __init__(self, output_dir, with_hash=False, force=False):
+        self.output_dir = str(output_dir)
+        self.path = os.path.join(self.output_dir, MANIFEST_NAME)
+        self.with_hash = with_hash
+        self.force = force
+        self.stages = {}
+        if not force:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.stages = data.get("stages", {})
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "stages": self.stages}, f, separators=(',', ':'))
+
+    def fingerprint_inputs(self, root, paths=None):
+        """Fingerprints the given relative paths under root, or the whole tree if paths is None."""
+        if paths is None:
+            return fingerprint_tree(root, with_hash=self.with_hash)
+        fingerprints = {}
+        for rel_path in paths:
+            full_path = os.path.join(root, rel_path)
+            if os.path.isfile(full_path):
+                fingerprints[rel_path] = fingerprint_file(full_path, with_hash=self.with_hash)
+        return fingerprints
+
+    def fingerprint_outputs(self):
+        return fingerprint_tree(self.output_dir, exclude=VOLATILE_OUTPUTS)
+
+    def is_fresh(self, stage, inputs, options=None):
+        """Returns True if the stage can be skipped for these input fingerprints and options."""
+        if self.force:
+            return False
+        record = self.stages.get(stage)
+        if not record or record.get("options") != options:
+            return False
+        if not fingerprint_sets_match(record.get("inputs"), inputs):
+            return False
+        for rel_path, fingerprint in record.get("outputs", {}).items():
+            full_path = os.path.join(self.output_dir, rel_path)
+            if not os.path.isfile(full_path) or not fingerprints_match(fingerprint, fingerprint_file(full_path)):
+                return False
+        return True
+
+    def record(self, stage, inputs, outputs, options=None, data=None):
+        """
+        Records a completed stage. outputs is a list of paths relative to the output
+        directory; they are fingerprinted now so later edits invalidate the stage.
+        """
+        self.stages[stage] = {
+            "inputs": inputs,
+            "options": options,
+            "outputs": {rel_path: fingerprint_file(os.path.join(self.output_dir, rel_path)) for rel_path in outputs},
+            "data": data,
+        }
+
+    def stage_data(self, stage):
+        record = self.stages.get(stage)
+        return record.get("data") if record else None
+
+    def invalidate(self, stage):
+        self.stages.pop(stage, None)
@@ -2,36 +2,48 @@ import os
 import json
 from pathlib import Path
 
-def detect_wallpaper_type(input_path: Path):
+from converter.json_stream import top_level_keys
+from converter.parser import STREAMING_THRESHOLD
+from converter.vfs import ProjectIndex
+
+def detect_wallpaper_type(input_path):
     """
     Detects the type of wallpaper based on the files present in the input_path.
-    Returns the detected type and relevant metadata.
+    input_path may be a folder, a .zip archive, a source from converter.vfs or a
+    ProjectIndex; pass an index to share its listing and parsed scene.json with
+    later stages. Returns the detected type and relevant metadata.
     """
-    if not input_path.exists():
+    # Raises FileNotFoundError if the input does not exist
+    project = ProjectIndex.of(input_path)
+    if not project.exists():
         raise FileNotFoundError(f"Input path does not exist: {input_path}")
 
     # Check for video wallpaper
-    video_files = list(input_path.glob("*.mp4")) + list(input_path.glob("*.webm"))
+    root_names = project.listdir("")
+    video_files = [name for name in root_names if name.endswith(".mp4")] + [name for name in root_names if name.endswith(".webm")]
+    video_files = [name for name in video_files if project.is_file(name)]
     if video_files:
-        return "video", {"video_file": str(video_files[0].name)}
+        return "video", {"video_file": video_files[0]}
 
     # Check for parallax wallpaper
-    materials_path = input_path / "materials"
-    if materials_path.is_dir():
-        image_files = [f for f in materials_path.iterdir() if f.suffix.lower() in [".png", ".jpg", ".jpeg", ".gif", ".bmp"]]
+    if project.is_dir("materials"):
+        image_files = [name for name in project.listdir("materials") if os.path.splitext(name)[1].lower() in [".png", ".jpg", ".jpeg", ".gif", ".bmp"]]
         if len(image_files) >= 2:
-            return "parallax", {"image_files": [str(f.name) for f in image_files]}
+            return "parallax", {"image_files": image_files}
 
     # Check for scene.json for parallax hints
-    scene_json_path = input_path / "scene.json"
-    if scene_json_path.is_file():
-        try:
-            with open(scene_json_path, 'r', encoding='utf-8') as f:
-                scene_data = json.load(f)
-            if "layers" in scene_data:
+    try:
+        if project.is_file("scene.json") and not project.is_parsed("scene.json") and project.stat("scene.json")[0] >= STREAMING_THRESHOLD:
+            # Large scenes: only look at the top-level keys, the parser streams the rest.
+            with project.open("scene.json") as f:
+                if "layers" in top_level_keys(f):
+                    return "parallax", {"scene_file": "scene.json"}
+        else:
+            scene_data = project.scene
+            if scene_data is not None and "layers" in scene_data:
                 return "parallax", {"scene_data": scene_data}
-        except json.JSONDecodeError:
-            pass # Malformed JSON, ignore for detection
+    except json.JSONDecodeError:
+        pass # Malformed JSON, ignore for detection
 
     # Hybrid (placeholder for future phases)
     # Add stubs for particles/effects/shaders presence (Phase 3).
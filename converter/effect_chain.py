@@ -0,0 +1,214 @@
+"""
+Effect compilation: maps each layer's effects to runtime filters with the
+EFFECT_MAPPERS and optimizes the resulting chain. Every Pixi filter is another
+full-screen render pass, so:
+
+- adjacent ColorMatrixFilters are multiplied into a single matrix;
+- identity effects (identity matrix, zero blur, zero displacement) are dropped;
+- runs of per-pixel effects (colour matrices and displacements) are fused into
+  one generated fragment shader, a "ShaderFilter".
+
+Effects that only animate a property (scroll, opacity, ...) cost no pass; the
+runtime does not animate layers yet, so they are only counted.
+"""
+import hashlib
+import logging
+
+from converter.mappers.effects import EFFECT_MAPPERS
+
+IDENTITY_MATRIX = [1, 0, 0, 0, 0,
+                   0, 1, 0, 0, 0,
+                   0, 0, 1, 0, 0,
+                   0, 0, 0, 1, 0]
+# Filters that read only their own pixel (after moving the sample point) and can
+# share one shader.
+FUSIBLE_FILTERS = {"ColorMatrixFilter", "DisplacementFilter"}
+# DisplacementFilter scale (pixels) to ripple amplitude (texture coordinates).
+RIPPLE_AMPLITUDE_PER_SCALE = 0.0002
+EPSILON = 1e-9
+# Wallpaper Engine names effect folders in lower case (effects/waterripple/effect.json).
+MAPPER_KEYS = {key.lower(): key for key in EFFECT_MAPPERS}
+
+
+def effect_type(effect):
+    """
+    The mapper key of an IR effect, matched case-insensitively against its name, its
+    type and the folder of effects/<type>/effect.json.
+    """
+    parts = str(effect.get("file") or "").replace("\\", "/").split("/")
+    candidates = [effect.get("name"), effect.get("type"), parts[-2] if len(parts) >= 2 else None]
+    for candidate in candidates:
+        if isinstance(candidate, str) and candidate.lower() in MAPPER_KEYS:
+            return MAPPER_KEYS[candidate.lower()]
+    return effect.get("name") or effect.get("type") or "unknown"
+
+
+def color_matrix(settings):
+    """A ColorMatrixFilter matrix in Pixi's 4x5 layout; 4x4 matrices get zero offsets."""
+    matrix = list(settings.get("matrix") or IDENTITY_MATRIX)
+    if len(matrix) == 16:
+        matrix = [value for row in range(4) for value in matrix[row * 4:row * 4 + 4] + [0]]
+    if len(matrix) != 20:
+        raise ValueError(f"Color matrix must have 16 or 20 values, got {len(matrix)}")
+    return [float(value) for value in matrix]
+
+
+def multiply_color_matrices(first, second):
+    """The 4x5 matrix applying `first` and then `second`."""
+    result = []
+    for row in range(4):
+        b = second[row * 5:row * 5 + 5]
+        for column in range(5):
+            value = sum(b[k] * first[k * 5 + column] for k in range(4))
+            if column == 4:
+                value += b[4]
+            result.append(value)
+    return result
+
+
+def _is_identity(spec):
+    settings = spec["settings"]
+    if spec["filter"] == "ColorMatrixFilter":
+        return all(abs(a - b) < EPSILON for a, b in zip(settings["matrix"], IDENTITY_MATRIX))
+    if spec["filter"] == "BlurFilter":
+        return not settings.get("strength")
+    if spec["filter"] == "DisplacementFilter":
+        return not settings.get("scale")
+    return False
+
+
+def _drop_identities(chain, stats):
+    kept = [spec for spec in chain if not _is_identity(spec)]
+    stats["dropped"] += len(chain) - len(kept)
+    return kept
+
+
+def _merge_matrices(chain, stats):
+    merged = []
+    for spec in chain:
+        if spec["filter"] == "ColorMatrixFilter":
+            if merged and merged[-1]["filter"] == "ColorMatrixFilter":
+                merged[-1]["settings"]["matrix"] = multiply_color_matrices(merged[-1]["settings"]["matrix"], spec["settings"]["matrix"])
+                stats["merged"] += 1
+                continue
+        merged.append(spec)
+    return merged
+
+
+def fused_shader(ripples, with_matrix):
+    """
+    Fragment shader for a fused run: `ripples` displacements (the ripple template's
+    procedural offset, applied last-to-first so the result matches running them as
+    separate passes), then one colour matrix on unpremultiplied colour, as Pixi's
+    ColorMatrixFilter does.
+    """
+    lines = ["precision mediump float;", "", "varying vec2 vTextureCoord;", "uniform sampler2D uSampler;"]
+    if ripples:
+        lines.append("uniform float u_time;")
+        lines += [f"uniform float u_speed{index};\nuniform float u_amplitude{index};" for index in range(ripples)]
+    if with_matrix:
+        lines += ["uniform mat4 u_matrix;", "uniform vec4 u_offset;"]
+    lines += ["", "void main() {", "    vec2 coord = vTextureCoord;"]
+    for index in reversed(range(ripples)):
+        lines += [f"    coord.x += sin(coord.y * 10.0 + u_time * u_speed{index}) * u_amplitude{index};",
+                  f"    coord.y += cos(coord.x * 10.0 + u_time * u_speed{index}) * u_amplitude{index};"]
+    lines.append("    vec4 color = texture2D(uSampler, coord);")
+    if with_matrix:
+        lines += ["    if (color.a > 0.0) color.rgb /= color.a;",
+                  "    color = clamp(u_matrix * color + u_offset, 0.0, 1.0);",
+                  "    color.rgb *= color.a;"]
+    lines += ["    gl_FragColor = color;", "}", ""]
+    return "\n".join(lines)
+
+
+def _fuse(run, shaders, stats):
+    """
+    Replaces a run of fusible filters with one ShaderFilter. A run of colour matrices
+    alone is already a single ColorMatrixFilter and stays as it is; a lone
+    displacement still becomes a shader, since Pixi's DisplacementFilter needs a
+    displacement map sprite the IR does not provide.
+    """
+    ripples = [spec for spec in run if spec["filter"] == "DisplacementFilter"]
+    matrices = [spec["settings"]["matrix"] for spec in run if spec["filter"] == "ColorMatrixFilter"]
+    if not ripples:
+        return run
+    # Colour matrices are per-pixel, so they commute with moving the sample point
+    # and collapse into one matrix applied after every displacement.
+    matrix = IDENTITY_MATRIX
+    for step in matrices:
+        matrix = multiply_color_matrices(matrix, step)
+    with_matrix = bool(matrices)
+    source = fused_shader(len(ripples), with_matrix)
+    shader_id = hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+    shaders[shader_id] = source
+
+    uniforms = {"u_time": 0.0}
+    for index, spec in enumerate(ripples):
+        uniforms[f"u_speed{index}"] = float(spec["settings"].get("speed", 1))
+        uniforms[f"u_amplitude{index}"] = spec["settings"]["scale"] * RIPPLE_AMPLITUDE_PER_SCALE
+    if with_matrix:
+        # GLSL matrices are column-major.
+        uniforms["u_matrix"] = [matrix[row * 5 + column] for column in range(4) for row in range(4)]
+        uniforms["u_offset"] = [matrix[row * 5 + 4] for row in range(4)]
+    stats["fused"] += len(run) - 1
+    return [{"filter": "ShaderFilter", "settings": {"shader": shader_id, "uniforms": uniforms,
+                                                     "fused": [spec["filter"] for spec in run]}}]
+
+
+def optimize_chain(chain, shaders, stats):
+    """
+    Optimizes a list of mapped filters ({"filter", "settings"}) in order. Generated
+    fragment shaders are added to `shaders` by id; `stats` counts the merged,
+    dropped and fused filters.
+    """
+    chain = [{"filter": "ColorMatrixFilter", "settings": {"matrix": color_matrix(spec["settings"])}}
+             if spec["filter"] == "ColorMatrixFilter" else spec for spec in chain]
+    # Dropping identities first lets matrices on either side of them merge; merged
+    # matrices that cancel out are dropped afterwards.
+    kept = _drop_identities(_merge_matrices(_drop_identities(chain, stats), stats), stats)
+
+    optimized, run = [], []
+    for spec in kept + [None]:
+        if spec is not None and spec["filter"] in FUSIBLE_FILTERS:
+            run.append(spec)
+            continue
+        optimized += _fuse(run, shaders, stats)
+        run = []
+        if spec is not None:
+            optimized.append(spec)
+    return optimized
+
+
+def compile_effects(ir):
+    """
+    Runs the effect stage over an IR in place: each scene layer gets "filters" (the
+    optimized chain for its effects, in scene order); generated shaders go to
+    scene["effect_shaders"]. Layers without effects are untouched.
+    Returns statistics for the conversion log.
+    """
+    scene = ir.get("scene", {})
+    stats = {"effects": 0, "unmapped": [], "animations": 0, "passes_before": 0, "passes_after": 0, "merged": 0, "dropped": 0, "fused": 0}
+    layers = {layer.get("name"): layer for layer in scene.get("layers", [])}
+    chains = {}
+    for effect in scene.get("effects", []):
+        stats["effects"] += 1
+        layer = layers.get(effect.get("layer"))
+        mapper = EFFECT_MAPPERS.get(effect_type(effect))
+        if layer is None or mapper is None:
+            stats["unmapped"].append(effect_type(effect))
+            continue
+        settings = dict(effect, **effect["settings"]) if isinstance(effect.get("settings"), dict) else effect
+        chains.setdefault(layer.get("name"), []).append(mapper(settings))
+
+    shaders = {}
+    for name, mapped in chains.items():
+        filters = [spec for spec in mapped if "filter" in spec]
+        stats["passes_before"] += len(filters)
+        layers[name]["filters"] = optimize_chain(filters, shaders, stats)
+        stats["animations"] += len(mapped) - len(filters)
+        stats["passes_after"] += len(layers[name]["filters"])
+    if shaders:
+        scene["effect_shaders"] = shaders
+    if stats["unmapped"]:
+        logging.warning(f"Effects without a mapper or target layer: {sorted(set(stats['unmapped']))}")
+    return stats
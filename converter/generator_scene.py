@@ -1,50 +1,306 @@
+import glob
+import hashlib
 import json
 import os
-import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from converter.asset_store import ASSET_MANIFEST_NAME, AssetStore, hashed_name
+from converter.atlas import DEFAULT_PAGE_SIZE, decode_rgba, encode_page, pack_sprites, spritesheet_json
+from converter.images import RESIZABLE_EXTENSIONS, read_image_size, resize_image, source_size, variant_sizes
+from converter.profiling import span
+from converter.textures import decode_tex
+from converter.vfs import ProjectIndex
+
+# IR ui types the runtime draws as widgets, with the aliases scenes use.
+WIDGET_TYPES = {"clock": "clock", "date": "date", "audio": "audio", "audio_bars": "audio", "visualizer": "audio"}
+# Assets copied concurrently by default.
+DEFAULT_ASSET_WORKERS = 8
+
+
+class _ResampleUnavailable(Exception):
+    """Raised inside an asset producer when no image resampler is installed."""
+
 
 class SceneGenerator:
-    def __init__(self, ir_path, output_dir):
-        with open(ir_path, 'r') as f:
-            self.ir = json.load(f)
+    def __init__(self, ir, output_dir, source_dir=None, hardlink_assets=False, previous_assets=None,
+                 texture_target_size=None, max_texture=None, atlas_threshold=None, write_debug_json=True, timer=None,
+                 asset_workers=DEFAULT_ASSET_WORKERS, progress=None, output=None, hashed_names=False):
+        # The IR is either the parser's dict, handed over in memory, or a path to an
+        # IR JSON file. A dict is updated in place to point at the exported assets.
+        if isinstance(ir, dict):
+            self.ir = ir
+        else:
+            with open(ir, 'r') as f:
+                self.ir = json.load(f)
         self.output_dir = output_dir
-        self.assets_dir = os.path.join(self.output_dir, 'assets')
-        os.makedirs(self.assets_dir, exist_ok=True)
+        # Whether to dump the final IR to debug.json (the orchestrator writes its own log there).
+        self.write_debug_json = write_debug_json
+        # Optional converter.profiling.StageTimer; generate() records "assets" and "generate" spans.
+        self.timer = timer
+        # Threads hashing and copying assets; output on network storage gains the most.
+        self.asset_workers = max(1, asset_workers or 1)
+        # Optional callable(bytes_done, bytes_total), called as each copied asset lands.
+        self.progress = progress
+        # Relative asset paths in the IR are resolved against the wallpaper's source,
+        # which may be a folder, a .zip archive, a converter.vfs source or a ProjectIndex.
+        # Lookups go through the index, so IR strings never hit the filesystem one by one.
+        self.source = ProjectIndex.of(source_dir) if source_dir else None
+        # .tex textures are decoded from the smallest mipmap at least this large (None = full size).
+        self.texture_target_size = texture_target_size
+        # Longest side (in pixels) of the largest image variant; None keeps images as they are.
+        self.max_texture = max_texture
+        # Primary asset URL -> variants (ascending width) the runtime picks from.
+        self.asset_variants = {}
+        # Images whose sides are all at most this many pixels are packed into atlas pages.
+        self.atlas_threshold = atlas_threshold
+        # Spritesheet JSON URLs the runtime loads in place of the packed images.
+        self.atlas_pages = []
+        self.packed_assets = set()
+        # Name assets and script.js by content hash (name.<hash>.ext) so they can be
+        # cached forever; only index.html then needs revalidating. asset-manifest.json
+        # maps logical names (relative to the export root) to the hashed ones.
+        self.hashed_names = hashed_names
+        self.script_name = 'script.js'
+        self.asset_manifest = {}
+        # Optional converter.zip_output.ZipOutput; files then go into the archive
+        # (paths relative to its root) and output_dir is not written to.
+        self.output = output
+        if self.output is not None:
+            self.assets_dir = 'assets'
+            if self.atlas_threshold:
+                print("Note: texture atlases are not supported when writing to a zip archive; skipping.")
+                self.atlas_threshold = None
+        else:
+            self.assets_dir = os.path.join(self.output_dir, 'assets')
+            os.makedirs(self.assets_dir, exist_ok=True)
+        self.asset_store = AssetStore(self.assets_dir, hardlink=hardlink_assets, previous=previous_assets, output=output,
+                                      hashed_names=hashed_names)
 
     def generate(self):
-        self._copy_assets()
-        self._generate_js()
-        self._generate_html()
-        self._generate_readme()
-        self._generate_debug_json()
+        with span(self.timer, "assets"):
+            self._copy_assets()
+            if self.atlas_threshold:
+                self._pack_atlas()
+            if self.output is None:
+                self.asset_store.prune_previous()
+        with span(self.timer, "generate"):
+            self._generate_js()
+            self._generate_html()
+            self._generate_asset_manifest()
+            self._generate_readme()
+            if self.write_debug_json:
+                self._generate_debug_json()
 
-    def _copy_assets(self):
+    def _resolve_source(self, value):
         """
-        Recursively find all file paths in the IR and copy them to the assets folder.
-        Updates the IR to point to the new relative asset paths.
+        Returns (path, source) for an IR string that names an existing file, else None.
+        path is relative to source, or a filesystem path when source is None.
+        """
+        if self.source and not os.path.isabs(value):
+            # Relative strings are only looked up in the project index.
+            if self.source.is_file(value):
+                return value, self.source
+            return None
+        if os.path.isfile(value):
+            return value, None
+        return None
+
+    def _open_asset(self, path, source):
+        return source.open(path) if source else open(path, 'rb')
+
+    def _store_image_variants(self, path, source, extension):
+        """
+        Stores up to DEFAULT_VARIANT_COUNT downscaled copies of an image, each capped
+        at one of variant_sizes(max_texture), and records them for the runtime.
+        Returns the name of the largest variant, which the IR points at.
+        """
+        with self._open_asset(path, source) as stream:
+            size = source_size(stream, extension)
+        if size is None:
+            return self.asset_store.add(path, source)
+        longest = max(size)
+
+        variants = {}
+        for target in variant_sizes(self.max_texture):
+            if target >= longest and extension != '.tex':
+                # Already within this cap; the untouched original serves as the variant.
+                if not variants:
+                    variants[self.asset_store.add(path, source)] = size[0]
+                continue
+
+            def produce(stream, target=target):
+                result = resize_image(stream, extension, target)
+                if result is None:
+                    raise _ResampleUnavailable()
+                data, out_extension, width, height = result
+                return data, out_extension, {"width": width, "height": height}
+
+            try:
+                name = self.asset_store.add_derived(path, source, f"variant@{target}", produce, suffix=f"@{target}")
+            except _ResampleUnavailable:
+                # No resampler: fall back to the full-size original.
+                name = self.asset_store.add(path, source)
+                variants.setdefault(name, size[0])
+                break
+            variants.setdefault(name, self.asset_store.metadata(name)["width"])
+
+        ordered = sorted(variants.items(), key=lambda item: item[1])
+        primary = ordered[-1][0]
+        if len(ordered) > 1:
+            self.asset_variants[f'./assets/{primary}'] = [{"width": width, "src": f'./assets/{name}'} for name, width in ordered]
+        return primary
+
+    def _store_asset(self, path, source):
+        """
+        Adds a resolved asset to the store, decoding Wallpaper Engine .tex textures to
+        PNG and, with max_texture set, producing resolution variants of layer images.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if self.max_texture and (extension == '.tex' or extension in RESIZABLE_EXTENSIONS):
+            return self._store_image_variants(path, source, extension)
+        if extension == '.tex':
+            max_size = self.texture_target_size
+            return self.asset_store.add_derived(
+                path, source, f"tex@{max_size or 'full'}",
+                lambda stream: decode_tex(stream, max_size)[:2])
+        return self.asset_store.add(path, source)
+
+    def _is_plain_copy(self, path):
+        """Whether an asset is copied byte for byte rather than decoded or resized."""
+        extension = os.path.splitext(path)[1].lower()
+        return extension != '.tex' and not (self.max_texture and extension in RESIZABLE_EXTENSIONS)
+
+    def _collect_assets(self):
+        """
+        Walks the IR and returns every string naming an existing file, in document
+        order, as (container, key, path, source) tuples.
         """
-        def find_and_copy_assets(data):
+        found = []
+
+        def walk(data):
             if isinstance(data, dict):
                 for key, value in data.items():
-                    if isinstance(value, str) and os.path.exists(value):
-                        if os.path.isfile(value):
-                            asset_filename = os.path.basename(value)
-                            dest_path = os.path.join(self.assets_dir, asset_filename)
-                            shutil.copy(value, dest_path)
-                            # Update IR to use absolute path for web
-                            data[key] = f'./assets/{asset_filename}'
+                    if isinstance(value, str):
+                        resolved = self._resolve_source(value)
+                        if resolved:
+                            found.append((data, key, *resolved))
                     elif isinstance(value, (dict, list)):
-                        find_and_copy_assets(value)
+                        walk(value)
             elif isinstance(data, list):
                 for item in data:
-                    find_and_copy_assets(item)
+                    walk(item)
+
+        walk(self.ir)
+        return found
+
+    def _copy_assets(self):
+        """
+        Find all file paths in the IR and add them to the content-addressed asset
+        store, which writes each unique file once.
+        Updates the IR to point to the new relative asset paths.
+
+        Plain copies are hashed and written on up to asset_workers threads; names are
+        still assigned in IR order, so the rewritten IR does not depend on timing.
+        Decoded and resized images are produced one at a time.
+        """
+        found = self._collect_assets()
+        jobs = list(dict.fromkeys((path, source) for _, _, path, source in found))
+        plain = [job for job in jobs if self._is_plain_copy(job[0])]
+
+        with ThreadPoolExecutor(max_workers=self.asset_workers) as pool:
+            prepared = dict(zip(plain, pool.map(lambda job: self.asset_store.prepare(*job), plain)))
+
+            names, placements = {}, []
+            for job in jobs:
+                if job in prepared:
+                    names[job], placement = self.asset_store.commit(prepared[job])
+                    if placement:
+                        placements.append(placement)
+                else:
+                    names[job] = self._store_asset(*job)
+
+            bytes_total = sum(placement["size"] for placement in placements)
+            done = {"bytes": 0}
+            lock = threading.Lock()
 
-        find_and_copy_assets(self.ir)
+            def place(placement):
+                self.asset_store.place(placement)
+                if self.progress:
+                    with lock:
+                        done["bytes"] += placement["size"]
+                        self.progress(done["bytes"], bytes_total)
+
+            if self.output is not None:
+                # The archive takes one entry at a time.
+                for placement in placements:
+                    place(placement)
+            else:
+                # list() re-raises the first failed placement.
+                list(pool.map(place, placements))
+
+        for data, key, path, source in found:
+            # Update IR to use relative path for web
+            data[key] = f'./assets/{names[(path, source)]}'
+
+    def _pack_atlas(self):
+        """
+        Packs small stored images into atlas pages (assets/atlas-<n>.png) with a Pixi
+        spritesheet JSON per page. Frame names are the original asset URLs, so layers
+        resolve to atlas frames through Pixi's texture cache. Packed files are removed
+        from the output; images with resolution variants are left alone. Pages go
+        through the asset store, so they never overwrite a user's atlas-*.png and
+        pages of an earlier run are pruned like any other unused asset.
+        """
+        variant_urls = {variant["src"] for variants in self.asset_variants.values() for variant in variants}
+        sprites = []
+        for url in sorted(self._collect_asset_paths()):
+            if url in self.asset_variants or url in variant_urls:
+                continue
+            if os.path.splitext(url)[1].lower() not in RESIZABLE_EXTENSIONS:
+                continue
+            path = os.path.join(self.assets_dir, url[len('./assets/'):])
+            with open(path, 'rb') as f:
+                size = read_image_size(f)
+                if size is None or max(size) > self.atlas_threshold:
+                    continue
+                f.seek(0)
+                decoded = decode_rgba(f.read())
+            if decoded:
+                sprites.append((url, *decoded))
+        if len(sprites) < 2:
+            # A single sprite gains nothing from an atlas.
+            return
+
+        packed_names = set()
+        for index, page in enumerate(pack_sprites(sprites, page_size=max(DEFAULT_PAGE_SIZE, self.atlas_threshold))):
+            image_name = self.asset_store.add_generated(f'atlas-{index}.png', encode_page(page))
+            sheet = json.dumps(spritesheet_json(page, image_name), separators=(',', ':'))
+            sheet_name = self.asset_store.add_generated(f'atlas-{index}.json', sheet.encode('utf-8'))
+            self.atlas_pages.append(f'./assets/{sheet_name}')
+            self.packed_assets.update(page["frames"])
+            packed_names.update(url[len('./assets/'):] for url in page["frames"])
+        self.asset_store.remove(packed_names)
 
     def _generate_js(self):
         js_content = f"""
-const assets = {json.dumps([item for item in self._collect_asset_paths()])};
+// Resolution variants per asset; the smallest one covering the screen is loaded.
+const assetVariants = {json.dumps(self.asset_variants)};
 
-PIXI.Assets.load(assets).then(setup);
+function resolveAsset(url) {{
+    const variants = assetVariants[url];
+    if (!variants) return url;
+    const target = window.innerWidth * (window.devicePixelRatio || 1);
+    const match = variants.find(variant => variant.width >= target);
+    return (match || variants[variants.length - 1]).src;
+}}
+
+const assets = {json.dumps(self._unpacked_asset_paths())}.map(resolveAsset);
+
+// Atlas pages; their frames are cached under the original asset URLs.
+const atlasPages = {json.dumps(self.atlas_pages)};
+
+PIXI.Assets.load(atlasPages.concat(assets)).then(setup);
 
 let app; // Declare app globally or in a scope accessible by other functions
 
@@ -57,67 +313,237 @@ function setup() {{
     }});
     document.body.appendChild(app.view);
 
-    // Resize function
-    window.addEventListener('resize', () => {{
-        app.renderer.resize(window.innerWidth, window.innerHeight);
+    // Frame scheduling: per-frame updaters return true while they still animate.
+    // The ticker stops once none do or the page is hidden, and wake() restarts it.
+    const updaters = [];
+    function wake() {{
+        if (!document.hidden && !app.ticker.started) app.ticker.start();
+    }}
+    app.ticker.add((delta) => {{
+        let busy = false;
+        for (const update of updaters) busy = update(delta) || busy;
+        if (!busy) app.ticker.stop(); // This frame is still rendered.
+    }});
+    document.addEventListener('visibilitychange', () => {{
+        if (document.hidden) app.ticker.stop();
+        else wake();
     }});
 
+    // Layer filters from the effect stage; each filter is one render pass, so chains
+    // arrive merged and fused. Shaders are shared by id; animated ones advance u_time.
+    const effectShaders = {json.dumps(self.ir.get('scene', {}).get('effect_shaders', {}))};
+    const animatedFilters = [];
+    function makeFilter(spec) {{
+        const settings = spec.settings;
+        if (spec.filter === 'ColorMatrixFilter') {{
+            const filter = new PIXI.ColorMatrixFilter();
+            filter.matrix = settings.matrix;
+            return filter;
+        }}
+        if (spec.filter === 'BlurFilter') return new PIXI.BlurFilter(settings.strength);
+        const uniforms = {{}};
+        for (const [name, value] of Object.entries(settings.uniforms)) {{
+            uniforms[name] = Array.isArray(value) ? new Float32Array(value) : value;
+        }}
+        const filter = new PIXI.Filter(undefined, effectShaders[settings.shader], uniforms);
+        if ('u_time' in uniforms) animatedFilters.push(filter);
+        return filter;
+    }}
+
     // Layer stack reconstruction
-    const layers = {json.dumps(self.ir.get('layers', []))};
+    const layers = {json.dumps(self._runtime_layers())};
+    const parallaxLayers = [];
+    const staticSprites = [];
     layers.forEach(layerData => {{
-        const sprite = PIXI.Sprite.from(layerData.file);
+        const sprite = PIXI.Sprite.from(resolveAsset(layerData.src));
         sprite.anchor.set(0.5);
         sprite.x = app.screen.width / 2;
         sprite.y = app.screen.height / 2;
-        
+        if (layerData.filters) sprite.filters = layerData.filters.map(makeFilter);
+        app.stage.addChild(sprite);
         if (layerData.depth) {{
-            sprite.z = layerData.depth;
+            parallaxLayers.push({{ sprite, depth: layerData.depth }});
+        }} else {{
+            staticSprites.push(sprite);
         }}
-
-        app.stage.addChild(sprite);
     }});
 
-    // Parallax
-    app.stage.interactive = true;
-    app.stage.on('pointermove', (e) => {{
-        const {{ x, y }} = e.data.global;
-        app.stage.children.forEach(child => {{
-            if (child.z) {{
-                const moveX = (x - app.screen.width / 2) * child.z * 0.1;
-                const moveY = (y - app.screen.height / 2) * child.z * 0.1;
-                child.position.x = app.screen.width / 2 + moveX;
-                child.position.y = app.screen.height / 2 + moveY;
-            }}
+    if (animatedFilters.length) {{
+        updaters.push((delta) => {{
+            for (const filter of animatedFilters) filter.uniforms.u_time += delta / 60;
+            return true;
         }});
-    }});
+    }}
 
-    app.ticker.add((delta) => {{
-        // Update logic here
+    // Parallax: pointer events only record the target offset; layers move once per
+    // frame, easing toward it, and the updater sleeps once they have settled.
+    const PARALLAX_STRENGTH = 0.1;
+    const PARALLAX_EASING = 0.15; // Share of the remaining distance covered per 60 Hz frame.
+    const parallax = {{ x: 0, y: 0, targetX: 0, targetY: 0, moved: true }};
+    if (parallaxLayers.length) {{
+        window.addEventListener('pointermove', (e) => {{
+            parallax.targetX = e.clientX - window.innerWidth / 2;
+            parallax.targetY = e.clientY - window.innerHeight / 2;
+            parallax.moved = true;
+            wake();
+        }}, {{ passive: true }});
+    }}
+    updaters.push((delta) => {{
+        if (!parallax.moved) return false;
+        const step = 1 - Math.pow(1 - PARALLAX_EASING, delta);
+        parallax.x += (parallax.targetX - parallax.x) * step;
+        parallax.y += (parallax.targetY - parallax.y) * step;
+        if (Math.abs(parallax.targetX - parallax.x) < 0.1 && Math.abs(parallax.targetY - parallax.y) < 0.1) {{
+            parallax.x = parallax.targetX;
+            parallax.y = parallax.targetY;
+            parallax.moved = false;
+        }}
+        const centerX = app.screen.width / 2;
+        const centerY = app.screen.height / 2;
+        for (const layer of parallaxLayers) {{
+            layer.sprite.x = centerX + parallax.x * layer.depth * PARALLAX_STRENGTH;
+            layer.sprite.y = centerY + parallax.y * layer.depth * PARALLAX_STRENGTH;
+        }}
+        return parallax.moved;
     }});
 
-    // Clock Widget
-    if ({json.dumps('clock' in [ui.get('type') for ui in self.ir.get('ui', [])])}) {{
-        const clock = new PIXI.Text('00:00:00', {{fontFamily: 'Arial', fontSize: 24, fill: 0xffffff, align: 'center'}});
-        clock.x = app.screen.width - 100;
-        clock.y = 50;
-        app.stage.addChild(clock);
+    // Widgets from the IR's ui entries. Each schedules its own updates and only
+    // redraws (one frame, via wake()) when its content actually changes.
+    const widgets = {json.dumps(self._runtime_widgets())};
+    const audioSources = {json.dumps(self._audio_sources())};
+    const layouts = [];
 
-        app.ticker.add(() => {{
+    function textWidget(config, format, period, defaultY) {{
+        const text = new PIXI.Text('', {{fontFamily: config.font || 'Arial', fontSize: config.size || 24, fill: config.color || 0xffffff, align: 'right'}});
+        text.anchor.set(1, 0);
+        app.stage.addChild(text);
+        layouts.push(() => text.position.set(
+            config.x !== undefined ? config.x : app.screen.width - 20,
+            config.y !== undefined ? config.y : defaultY));
+        const refresh = () => {{
             const now = new Date();
-            clock.text = now.toLocaleTimeString();
+            const value = format(now);
+            if (value !== text.text) {{
+                text.text = value; // Re-rasterized on the next render only.
+                wake();
+            }}
+            setTimeout(refresh, period - (now.getTime() % period));
+        }};
+        refresh();
+    }}
+
+    function clockFormat(config) {{
+        const options = {{hour: '2-digit', minute: '2-digit'}};
+        if (config.seconds !== false) options.second = '2-digit';
+        if (config.format === '12h' || config.format === '24h') options.hour12 = config.format === '12h';
+        return now => now.toLocaleTimeString([], options);
+    }}
+
+    // Audio bars share one analyser: a single read per frame fills `levels`, which
+    // every bar widget samples.
+    const audio = {{levels: new Uint8Array(64), analyser: null, playing: false, draws: []}};
+
+    function audioBars(config) {{
+        const count = config.bars || 32;
+        const height = config.height || 120;
+        const container = new PIXI.Container();
+        const bars = [];
+        for (let i = 0; i < count; i++) {{
+            const bar = new PIXI.Sprite(PIXI.Texture.WHITE);
+            bar.tint = config.color || 0xffffff;
+            bar.anchor.set(0, 1);
+            bar.height = 1;
+            bars.push(bar);
+            container.addChild(bar);
+        }}
+        app.stage.addChild(container);
+        layouts.push(() => {{
+            const width = config.width || app.screen.width / 2;
+            const slot = width / count;
+            bars.forEach((bar, i) => {{
+                bar.x = i * slot;
+                bar.width = Math.max(1, slot - 2);
+            }});
+            container.position.set(
+                config.x !== undefined ? config.x : (app.screen.width - width) / 2,
+                config.y !== undefined ? config.y : app.screen.height - 20);
+        }});
+        audio.draws.push(levels => {{
+            const step = levels.length / count;
+            for (let i = 0; i < count; i++) {{
+                const barHeight = Math.max(1, levels[Math.floor(i * step)] / 255 * height);
+                if (bars[i].height !== barHeight) bars[i].height = barHeight;
+            }}
         }});
     }}
 
-    // Audio Visualizer
-    if ({json.dumps('audio' in self.ir)}) {{
-        // Placeholder for audio visualizer
-        console.log("Audio data found, visualizer implementation pending.");
+    function startAudio() {{
+        if (window.wallpaperRegisterAudioListener) {{
+            // Inside Wallpaper Engine: 128 levels (64 per channel) pushed about 30 times a second.
+            window.wallpaperRegisterAudioListener(values => {{
+                for (let i = 0; i < audio.levels.length; i++) {{
+                    audio.levels[i] = Math.min(255, (values[i] + values[i + 64]) * 127.5);
+                }}
+                audio.draws.forEach(draw => draw(audio.levels));
+                wake();
+            }});
+            return;
+        }}
+        if (!audioSources.length) return;
+        const element = new Audio(audioSources[0]);
+        element.loop = true;
+        element.addEventListener('play', () => {{ audio.playing = true; wake(); }});
+        element.addEventListener('pause', () => {{ audio.playing = false; }});
+        // Browsers only start audio after a user gesture.
+        const begin = () => {{
+            window.removeEventListener('pointerdown', begin);
+            window.removeEventListener('keydown', begin);
+            const context = new (window.AudioContext || window.webkitAudioContext)();
+            audio.analyser = context.createAnalyser();
+            audio.analyser.fftSize = audio.levels.length * 2;
+            context.createMediaElementSource(element).connect(audio.analyser);
+            audio.analyser.connect(context.destination);
+            element.play();
+        }};
+        window.addEventListener('pointerdown', begin);
+        window.addEventListener('keydown', begin);
+        updaters.push(() => {{
+            if (!audio.playing) return false;
+            audio.analyser.getByteFrequencyData(audio.levels);
+            audio.draws.forEach(draw => draw(audio.levels));
+            return true;
+        }});
     }}
+
+    const widgetFactories = {{
+        clock: config => textWidget(config, clockFormat(config), config.seconds === false ? 60000 : 1000, 20),
+        date: config => textWidget(config, now => now.toLocaleDateString([], {{weekday: 'long', month: 'long', day: 'numeric'}}), 60000, 56),
+        audio: audioBars,
+    }};
+    widgets.forEach(config => widgetFactories[config.type](config));
+    layouts.forEach(layout => layout());
+    if (audio.draws.length) startAudio();
+
+    window.addEventListener('resize', () => {{
+        app.renderer.resize(window.innerWidth, window.innerHeight);
+        staticSprites.forEach(sprite => sprite.position.set(app.screen.width / 2, app.screen.height / 2));
+        layouts.forEach(layout => layout());
+        parallax.moved = true;
+        wake();
+    }});
 }}
 """
-        js_path = os.path.join(self.output_dir, 'script.js')
-        with open(js_path, 'w') as f:
-            f.write(js_content.replace('{{', '{{').replace('}}', '}}'))
+        js_content = js_content.replace('{{', '{{').replace('}}', '}}')
+        if self.output is None:
+            # Scripts from earlier runs would otherwise pile up next to index.html.
+            stale_scripts = glob.glob(os.path.join(self.output_dir, 'script.*.js'))
+            if self.hashed_names and os.path.exists(os.path.join(self.output_dir, 'script.js')):
+                stale_scripts.append(os.path.join(self.output_dir, 'script.js'))
+            for stale in stale_scripts:
+                os.remove(stale)
+        if self.hashed_names:
+            self.script_name = hashed_name('script.js', hashlib.sha256(js_content.encode('utf-8')).hexdigest())
+        self._write_output(self.script_name, js_content)
 
     def _generate_html(self):
         html_content = f"""
@@ -132,13 +558,22 @@ function setup() {{
 </head>
 <body>
     <script src="/js/pixi.min.js"></script>
-    <script defer src="./script.js"></script>
+    <script defer src="./{self.script_name}"></script>
 </body>
 </html>
 """
-        html_path = os.path.join(self.output_dir, 'index.html')
-        with open(html_path, 'w') as f:
-            f.write(html_content)
+        self._write_output('index.html', html_content)
+
+    def _generate_asset_manifest(self):
+        """Writes asset-manifest.json (logical name -> hashed name) when assets are hashed."""
+        if not self.hashed_names:
+            if self.output is None and os.path.exists(os.path.join(self.output_dir, ASSET_MANIFEST_NAME)):
+                os.remove(os.path.join(self.output_dir, ASSET_MANIFEST_NAME))
+            return
+        self.asset_manifest = {'script.js': self.script_name}
+        for logical, name in sorted(self.asset_store.manifest.items()):
+            self.asset_manifest[f'assets/{logical}'] = f'assets/{name}'
+        self._write_output(ASSET_MANIFEST_NAME, json.dumps(self.asset_manifest, indent=2))
 
     def _generate_readme(self):
         readme_content = f"""
@@ -149,14 +584,62 @@ This web-based scene was generated from a Wallpaper Engine project.
 ## Running the Scene
 Open the `index.html` file in a modern web browser.
 """
-        readme_path = os.path.join(self.output_dir, 'readme.md')
-        with open(readme_path, 'w') as f:
-            f.write(readme_content)
+        self._write_output('readme.md', readme_content)
 
     def _generate_debug_json(self):
-        debug_path = os.path.join(self.output_dir, 'debug.json')
-        with open(debug_path, 'w') as f:
-            json.dump(self.ir, f, indent=4)
+        self._write_output('debug.json', json.dumps(self.ir, separators=(',', ':')))
+
+    def _write_output(self, name, text):
+        """Writes a generated text file to the export root (or the output archive)."""
+        if self.output is not None:
+            self.output.write_bytes(name, text)
+            return
+        with open(os.path.join(self.output_dir, name), 'w') as f:
+            f.write(text)
+
+    def _runtime_layers(self):
+        """
+        Image layers for the runtime, bottom to top, as {"name", "src", "depth"}, plus
+        "filters" for layers the effect stage (converter.effect_chain) gave any. Taken
+        from the IR's scene layers, plus top-level "layers" with a "file" in older IR
+        files. Layers whose image was not exported are left out.
+        """
+        layers = [(layer, layer.get('source')) for layer in self.ir.get('scene', {}).get('layers', [])
+                  if layer.get('type', 'image') == 'image']
+        layers += [(layer, layer.get('file')) for layer in self.ir.get('layers', [])]
+        runtime_layers = []
+        for layer, src in layers:
+            if not (isinstance(src, str) and src.startswith('./assets/')):
+                continue
+            runtime_layer = {"name": layer.get('name'), "src": src, "depth": layer.get('depth', 0)}
+            if layer.get('filters'):
+                runtime_layer["filters"] = layer['filters']
+            runtime_layers.append(runtime_layer)
+        return runtime_layers
+
+    def _runtime_widgets(self):
+        """
+        UI widgets for the runtime, in scene order, from the IR's ui entries (a dict
+        keyed by object name; older IR files have a top-level list). Hidden entries
+        and types the runtime cannot draw are left out.
+        """
+        entries = list(self.ir.get('scene', {}).get('ui', {}).items())
+        entries += [(None, entry) for entry in self.ir.get('ui', []) if isinstance(entry, dict)]
+        widgets = []
+        for name, entry in entries:
+            widget_type = WIDGET_TYPES.get(entry.get('type'))
+            if widget_type and entry.get('visible', True) is not False:
+                widgets.append(dict(entry, name=name, type=widget_type))
+        return widgets
+
+    def _audio_sources(self):
+        """Exported sound files the audio widgets can analyse."""
+        return [entry['source'] for entry in self.ir.get('scene', {}).get('audio', [])
+                if isinstance(entry.get('source'), str) and entry['source'].startswith('./assets/')]
+
+    def _unpacked_asset_paths(self):
+        """Asset URLs the runtime loads as individual files (i.e. not packed into an atlas)."""
+        return sorted(path for path in self._collect_asset_paths() if path not in self.packed_assets)
 
     def _collect_asset_paths(self):
         paths = set()
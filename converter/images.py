@@ -0,0 +1,119 @@
+"""
+Image sizing helpers for the asset pipeline: reading dimensions from file headers
+and producing downscaled variants of layer images.
+
+Resampling uses Pillow when it is installed. Without it, .tex textures still get
+variants (each one is a different mipmap), while png/jpg layers are kept at their
+original size.
+"""
+import io
+import logging
+import struct
+
+from converter.textures import decode_tex, read_tex_info
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: only needed to resample png/jpg layers.
+    Image = None
+
+# Source image types that can be downscaled into variants.
+RESIZABLE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+# Number of variants produced per layer: the cap, then halved each step.
+DEFAULT_VARIANT_COUNT = 3
+# Variants are never made smaller than this.
+MIN_VARIANT_SIZE = 256
+
+_PIL_FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".webp": "WEBP", ".bmp": "BMP"}
+
+
+def variant_sizes(max_texture, count=DEFAULT_VARIANT_COUNT):
+    """Returns the target sizes (longer side, in pixels) for a cap, largest first."""
+    sizes = []
+    size = max_texture
+    while len(sizes) < count and size >= MIN_VARIANT_SIZE:
+        sizes.append(size)
+        size //= 2
+    return sizes or [max_texture]
+
+
+def read_image_size(stream):
+    """
+    Returns (width, height) from a png or jpg header without decoding pixels, or
+    None if the format is not recognised.
+    """
+    head = stream.read(26)
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    if head[:2] != b"\xff\xd8":
+        return None
+
+    # Walk JPEG markers until a start-of-frame segment.
+    data = head[2:]
+    while True:
+        while len(data) < 4:
+            more = stream.read(4096)
+            if not more:
+                return None
+            data += more
+        if data[0] != 0xFF:
+            return None
+        marker = data[1]
+        if marker == 0xFF:
+            data = data[1:]
+            continue
+        length = struct.unpack(">H", data[2:4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            while len(data) < 9:
+                more = stream.read(4096)
+                if not more:
+                    return None
+                data += more
+            height, width = struct.unpack(">HH", data[5:9])
+            return width, height
+        skip = 2 + length
+        if len(data) >= skip:
+            data = data[skip:]
+        else:
+            remaining = skip - len(data)
+            data = b""
+            if stream.seekable():
+                stream.seek(remaining, 1)
+            else:
+                stream.read(remaining)
+
+
+def source_size(stream, extension):
+    """Returns (width, height) of an image or .tex texture, or None if unknown."""
+    if extension == ".tex":
+        info = read_tex_info(stream)
+        return info.image_width or info.mipmaps[0].width, info.image_height or info.mipmaps[0].height
+    return read_image_size(stream)
+
+
+def resize_image(stream, extension, size):
+    """
+    Downscales an image so its longer side is at most `size`. Returns
+    (data, extension, width, height), or None when resampling is unavailable.
+    """
+    if extension == ".tex":
+        data, out_extension, width, height = decode_tex(stream, max_size=size)
+        if max(width, height) <= size or Image is None:
+            return data, out_extension, width, height
+        stream, extension = io.BytesIO(data), out_extension
+    if Image is None:
+        logging.warning("Pillow is not installed; keeping %s images at full resolution.", extension)
+        return None
+
+    with Image.open(stream) as image:
+        image.load()
+        image.thumbnail((size, size), Image.LANCZOS)
+        image_format = _PIL_FORMATS.get(extension)
+        if image_format is None:
+            image_format, extension = "PNG", ".png"
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        save_options = {"JPEG": {"quality": 85, "optimize": True}, "PNG": {"optimize": True}}.get(image_format, {})
+        out = io.BytesIO()
+        image.save(out, format=image_format, **save_options)
+        return out.getvalue(), extension, image.width, image.height
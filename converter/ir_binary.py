@@ -0,0 +1,320 @@
+"""
+Compact binary encoding of the STL IR (".stlb").
+
+Layout (integers are little-endian):
+    header:   magic b"STLB", u16 format version, u16 reserved
+    strings:  u32 byte length, varint count, count x (varint length, UTF-8 bytes)
+    root:     one tagged value
+
+Every dict key and string value is interned in the string table and referenced
+by index. Lists of numbers are stored as typed float64/int64 arrays (transforms,
+keyframes), and lists of dicts (layers, objects, effects) carry an offset table
+so a single entry can be decoded without touching the others. Containers are
+prefixed with their byte length so readers can skip them in O(1).
+
+The encoding round-trips the JSON dict losslessly, including the int/float
+distinction. BinaryIR reads lazily; decode_ir() decodes everything.
+"""
+import json
+import struct
+
+MAGIC = b"STLB"
+FORMAT_VERSION = 1
+BINARY_EXTENSION = ".stlb"
+
+T_NULL, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_LIST, T_DICT, T_F64_ARRAY, T_I64_ARRAY, T_RECORDS = range(11)
+
+_HEADER = struct.Struct("<4sHH")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class IRFormatError(ValueError):
+    """Raised when data is not a valid binary IR document."""
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+
+    def intern(self, text):
+        index = self.string_ids.get(text)
+        if index is None:
+            index = self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def _begin_sized(self, out, tag):
+        out.append(tag)
+        out += b"\0\0\0\0"
+        return len(out)
+
+    def _end_sized(self, out, start):
+        _U32.pack_into(out, start - 4, len(out) - start)
+
+    def encode(self, value, out):
+        if value is None:
+            out.append(T_NULL)
+        elif value is True:
+            out.append(T_TRUE)
+        elif value is False:
+            out.append(T_FALSE)
+        elif isinstance(value, int):
+            out.append(T_INT)
+            _write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+        elif isinstance(value, float):
+            out.append(T_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            out.append(T_STR)
+            _write_varint(out, self.intern(value))
+        elif isinstance(value, dict):
+            start = self._begin_sized(out, T_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"IR keys must be strings, not {type(key).__name__}")
+                _write_varint(out, self.intern(key))
+                self.encode(item, out)
+            self._end_sized(out, start)
+        elif isinstance(value, (list, tuple)):
+            self._encode_list(value, out)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} in the IR")
+
+    def _encode_list(self, value, out):
+        if value and all(type(item) is float for item in value):
+            out.append(T_F64_ARRAY)
+            _write_varint(out, len(value))
+            out += struct.pack(f"<{len(value)}d", *value)
+        elif value and all(type(item) is int and _INT64_MIN <= item <= _INT64_MAX for item in value):
+            out.append(T_I64_ARRAY)
+            _write_varint(out, len(value))
+            out += struct.pack(f"<{len(value)}q", *value)
+        elif value and all(isinstance(item, dict) for item in value):
+            # Records: an offset table lets readers jump straight to one entry.
+            start = self._begin_sized(out, T_RECORDS)
+            _write_varint(out, len(value))
+            table = len(out)
+            out += bytes(4 * len(value))
+            items_start = len(out)
+            for index, item in enumerate(value):
+                _U32.pack_into(out, table + 4 * index, len(out) - items_start)
+                self.encode(item, out)
+            self._end_sized(out, start)
+        else:
+            start = self._begin_sized(out, T_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self.encode(item, out)
+            self._end_sized(out, start)
+
+
+def encode_ir(ir):
+    """Encodes an IR dict to bytes."""
+    encoder = _Encoder()
+    body = bytearray()
+    encoder.encode(ir, body)
+
+    table = bytearray()
+    _write_varint(table, len(encoder.strings))
+    for text in encoder.strings:
+        data = text.encode("utf-8")
+        _write_varint(table, len(data))
+        table += data
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, 0) + _U32.pack(len(table)) + bytes(table) + bytes(body)
+
+
+class BinaryIR:
+    """
+    Lazy reader over an encoded IR. Only the string table is decoded up front;
+    get() walks to a value by path, skipping everything it does not need.
+    """
+    def __init__(self, data):
+        self.buf = memoryview(data)
+        if len(self.buf) < _HEADER.size + 4:
+            raise IRFormatError("Truncated binary IR header")
+        magic, version, _ = _HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise IRFormatError("Not a binary IR document")
+        if version != FORMAT_VERSION:
+            raise IRFormatError(f"Unsupported binary IR version {version}")
+        (table_size,) = _U32.unpack_from(self.buf, _HEADER.size)
+        pos = _HEADER.size + 4
+        self.root_offset = pos + table_size
+        count, pos = _read_varint(self.buf, pos)
+        self.strings = []
+        for _ in range(count):
+            length, pos = _read_varint(self.buf, pos)
+            self.strings.append(str(self.buf[pos:pos + length], "utf-8"))
+            pos += length
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def _skip(self, pos):
+        """Returns the offset just past the value at pos."""
+        tag = self.buf[pos]
+        pos += 1
+        if tag in (T_NULL, T_FALSE, T_TRUE):
+            return pos
+        if tag in (T_INT, T_STR):
+            return _read_varint(self.buf, pos)[1]
+        if tag == T_FLOAT:
+            return pos + 8
+        if tag in (T_F64_ARRAY, T_I64_ARRAY):
+            count, pos = _read_varint(self.buf, pos)
+            return pos + 8 * count
+        if tag in (T_LIST, T_DICT, T_RECORDS):
+            return pos + 4 + _U32.unpack_from(self.buf, pos)[0]
+        raise IRFormatError(f"Unknown value tag {tag}")
+
+    def _decode(self, pos):
+        """Decodes the value at pos and returns (value, end offset)."""
+        buf = self.buf
+        tag = buf[pos]
+        pos += 1
+        if tag == T_NULL:
+            return None, pos
+        if tag == T_FALSE:
+            return False, pos
+        if tag == T_TRUE:
+            return True, pos
+        if tag == T_INT:
+            raw, pos = _read_varint(buf, pos)
+            return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1), pos
+        if tag == T_FLOAT:
+            return _F64.unpack_from(buf, pos)[0], pos + 8
+        if tag == T_STR:
+            index, pos = _read_varint(buf, pos)
+            return self.strings[index], pos
+        if tag in (T_F64_ARRAY, T_I64_ARRAY):
+            count, pos = _read_varint(buf, pos)
+            code = "d" if tag == T_F64_ARRAY else "q"
+            return list(struct.unpack_from(f"<{count}{code}", buf, pos)), pos + 8 * count
+        if tag not in (T_LIST, T_DICT, T_RECORDS):
+            raise IRFormatError(f"Unknown value tag {tag}")
+
+        end = pos + 4 + _U32.unpack_from(buf, pos)[0]
+        count, pos = _read_varint(buf, pos + 4)
+        if tag == T_DICT:
+            result = {}
+            for _ in range(count):
+                key, pos = _read_varint(buf, pos)
+                result[self.strings[key]], pos = self._decode(pos)
+            return result, end
+        if tag == T_RECORDS:
+            pos += 4 * count
+        result = []
+        for _ in range(count):
+            item, pos = self._decode(pos)
+            result.append(item)
+        return result, end
+
+    def _find(self, path):
+        """Returns the offset of the value at path (dict keys and list indexes), or None."""
+        pos = self.root_offset
+        for step in path:
+            tag = self.buf[pos]
+            if tag == T_DICT and isinstance(step, str):
+                count, pos = _read_varint(self.buf, pos + 5)
+                for _ in range(count):
+                    key, pos = _read_varint(self.buf, pos)
+                    if self.strings[key] == step:
+                        break
+                    pos = self._skip(pos)
+                else:
+                    return None
+            elif tag == T_RECORDS and isinstance(step, int):
+                count, table = _read_varint(self.buf, pos + 5)
+                if not 0 <= step < count:
+                    return None
+                pos = table + 4 * count + _U32.unpack_from(self.buf, table + 4 * step)[0]
+            elif tag == T_LIST and isinstance(step, int):
+                count, pos = _read_varint(self.buf, pos + 5)
+                if not 0 <= step < count:
+                    return None
+                for _ in range(step):
+                    pos = self._skip(pos)
+            else:
+                return None
+        return pos
+
+    def get(self, *path, default=None):
+        """Decodes only the value at path, e.g. get("scene", "layers", 3)."""
+        pos = self._find(path)
+        return default if pos is None else self._decode(pos)[0]
+
+    def length(self, *path):
+        """Returns the number of entries of the list or dict at path without decoding them."""
+        pos = self._find(path)
+        if pos is None:
+            return 0
+        tag = self.buf[pos]
+        if tag in (T_LIST, T_DICT, T_RECORDS):
+            return _read_varint(self.buf, pos + 5)[0]
+        if tag in (T_F64_ARRAY, T_I64_ARRAY):
+            return _read_varint(self.buf, pos + 1)[0]
+        return 0
+
+    def layer_count(self):
+        return self.length("scene", "layers")
+
+    def layer(self, index):
+        """Decodes a single layer of the scene."""
+        return self.get("scene", "layers", index)
+
+    def to_dict(self):
+        return self._decode(self.root_offset)[0]
+
+
+def decode_ir(data):
+    """Decodes an encoded IR back into the JSON-compatible dict."""
+    return BinaryIR(data).to_dict()
+
+
+def write_ir(ir, path, binary=None):
+    """
+    Writes the IR to path: binary when binary is True or the path ends in .stlb,
+    otherwise compact JSON.
+    """
+    path = str(path)
+    if binary is None:
+        binary = path.lower().endswith(BINARY_EXTENSION)
+    if binary:
+        with open(path, 'wb') as f:
+            f.write(encode_ir(ir))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(ir, f, separators=(',', ':'))
+
+
+def read_ir(path):
+    """Reads an IR file written by write_ir, detecting the format from its contents."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] == MAGIC:
+        return decode_ir(data)
+    return json.loads(data.decode('utf-8'))
@@ -0,0 +1,180 @@
+"""
+Incremental reader for large JSON documents such as particle- or model-heavy
+scene.json files.
+
+iter_members() walks the top-level object of a document read in chunks. Arrays
+named in `array_keys` (e.g. "objects") are yielded one element at a time, so peak
+memory scales with the largest single element rather than the whole file. Only
+the standard library is used: the reader finds value boundaries itself and hands
+each complete value to json.loads.
+"""
+import io
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\r\n"
+# Structural characters and string delimiters, used to skip through containers quickly.
+_CONTAINER_TOKEN = re.compile(r'[\[\]{}"]')
+_STRING_TOKEN = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+
+
+class _Scanner:
+    """
+    Buffered cursor over a text stream. Consumed text is dropped between values, so
+    offsets taken while scanning a single value stay valid.
+    """
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def fill(self):
+        """Appends another chunk to the buffer. Returns False at end of input."""
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buf += chunk
+        return True
+
+    def compact(self):
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it, or '' at end of input."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            self.compact()
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def _search(self, pattern, start):
+        """Finds pattern from buffer offset start, reading more input as needed."""
+        while True:
+            match = pattern.search(self.buf, start)
+            if match:
+                return match
+            start = len(self.buf)
+            if not self.fill():
+                return None
+
+    def _string_end(self, start):
+        """Returns the buffer offset just past the string whose opening quote is at start."""
+        index = start + 1
+        while True:
+            match = self._search(_STRING_TOKEN, index)
+            if match is None:
+                raise json.JSONDecodeError("Unterminated string", self.buf, start)
+            if match.group() == '"':
+                return match.end()
+            index = match.end() + 1
+            while index >= len(self.buf):
+                if not self.fill():
+                    raise json.JSONDecodeError("Unterminated string", self.buf, start)
+
+    def raw_value(self):
+        """Consumes one complete JSON value and returns its text."""
+        char = self.peek()
+        self.compact()
+        start = self.pos
+        if char == '"':
+            end = self._string_end(start)
+        elif char in "[{":
+            depth = 0
+            index = start
+            while True:
+                match = self._search(_CONTAINER_TOKEN, index)
+                if match is None:
+                    raise json.JSONDecodeError("Unterminated container", self.buf, start)
+                token = match.group()
+                if token == '"':
+                    index = self._string_end(match.start())
+                    continue
+                index = match.end()
+                depth += 1 if token in "[{" else -1
+                if depth == 0:
+                    end = index
+                    break
+        elif char:
+            match = self._search(_SCALAR_END, start)
+            end = match.start() if match else len(self.buf)
+        else:
+            raise json.JSONDecodeError("Unexpected end of input", self.buf, self.pos)
+        self.pos = end
+        return self.buf[start:end]
+
+    def value(self):
+        return json.loads(self.raw_value())
+
+
+def _iter_array(scanner, read):
+    """Consumes an array and yields read() for each element."""
+    scanner.expect("[")
+    if scanner.peek() == "]":
+        scanner.expect("]")
+        return
+    while True:
+        yield read()
+        if scanner.expect(",]") == "]":
+            return
+
+
+def iter_members(stream, array_keys=(), chunk_size=CHUNK_SIZE):
+    """
+    Yields (key, value) for each member of a top-level JSON object. For keys in
+    array_keys whose value is an array, (key, element) is yielded once per element
+    instead. stream may be binary (decoded as UTF-8) or text.
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    scanner = _Scanner(stream, chunk_size)
+    scanner.expect("{")
+    if scanner.peek() == "}":
+        return
+    while True:
+        key = scanner.value()
+        scanner.expect(":")
+        if key in array_keys and scanner.peek() == "[":
+            for element in _iter_array(scanner, scanner.value):
+                yield key, element
+        else:
+            yield key, scanner.value()
+        if scanner.expect(",}") == "}":
+            return
+
+
+def top_level_keys(stream, chunk_size=CHUNK_SIZE):
+    """Returns the keys of a top-level JSON object without decoding any values."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    scanner = _Scanner(stream, chunk_size)
+    keys = []
+    scanner.expect("{")
+    if scanner.peek() == "}":
+        return keys
+    while True:
+        keys.append(scanner.value())
+        scanner.expect(":")
+        if scanner.peek() == "[":
+            # Skip arrays element by element so a huge "objects" array is never buffered whole.
+            for _ in _iter_array(scanner, scanner.raw_value):
+                pass
+        else:
+            scanner.raw_value()
+        if scanner.expect(",}") == "}":
+            return keys
@@ -25,16 +25,16 @@ def map_foliage_sway(effect_data):
 
 def map_color_grading(effect_data):
     """Maps colorGrading to a color matrix filter."""
-    # Placeholder: Map to a simple color matrix
+    # Placeholder: the effect's own matrix (4x4, or Pixi's 4x5 with offsets) if it has one, else identity
     return {
         "filter": "ColorMatrixFilter",
         "settings": {
-            "matrix": [
+            "matrix": effect_data.get("matrix", [
                 1, 0, 0, 0,
                 0, 1, 0, 0,
                 0, 0, 1, 0,
                 0, 0, 0, 1
-            ]
+            ])
         }
     }
 
@@ -0,0 +1,239 @@
+"""
+Output optimization, run on an export after SceneGenerator.generate():
+
+- small images referenced by the page are inlined as data URIs and removed;
+- the generated script.js and index.html are minified (a content-hashed script
+  is found through asset-manifest.json and renamed to the hash of its new content);
+- compressible text files get precompressed .gz (and, with the optional brotli
+  package, .br) sidecars that static servers can send as they are.
+
+Media that is already compressed (video, audio, png/jpg, ...) is never recompressed.
+"""
+import base64
+import gzip
+import hashlib
+import os
+import json
+import re
+
+from converter.asset_store import ASSET_MANIFEST_NAME, hashed_name
+from converter.build_cache import VOLATILE_OUTPUTS
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only .gz sidecars are written.
+    brotli = None
+
+# Images at most this many bytes are inlined by default.
+DEFAULT_INLINE_THRESHOLD = 2048
+# Types that may be inlined, with their MIME types.
+INLINE_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".gif": "image/gif",
+                ".webp": "image/webp", ".svg": "image/svg+xml"}
+# Files the generator writes and that are minified.
+MINIFIED_FILES = ("script.js", "index.html")
+# Text formats that compress well; everything else (media, fonts, archives) is left alone.
+COMPRESSIBLE_EXTENSIONS = {".html", ".htm", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".xml", ".md"}
+SIDECAR_EXTENSIONS = (".gz", ".br")
+# Build metadata the page never loads; the orchestrator rewrites the volatile ones
+# after this stage, so sidecars of them would go stale.
+UNCOMPRESSED_OUTPUTS = VOLATILE_OUTPUTS | {"ir.json", "ir.stlb"}
+# Files smaller than this gain nothing from a sidecar.
+MIN_COMPRESS_SIZE = 256
+
+_ASSET_STRING = re.compile(r"""(["'])\./assets/([^"'\s]+)\1""")
+_BETWEEN_TAGS = re.compile(r">\s+<")
+
+
+def minify_js(source):
+    """
+    Removes comments, indentation and blank lines. Strings and template literals are
+    copied untouched, so this is safe for the generated runtime, which uses no
+    regular expression literals.
+    """
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        char = source[i]
+        if char in "'\"`":
+            end = i + 1
+            while end < n and source[end] != char:
+                end += 2 if source[end] == "\\" else 1
+            out.append(source[i:end + 1])
+            i = end + 1
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = n if end < 0 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            out.append(char)
+            i += 1
+    lines = (line.strip() for line in "".join(out).splitlines())
+    return "\n".join(line for line in lines if line) + "\n"
+
+
+def minify_html(source):
+    """Strips indentation and the whitespace between tags of the generated page."""
+    lines = (line.strip() for line in source.splitlines())
+    return _BETWEEN_TAGS.sub("><", "".join(line for line in lines if line)) + "\n"
+
+
+def _read_manifest(output_dir):
+    path = os.path.join(output_dir, ASSET_MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _generated_names(output_dir):
+    """Maps each of MINIFIED_FILES to the name it has in this export."""
+    manifest = _read_manifest(output_dir) or {}
+    return {name: manifest.get(name, name) for name in MINIFIED_FILES}
+
+
+def _data_uri(path, mime):
+    with open(path, 'rb') as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+
+def _inline_assets(output_dir, threshold, stats):
+    """Replaces quoted ./assets/<name> strings in the generated files with data URIs."""
+    assets_dir = os.path.join(output_dir, "assets")
+    texts = {}
+    for name in _generated_names(output_dir).values():
+        path = os.path.join(output_dir, name)
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                texts[name] = f.read()
+
+    uris = {}
+    for text in texts.values():
+        for _, name in _ASSET_STRING.findall(text):
+            mime = INLINE_TYPES.get(os.path.splitext(name)[1].lower())
+            path = os.path.join(assets_dir, name)
+            if name in uris or not mime or not os.path.isfile(path) or os.path.getsize(path) > threshold:
+                continue
+            uris[name] = _data_uri(path, mime)
+    if not uris:
+        return
+
+    def replace(match):
+        uri = uris.get(match.group(2))
+        return match.group(0) if uri is None else f"{match.group(1)}{uri}{match.group(1)}"
+
+    for name, text in texts.items():
+        with open(os.path.join(output_dir, name), 'w', encoding='utf-8') as f:
+            f.write(_ASSET_STRING.sub(replace, text))
+    for name in sorted(uris):
+        path = os.path.join(assets_dir, name)
+        stats["bytes_inlined"] += os.path.getsize(path)
+        os.remove(path)
+        stats["inlined"].append(name)
+
+    manifest = _read_manifest(output_dir)
+    if manifest is not None:
+        removed = {f"assets/{name}" for name in uris}
+        with open(os.path.join(output_dir, ASSET_MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump({logical: name for logical, name in manifest.items() if name not in removed}, f, indent=2)
+
+
+def _minify(output_dir, stats):
+    names = _generated_names(output_dir)
+    for name, minify in ((names["script.js"], minify_js), (names["index.html"], minify_html)):
+        path = os.path.join(output_dir, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        minified = minify(source)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(minified)
+        stats["bytes_minified"] += len(source.encode('utf-8')) - len(minified.encode('utf-8'))
+
+
+def _rehash_script(output_dir, stats):
+    """
+    Renames a content-hashed script whose bytes changed above to the hash of its
+    new content, and points index.html and asset-manifest.json at the new name.
+    """
+    manifest = _read_manifest(output_dir)
+    if not manifest or manifest.get("script.js", "script.js") == "script.js":
+        return
+    old_name = manifest["script.js"]
+    with open(os.path.join(output_dir, old_name), 'rb') as f:
+        new_name = hashed_name("script.js", hashlib.sha256(f.read()).hexdigest())
+    if new_name == old_name:
+        return
+    os.replace(os.path.join(output_dir, old_name), os.path.join(output_dir, new_name))
+    html_path = os.path.join(output_dir, "index.html")
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(html.replace(f"./{old_name}", f"./{new_name}"))
+    manifest["script.js"] = new_name
+    with open(os.path.join(output_dir, ASSET_MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    stats["script"] = new_name
+
+
+def _write_sidecar(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _compress(output_dir, stats):
+    for directory, _, names in os.walk(output_dir):
+        present = set(names)
+        for name in names:
+            path = os.path.join(directory, name)
+            base, extension = os.path.splitext(name)
+            if extension in SIDECAR_EXTENSIONS:
+                # Sidecars are rewritten below; drop those whose original is gone or is build metadata.
+                if base not in present or base in UNCOMPRESSED_OUTPUTS:
+                    os.remove(path)
+                continue
+            if extension.lower() not in COMPRESSIBLE_EXTENSIONS or name in UNCOMPRESSED_OUTPUTS:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            for sidecar in SIDECAR_EXTENSIONS:
+                if os.path.exists(path + sidecar):
+                    os.remove(path + sidecar)
+            if len(data) < MIN_COMPRESS_SIZE:
+                continue
+            # mtime=0 keeps the .gz bytes identical across runs.
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                _write_sidecar(path + ".gz", compressed)
+                stats["sidecars"] += 1
+            if brotli is not None:
+                compressed = brotli.compress(data, mode=brotli.MODE_TEXT)
+                if len(compressed) < len(data):
+                    _write_sidecar(path + ".br", compressed)
+                    stats["sidecars"] += 1
+
+
+def optimize_output(output_dir, inline_threshold=DEFAULT_INLINE_THRESHOLD, minify=True, compress=True):
+    """
+    Optimizes an export in place. inline_threshold is the largest image (in bytes)
+    inlined into the page; 0 disables inlining. Returns statistics for the
+    conversion log.
+    """
+    output_dir = str(output_dir)
+    stats = {"inlined": [], "bytes_inlined": 0, "bytes_minified": 0, "sidecars": 0, "brotli": brotli is not None}
+    if inline_threshold:
+        _inline_assets(output_dir, inline_threshold, stats)
+    if minify:
+        _minify(output_dir, stats)
+    _rehash_script(output_dir, stats)
+    if compress:
+        _compress(output_dir, stats)
+    return stats
+
+
+def is_sidecar(rel_path, files):
+    """Whether rel_path is a precompressed copy of another file in `files`."""
+    base, extension = os.path.splitext(rel_path)
+    return extension in SIDECAR_EXTENSIONS and base in files
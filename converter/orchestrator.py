@@ -1,35 +1,98 @@
 import argparse
+import cProfile
 import os
 import json
-import shutil
-import zipfile
 from pathlib import Path
 import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+from converter.build_cache import BuildManifest
 from converter.detector import detect_wallpaper_type
-from converter.generator_scene import SceneGenerator
+from converter.effect_chain import compile_effects
+from converter.generator_scene import DEFAULT_ASSET_WORKERS, SceneGenerator
 from converter.validator import validate_output
-from converter.parser import parse_project_to_ir, handle_pkg_input
+from converter.ir_binary import read_ir, write_ir
+from converter.optimize import DEFAULT_INLINE_THRESHOLD, optimize_output
+from converter.parser import parse_project_to_ir
+from converter.profiling import PROFILE_NAME, TRACE_NAME, StageTimer
+from converter.vfs import open_source, PkgSource, ProjectIndex
+from converter.watch import POLL_INTERVAL, make_watcher
+from converter.zip_output import ZipOutput
+
+# Inputs that feed the parse stage; any other change leaves the cached IR valid.
+PARSE_INPUTS = ("scene.json", "project.json")
+
+# Files whose presence marks a directory as an unpacked wallpaper when scanning a collection.
+WALLPAPER_MARKERS = {"scene.json", "project.json", "materials"}
+
 
 def main():
     parser = argparse.ArgumentParser(description="Wallpaper Engine Web Exporter CLI")
-    parser.add_argument("--input", type=str, required=True,
-                        help="Path to the input folder (unpacked wallpaper) or a zip file.")
-    parser.add_argument("--out", type=str, required=True,
+    parser.add_argument("--input", type=str,
+                        help="Path to the input folder (unpacked wallpaper), a zip file or a .pkg file.")
+    parser.add_argument("--out", type=str,
                         help="Path to the output directory (e.g., output/web/{id}/).")
     parser.add_argument("--type", type=str, choices=["video", "scene", "hybrid"],
                          help="Force a specific wallpaper type (e.g., scene, video).")
     parser.add_argument("--all", action="store_true",
                          help="Process all detected wallpapers in the input if it's a collection.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                         help="Number of worker processes used with --all, or worker threads with --serve (default: number of CPUs).")
     parser.add_argument("--emit-ir", type=str,
-                         help="Emit the STL IR to the specified JSON file and exit.")
+                         help="Emit the STL IR to the specified file and exit (binary if it ends in .stlb).")
+    parser.add_argument("--ir-format", type=str, choices=["json", "binary"], default="json",
+                        help="Encoding of the emitted and cached IR: compact JSON or the binary .stlb format.")
     parser.add_argument("--strict-shaders", action="store_true",
                         help="Fail conversion if an unknown or unmappable shader is found.")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore the incremental build cache and rebuild every stage.")
+    parser.add_argument("--hash-inputs", action="store_true",
+                        help="Also compare content hashes of inputs, so touched-but-unchanged files stay cached.")
+    parser.add_argument("--max-texture", type=int,
+                        help="Cap layer images at this many pixels on the longer side and emit smaller variants (e.g. 2048).")
+    parser.add_argument("--tex-target-size", type=int,
+                        help="Decode .tex textures from the smallest mipmap at least this many pixels on the longer side, instead of full size.")
+    parser.add_argument("--no-ir-cache", action="store_true",
+                        help="Do not write ir.json; the IR is handed to the generator in memory and re-parsed on every run.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump (profile.pstats) and a Chrome trace (trace.json) into each wallpaper's output folder.")
+    parser.add_argument("--atlas-threshold", type=int,
+                        help="Pack images no larger than this many pixels per side into texture atlas pages (e.g. 256).")
+    parser.add_argument("--serve", type=str, metavar="ADDRESS",
+                        help="Run as a long-lived conversion service on a Unix socket path or HOST:PORT (see converter/service.py).")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Inline small images, minify script.js and index.html and write .gz/.br sidecars for text files.")
+    parser.add_argument("--inline-threshold", type=int, default=DEFAULT_INLINE_THRESHOLD,
+                        help=f"With --optimize, inline images up to this many bytes as data URIs (default: {DEFAULT_INLINE_THRESHOLD}; 0 disables).")
+    parser.add_argument("--watch", action="store_true",
+                        help="After converting, keep watching the input folder and rebuild the stages affected by each change.")
+    parser.add_argument("--poll", action="store_true",
+                        help="With --watch, poll for changes instead of using inotify.")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                        help=f"Seconds between checks when polling (default: {POLL_INTERVAL}).")
+    parser.add_argument("--asset-workers", type=int, default=DEFAULT_ASSET_WORKERS,
+                        help=f"Threads copying assets into each export (default: {DEFAULT_ASSET_WORKERS}); raise it for network storage.")
+    parser.add_argument("--hashed-names", action="store_true",
+                        help="Name assets and script.js by content hash (name.<hash>.ext) and write asset-manifest.json, so everything but index.html can be cached forever.")
+    parser.add_argument("--out-zip", type=str, metavar="PATH",
+                        help="Write the web export straight into this zip archive instead of a folder. --out is then optional and only receives the conversion log.")
 
     args = parser.parse_args()
+    if args.serve:
+        # Imported here: the service module builds on this one.
+        from converter.service import serve
+        serve(args.serve, args.jobs)
+        return
+    if not args.input or not (args.out or args.out_zip):
+        parser.error("--input and --out (or --out-zip) are required unless --serve is given.")
+    if args.out_zip and (args.all or args.emit_ir or args.watch):
+        parser.error("--out-zip exports a single wallpaper; it cannot be combined with --all, --emit-ir or --watch.")
 
     input_path = Path(args.input)
-    output_base_path = Path(args.out)
+    # With --out-zip alone, the conversion log goes next to the archive.
+    output_base_path = Path(args.out) if args.out else Path(args.out_zip).parent
+    log_path = output_base_path / "debug.json" if args.out else Path(args.out_zip + ".log.json")
     
     # Ensure output base path exists
     output_base_path.mkdir(parents=True, exist_ok=True)
@@ -43,84 +106,346 @@ def main():
         "results": []
     }
 
-    temp_extract_path = None
+    start_time = time.perf_counter()
+    # Zip inputs are read in place through converter.vfs; nothing is extracted to disk.
     if input_path.is_file() and input_path.suffix.lower() == ".zip":
-        print(f"Input is a zip file. Extracting to temporary directory...")
-        temp_extract_path = Path(output_base_path / f"temp_unzipped_{os.urandom(4).hex()}")
         try:
-            with zipfile.ZipFile(input_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_extract_path)
-            input_path = temp_extract_path
-            print(f"Zip extracted to: {input_path}")
+            input_path = open_source(input_path)
+            print(f"Input is a zip file. Reading wallpaper directly from the archive.")
         except Exception as e:
-            print(f"Error extracting zip file: {e}")
-            conversion_log["error"] = f"Zip extraction failed: {e}"
-            with open(output_base_path / "debug.json", 'w', encoding='utf-8') as f:
+            print(f"Error reading zip file: {e}")
+            conversion_log["error"] = f"Zip read failed: {e}"
+            with open(log_path, 'w', encoding='utf-8') as f:
                 json.dump(conversion_log, f, indent=4)
             return
 
+    build_options = {"force": args.force, "hash_inputs": args.hash_inputs, "max_texture": args.max_texture,
+                     "texture_target_size": args.tex_target_size,
+                     "atlas_threshold": args.atlas_threshold, "ir_cache": not args.no_ir_cache,
+                     "ir_format": args.ir_format, "profile": args.profile, "asset_workers": args.asset_workers,
+                     "optimize": args.optimize, "inline_threshold": args.inline_threshold, "hashed_names": args.hashed_names}
+
     try:
         if args.all:
-            # For --all, assume input_path is a directory containing multiple wallpapers
-            print("Processing all detected wallpapers in collection (not yet fully implemented for multiple wallpapers).")
-            # This part would require iterating through subdirectories and calling detect/generate for each
-            # For now, we'll treat the main input_path as a single wallpaper for demonstration
-            process_single_wallpaper(input_path, output_base_path, args.type, args.emit_ir, args.strict_shaders, conversion_log["results"])
+            conversion_log["jobs"] = args.jobs
+            process_all_wallpapers(input_path, output_base_path, args.type, args.strict_shaders, args.jobs, conversion_log["results"], build_options)
+        elif args.out_zip:
+            conversion_log["output_zip"] = args.out_zip
+            if args.optimize or args.atlas_threshold:
+                print("Note: --optimize and --atlas-threshold work on an export folder and are skipped with --out-zip.")
+            export_single_wallpaper_to_zip(input_path, Path(args.out_zip), args.type, conversion_log["results"],
+                                           max_texture=args.max_texture, texture_target_size=args.tex_target_size,
+                                           asset_workers=args.asset_workers,
+                                           hashed_names=args.hashed_names)
         else:
-            # Handle .pkg input separately for now
-            if input_path.is_file() and input_path.suffix.lower() == ".pkg":
-                if args.emit_ir:
-                    print(f"Processing .pkg file: {input_path}")
-                    handle_pkg_input(input_path, args.emit_ir)
+            # .pkg containers are read natively and go through the normal pipeline.
+            process_single_wallpaper(input_path, output_base_path, args.type, args.emit_ir, args.strict_shaders, conversion_log["results"], **build_options)
+            if args.watch:
+                if args.emit_ir or not Path(str(input_path)).is_dir():
+                    print("--watch needs an unpacked wallpaper folder and a web export; not watching.")
                 else:
-                    print("Processing .pkg files for web export is not yet supported. Use --emit-ir to generate IR.")
-                return # Exit after handling the .pkg file
-
-            process_single_wallpaper(input_path, output_base_path, args.type, args.emit_ir, args.strict_shaders, conversion_log["results"])
+                    watch_single_wallpaper(input_path, output_base_path, args.type, args.strict_shaders, conversion_log["results"],
+                                           build_options, make_watcher(input_path, args.poll_interval,
+                                                                       _watch_exclude(input_path, output_base_path), args.poll))
 
     except Exception as e:
         print(f"An error occurred during conversion: {e}")
         conversion_log["error"] = f"Conversion failed: {e}"
     finally:
-        if temp_extract_path and temp_extract_path.exists():
-            print(f"Cleaning up temporary extraction directory: {temp_extract_path}")
-            shutil.rmtree(temp_extract_path)
-        
         # Write debug.json
-        with open(output_base_path / "debug.json", 'w', encoding='utf-8') as f:
+        conversion_log["duration_seconds"] = round(time.perf_counter() - start_time, 4)
+        with open(log_path, 'w', encoding='utf-8') as f:
             json.dump(conversion_log, f, indent=4)
-        print(f"Conversion log written to {output_base_path / 'debug.json'}")
+        print(f"Conversion log written to {log_path}")
+
+
+def find_wallpaper_dirs(collection_path):
+    """
+    Returns sources for the immediate subdirectories of a collection (e.g. a Workshop
+    content folder, or a zip of one) that look like wallpapers, sorted by name so
+    batch output is deterministic.
+    """
+    collection = open_source(collection_path)
+    wallpaper_dirs = []
+    for name in sorted(collection.listdir("")):
+        if not collection.is_dir(name):
+            continue
+        names = set(collection.listdir(name))
+        if names & WALLPAPER_MARKERS or any(entry.lower().endswith((".mp4", ".webm")) for entry in names):
+            wallpaper_dirs.append(collection.subsource(name))
+    return wallpaper_dirs
+
+
+def _convert_wallpaper_job(input_path: Path, output_path: Path, forced_type: str, strict_shaders: bool, options: dict = None):
+    """
+    Worker entry point for batch conversion. Runs in a child process, so it returns
+    its results instead of appending to a shared log. `options` holds extra keyword
+    arguments for process_single_wallpaper.
+    """
+    results = []
+    start = time.perf_counter()
+    try:
+        process_single_wallpaper(input_path, output_path, forced_type, None, strict_shaders, results, **(options or {}))
+    except Exception as e:
+        results.append({"wallpaper_name": input_path.name, "status": "failed", "error": str(e), "output_dir": str(output_path)})
+    elapsed = time.perf_counter() - start
+    for entry in results:
+        entry["duration_seconds"] = round(elapsed, 4)
+    return results
 
 
-def process_single_wallpaper(input_path: Path, output_base_path: Path, forced_type: str, emit_ir_path: str, strict_shaders: bool, results_log: list):
+def process_all_wallpapers(collection_path: Path, output_base_path: Path, forced_type: str, strict_shaders: bool, jobs: int, results_log: list, options: dict = None):
+    """
+    Converts every wallpaper subdirectory of collection_path into its own output
+    subfolder, fanning the work out over a pool of `jobs` processes.
+    """
+    # Messages show the path as given; sources passed in directly show their name.
+    location = str(collection_path) if isinstance(collection_path, (str, os.PathLike)) else collection_path.name
+    collection_path = open_source(collection_path)
+    # A .pkg holds exactly one wallpaper; its folders (materials/, ...) are not wallpapers.
+    wallpaper_dirs = [] if isinstance(collection_path, PkgSource) else find_wallpaper_dirs(collection_path)
+    if not wallpaper_dirs:
+        # Not a collection; treat the input itself as a single wallpaper.
+        print(f"No wallpaper subdirectories found in {location}. Treating it as a single wallpaper.")
+        results_log.extend(_convert_wallpaper_job(collection_path, output_base_path, forced_type, strict_shaders, options))
+        return
+
+    jobs = max(1, min(jobs, len(wallpaper_dirs)))
+    print(f"Found {len(wallpaper_dirs)} wallpapers in {location}. Converting with {jobs} worker(s)...")
+
+    if jobs == 1:
+        for wallpaper_dir in wallpaper_dirs:
+            results_log.extend(_convert_wallpaper_job(wallpaper_dir, output_base_path / wallpaper_dir.name, forced_type, strict_shaders, options))
+        return
+
+    results_by_name = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_convert_wallpaper_job, wallpaper_dir, output_base_path / wallpaper_dir.name, forced_type, strict_shaders, options): wallpaper_dir
+            for wallpaper_dir in wallpaper_dirs
+        }
+        for future in as_completed(futures):
+            wallpaper_dir = futures[future]
+            try:
+                results_by_name[wallpaper_dir.name] = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed by the OS).
+                print(f"Worker failed for {wallpaper_dir.name}: {e}")
+                results_by_name[wallpaper_dir.name] = [{"wallpaper_name": wallpaper_dir.name, "status": "failed", "error": str(e), "output_dir": str(output_base_path / wallpaper_dir.name)}]
+
+    # Keep the combined log in discovery order regardless of completion order.
+    for wallpaper_dir in wallpaper_dirs:
+        results_log.extend(results_by_name[wallpaper_dir.name])
+
+
+def process_single_wallpaper(input_path: Path, output_base_path: Path, forced_type: str, emit_ir_path: str, strict_shaders: bool, results_log: list,
+                             force: bool = False, hash_inputs: bool = False, max_texture: int = None,
+                             atlas_threshold: int = None, ir_cache: bool = True, ir_format: str = "json",
+                             profile: bool = False, asset_workers: int = DEFAULT_ASSET_WORKERS, progress=None,
+                             optimize: bool = False, inline_threshold: int = DEFAULT_INLINE_THRESHOLD,
+                             hashed_names: bool = False, texture_target_size: int = None):
     """
     Processes a single wallpaper (folder), either generating web export or emitting STL IR.
+
+    Web exports are incremental: a build manifest in the output folder records the
+    fingerprint of every input, and stages whose inputs are unchanged are skipped.
+    Pass force=True to rebuild everything. max_texture caps layer images and turns
+    on resolution variants; atlas_threshold packs small images into texture atlases.
+    texture_target_size decodes .tex textures from the smallest sufficient mipmap.
+    asset_workers bounds the threads copying assets; it does not change the output.
+    optimize runs converter.optimize over the export (inlining images up to
+    inline_threshold bytes, minifying, and writing compressed sidecars).
+    hashed_names names assets and script.js by content hash and writes
+    asset-manifest.json.
+    The IR goes to the generator in memory; with ir_cache it is also written once,
+    compactly, to ir.json (ir.stlb with ir_format="binary") so an unchanged
+    scene.json is not parsed again.
+
+    Every stage is timed; the spans are added to the result entry as "timings".
+    profile=True also writes profile.pstats and trace.json to the output folder.
+
+    input_path may also be a converter.vfs source or a ProjectIndex. progress, if
+    given, receives {"event": "stage", ...} with each span as its stage ends and
+    {"event": "assets", "bytes_done", "bytes_total"} as assets are copied.
     """
-    print(f"\n--- Processing wallpaper from {input_path.name} ---")
+    timer = StageTimer(input_path.name, listener=(lambda stage: progress(dict(stage, event="stage"))) if progress else None)
+    profiler = cProfile.Profile() if profile else None
+    first_result = len(results_log)
+    if profiler:
+        profiler.enable()
+    try:
+        _process_single_wallpaper(input_path, output_base_path, forced_type, emit_ir_path, strict_shaders, results_log, timer,
+                                  force, hash_inputs, max_texture, atlas_threshold, ir_cache, ir_format, asset_workers, progress,
+                                  optimize, inline_threshold, hashed_names, texture_target_size)
+    finally:
+        if profiler:
+            profiler.disable()
+        for entry in results_log[first_result:]:
+            entry["timings"] = timer.to_list()
+        if profile and not emit_ir_path:
+            output_base_path.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(output_base_path / PROFILE_NAME))
+            timer.write_chrome_trace(output_base_path / TRACE_NAME)
+            print(f"Profile written to {output_base_path / PROFILE_NAME} and {output_base_path / TRACE_NAME}")
+
+
+def _watch_exclude(input_path: Path, output_base_path: Path):
+    """Paths to ignore while watching: the export itself, if it lives inside the input folder."""
+    try:
+        rel_output = output_base_path.resolve().relative_to(input_path.resolve())
+    except ValueError:
+        return ()
+    return (rel_output.as_posix(),)
+
+
+def watch_single_wallpaper(input_path: Path, output_base_path: Path, forced_type: str, strict_shaders: bool, results_log: list,
+                           options: dict = None, watcher=None, max_rebuilds: int = None):
+    """
+    Rebuilds a wallpaper folder each time its files change, until interrupted.
+
+    Rebuilds go through process_single_wallpaper, so the build manifest decides what
+    actually runs: an edited scene.json or project.json is re-parsed and the page
+    regenerated without copying media again, while a changed texture or other asset
+    only re-copies that file and reuses the cached IR. `watcher` defaults to
+    make_watcher() on the input folder; max_rebuilds stops after that many rebuilds.
+    """
+    watcher = watcher or make_watcher(input_path, exclude=_watch_exclude(input_path, output_base_path))
+    print(f"Watching {input_path} for changes ({watcher.kind}). Press Ctrl+C to stop.")
+    rebuilds = 0
+    try:
+        while max_rebuilds is None or rebuilds < max_rebuilds:
+            changed = watcher.wait()
+            if not changed:
+                continue
+            stages = "parse and generate" if any(rel_path in PARSE_INPUTS for rel_path in changed) else "assets"
+            shown = ", ".join(changed[:5]) + (f" and {len(changed) - 5} more" if len(changed) > 5 else "")
+            print(f"Changed: {shown}. Rebuilding ({stages})...")
+            start = time.perf_counter()
+            process_single_wallpaper(input_path, output_base_path, forced_type, None, strict_shaders, results_log, **(options or {}))
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+            rebuilds += 1
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
+
+
+def export_single_wallpaper_to_zip(input_path: Path, zip_path: Path, forced_type: str, results_log: list,
+                                   max_texture: int = None, asset_workers: int = DEFAULT_ASSET_WORKERS, progress=None,
+                                   hashed_names: bool = False, texture_target_size: int = None):
+    """
+    Converts a single wallpaper straight into a zip archive at zip_path, with no
+    export folder in between: assets and generated files are streamed into the
+    archive as they are produced (see converter.zip_output), and the finished
+    archive is validated in place. There is no build manifest, so every run is a
+    full build. progress works as for process_single_wallpaper.
+    """
+    timer = StageTimer(input_path.name, listener=(lambda stage: progress(dict(stage, event="stage"))) if progress else None)
+    with timer.span("index"):
+        source = ProjectIndex.of(input_path)
+    wallpaper_name = source.name
+    print(f"\n--- Processing wallpaper from {wallpaper_name} ---")
+
+    with timer.span("detect"):
+        detected_type, metadata = detect_wallpaper_type(source)
+    conversion_type = forced_type if forced_type else detected_type
+    result_entry = {
+        "wallpaper_name": wallpaper_name,
+        "detected_type": detected_type,
+        "conversion_type": conversion_type,
+        "metadata": metadata,
+        "status": "failed",
+        "output_zip": None
+    }
+    if conversion_type == "unknown":
+        print(f"Could not determine wallpaper type for {wallpaper_name}. Skipping.")
+        result_entry["error"] = "Unknown wallpaper type"
+    else:
+        try:
+            with timer.span("parse"):
+                ir_data = parse_project_to_ir(source)
+            if not ir_data:
+                raise Exception("Failed to generate IR.")
+            with timer.span("effects"):
+                result_entry["effects"] = compile_effects(ir_data)
+            # The archive is only moved into place if everything below succeeds.
+            with ZipOutput(zip_path) as output:
+                generator = SceneGenerator(ir_data, None, source_dir=source, max_texture=max_texture,
+                                           texture_target_size=texture_target_size,
+                                           write_debug_json=False, timer=timer, asset_workers=asset_workers,
+                                           progress=(lambda done, total: progress({"event": "assets", "bytes_done": done, "bytes_total": total}))
+                                           if progress else None, output=output, hashed_names=hashed_names)
+                generator.generate()
+            result_entry["assets"] = generator.asset_store.stats
+            result_entry["zip"] = output.stats
+            result_entry["output_zip"] = str(zip_path)
+            print(f"Generated web export to: {zip_path} ({output.stats['entries']} entries, "
+                  f"{output.stats['stored']} stored, {output.stats['deflated']} deflated)")
+
+            print("Running validation...")
+            result_entry["validation"] = {}
+            with timer.span("validate"):
+                is_valid = validate_output(zip_path, report_into=result_entry["validation"])
+            result_entry["status"] = "success" if is_valid else "success_with_warnings"
+            print("Validation successful." if is_valid else "Validation failed or had warnings.")
+        except Exception as e:
+            print(f"Error during generation/validation for {wallpaper_name}: {e}")
+            result_entry["error"] = str(e)
+    result_entry["timings"] = timer.to_list()
+    results_log.append(result_entry)
+
+
+def _process_single_wallpaper(input_path, output_base_path, forced_type, emit_ir_path, strict_shaders, results_log, timer,
+                              force, hash_inputs, max_texture, atlas_threshold, ir_cache, ir_format, asset_workers, progress,
+                              optimize, inline_threshold, hashed_names, texture_target_size):
+    # One listing of the wallpaper, shared by every stage below.
+    with timer.span("index"):
+        source = ProjectIndex.of(input_path)
+    wallpaper_name = source.name
+    print(f"\n--- Processing wallpaper from {wallpaper_name} ---")
 
     # If emitting IR, just run the parser and exit
     if emit_ir_path:
         print(f"Parsing project to generate STL IR...")
-        ir_data = parse_project_to_ir(input_path)
+        with timer.span("parse"):
+            ir_data = parse_project_to_ir(source)
         if ir_data:
             try:
-                with open(emit_ir_path, 'w', encoding='utf-8') as f:
-                    json.dump(ir_data, f, indent=4)
+                write_ir(ir_data, emit_ir_path, binary=True if ir_format == "binary" else None)
                 print(f"STL IR successfully written to {emit_ir_path}")
-                results_log.append({"wallpaper_name": input_path.name, "status": "ir_emitted", "output_path": emit_ir_path})
+                results_log.append({"wallpaper_name": wallpaper_name, "status": "ir_emitted", "output_path": emit_ir_path})
             except Exception as e:
                 print(f"Error writing IR file: {e}")
-                results_log.append({"wallpaper_name": input_path.name, "status": "ir_failed", "error": str(e)})
+                results_log.append({"wallpaper_name": wallpaper_name, "status": "ir_failed", "error": str(e)})
         else:
             print("Failed to generate STL IR.")
-            results_log.append({"wallpaper_name": input_path.name, "status": "ir_failed", "error": "Parser returned no data."})
+            results_log.append({"wallpaper_name": wallpaper_name, "status": "ir_failed", "error": "Parser returned no data."})
         return
 
-    detected_type, metadata = detect_wallpaper_type(input_path)
+    # Use the provided output_base_path directly
+    current_output_path = output_base_path
+    manifest = BuildManifest(current_output_path, with_hash=hash_inputs, force=force)
+    build_options = {"forced_type": forced_type, "strict_shaders": strict_shaders, "max_texture": max_texture,
+                     "texture_target_size": texture_target_size,
+                     "atlas_threshold": atlas_threshold, "optimize": inline_threshold if optimize else None,
+                     "hashed_names": hashed_names}
+
+    with timer.span("fingerprint"):
+        input_fingerprints = source.fingerprints(with_hash=hash_inputs)
+        fresh = manifest.is_fresh("export", input_fingerprints, build_options)
+    if fresh:
+        result_entry = dict(manifest.stage_data("export"))
+        result_entry["cached"] = True
+        print(f"Inputs unchanged since the last build of {wallpaper_name}. Skipping conversion.")
+        results_log.append(result_entry)
+        return
+
+    with timer.span("detect"):
+        detected_type, metadata = detect_wallpaper_type(source)
     conversion_type = forced_type if forced_type else detected_type
 
     result_entry = {
-        "wallpaper_name": input_path.name,
+        "wallpaper_name": wallpaper_name,
         "detected_type": detected_type,
         "conversion_type": conversion_type,
         "metadata": metadata,
@@ -129,41 +454,77 @@ def process_single_wallpaper(input_path: Path, output_base_path: Path, forced_ty
     }
     
     if conversion_type == "unknown":
-        print(f"Could not determine wallpaper type for {input_path.name}. Skipping.")
+        print(f"Could not determine wallpaper type for {wallpaper_name}. Skipping.")
         result_entry["error"] = "Unknown wallpaper type"
         results_log.append(result_entry)
         return
 
-    # Use the provided output_base_path directly
-    current_output_path = output_base_path
     result_entry["output_dir"] = str(current_output_path)
 
     try:
-        ir_data = parse_project_to_ir(input_path)
-        if not ir_data:
-            raise Exception("Failed to generate IR.")
-
         current_output_path.mkdir(parents=True, exist_ok=True)
-        ir_path = current_output_path / "ir.json"
-        with open(ir_path, 'w', encoding='utf-8') as f:
-            json.dump(ir_data, f, indent=4)
+        ir_name = "ir.stlb" if ir_format == "binary" else "ir.json"
+        ir_path = current_output_path / ir_name
 
-        generator = SceneGenerator(str(ir_path), str(current_output_path))
+        parse_inputs = {rel_path: input_fingerprints[rel_path] for rel_path in PARSE_INPUTS if rel_path in input_fingerprints}
+        parse_options = {"ir_format": ir_format}
+        with timer.span("parse"):
+            if ir_cache and manifest.is_fresh("parse", parse_inputs, parse_options):
+                print("scene.json unchanged. Reusing cached IR.")
+                ir_data = read_ir(ir_path)
+            else:
+                ir_data = parse_project_to_ir(source)
+                if not ir_data:
+                    raise Exception("Failed to generate IR.")
+                if ir_cache:
+                    # Written before generation, which rewrites asset paths in ir_data.
+                    write_ir(ir_data, ir_path, binary=ir_format == "binary")
+                    manifest.record("parse", parse_inputs, [ir_name], parse_options)
+                else:
+                    manifest.invalidate("parse")
+
+        # Runs on every build, cached IR included: the IR cache holds the parser's output.
+        with timer.span("effects"):
+            result_entry["effects"] = compile_effects(ir_data)
+
+        # debug.json is reserved for the orchestrator's conversion log and the IR is
+        # already in ir.json, so the generator skips its own IR dump.
+        generator = SceneGenerator(ir_data, str(current_output_path), source_dir=source,
+                                   previous_assets=manifest.stage_data("assets"), max_texture=max_texture,
+                                   texture_target_size=texture_target_size,
+                                   atlas_threshold=atlas_threshold, write_debug_json=False, timer=timer,
+                                   asset_workers=asset_workers, hashed_names=hashed_names,
+                                   progress=(lambda done, total: progress({"event": "assets", "bytes_done": done, "bytes_total": total}))
+                                   if progress else None)
         generator.generate()
+        manifest.record("assets", {}, [], data=generator.asset_store.entries)
+        result_entry["assets"] = generator.asset_store.stats
         print(f"Generated web export to: {current_output_path}")
+        if optimize:
+            with timer.span("optimize"):
+                result_entry["optimize"] = optimize_output(current_output_path, inline_threshold)
+            print(f"Optimized output: {len(result_entry['optimize']['inlined'])} asset(s) inlined, "
+                  f"{result_entry['optimize']['sidecars']} compressed sidecar(s) written.")
         
         print("Running validation...")
-        if validate_output(current_output_path):
+        result_entry["validation"] = {}
+        with timer.span("validate"):
+            is_valid = validate_output(current_output_path, report_into=result_entry["validation"])
+        if is_valid:
             print("Validation successful.")
             result_entry["status"] = "success"
-            print(f"Conversion complete for {input_path.name}. Open {current_output_path / 'index.html'} to view and inspect console logs.")
+            print(f"Conversion complete for {wallpaper_name}. Open {current_output_path / 'index.html'} to view and inspect console logs.")
         else:
             print("Validation failed or had warnings.")
             result_entry["status"] = "success_with_warnings" # or "failed" if critical
-            print(f"Conversion complete for {input_path.name} with warnings/errors. Check {current_output_path / 'index.html'} and logs.")
+            print(f"Conversion complete for {wallpaper_name} with warnings/errors. Check {current_output_path / 'index.html'} and logs.")
+
+        with timer.span("manifest"):
+            manifest.record("export", input_fingerprints, list(manifest.fingerprint_outputs()), build_options, data=result_entry)
+            manifest.save()
 
     except Exception as e:
-        print(f"Error during generation/validation for {input_path.name}: {e}")
+        print(f"Error during generation/validation for {wallpaper_name}: {e}")
         result_entry["error"] = str(e)
     
     results_log.append(result_entry)
@@ -1,25 +1,102 @@
-import json
+import copy
 import logging
-import os
-import subprocess
-import tempfile
+
+from converter.ir_binary import write_ir
+from converter.json_stream import iter_members
+from converter.pkg import PkgFormatError
+from converter.vfs import PkgSource, ProjectIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def parse_project_to_ir(project_path):
+# scene.json files at least this large are parsed incrementally (see converter.json_stream).
+STREAMING_THRESHOLD = 8 * 1024 * 1024
+# Top-level arrays whose elements are turned into IR entries one at a time.
+ITEM_ARRAYS = ("objects", "layers", "effects")
+
+def _scene_members(project, streaming):
+    """
+    Yields (key, value) for the top-level members of scene.json, with the arrays in
+    ITEM_ARRAYS yielded one element at a time. In streaming mode the file is read
+    incrementally, so only one element is held in memory at once.
+    """
+    if not streaming:
+        for key, value in project.scene.items():
+            if key in ITEM_ARRAYS and isinstance(value, list):
+                for item in value:
+                    yield key, item
+            else:
+                yield key, value
+        return
+    with project.open('scene.json') as f:
+        yield from iter_members(f, ITEM_ARRAYS)
+
+def _parse_layer(stl_ir, layer, index):
+    layer_type = layer.get("type")
+    if layer_type in ["image", "video"]:
+        stl_ir["scene"]["layers"].append({
+            "name": layer.get("name", f"Layer {index}"),
+            "type": layer_type,
+            "source": layer.get("file")
+            # In a real implementation, we would normalize coordinates, etc.
+        })
+    else:
+        logging.warning(f"Unsupported layer type found: {layer_type}")
+
+def _parse_object(stl_ir, obj, index):
+    """
+    Maps one entry of the scene's "objects" array to IR layers, particles, effects and UI.
+    Nested ui and effect values are copied, since the generator rewrites the IR in place
+    and obj may belong to a ProjectIndex's cached scene.json that outlives this IR.
+    """
+    name = obj.get("name", f"Object {index}")
+    materials = obj.get("materials") if isinstance(obj.get("materials"), dict) else {}
+    image = obj.get("image") or materials.get("image")
+
+    if isinstance(obj.get("ui"), dict):
+        stl_ir["scene"]["ui"][name] = copy.deepcopy(obj["ui"])
+    elif obj.get("type") == "video" or obj.get("file"):
+        stl_ir["scene"]["layers"].append({"name": name, "type": "video", "source": obj.get("file")})
+    elif image:
+        layer = {"name": name, "type": "image", "source": image}
+        if "depth" in obj:
+            layer["depth"] = obj["depth"]
+        stl_ir["scene"]["layers"].append(layer)
+    elif obj.get("particle"):
+        stl_ir["scene"]["particles"].append({"name": name, "source": obj["particle"]})
+    elif obj.get("sound"):
+        stl_ir["scene"]["audio"].append({"name": name, "source": obj["sound"]})
+    else:
+        logging.warning(f"Unsupported scene object found: {name}")
+
+    for effect in obj.get("effects") or []:
+        stl_ir["scene"]["effects"].append(dict(copy.deepcopy(effect), layer=name))
+
+def parse_project_to_ir(project_path, streaming=None):
     """
-    Parses an unpacked Wallpaper Engine project directory into a standardized STL IR JSON format.
+    Parses a Wallpaper Engine project into a standardized STL IR JSON format.
+    project_path may be an unpacked directory, a .zip archive, a .pkg container, a converter.vfs
+    source or a ProjectIndex (whose already parsed scene.json is reused).
+
+    streaming=True walks scene.json incrementally instead of loading it whole; the
+    default (None) streams files of at least STREAMING_THRESHOLD bytes that have not
+    already been loaded. Both modes produce the same IR.
     """
-    if not os.path.isdir(project_path):
+    try:
+        project = ProjectIndex.of(project_path)
+    except FileNotFoundError:
+        project = None
+    if project is None or not project.exists():
         logging.error(f"Project path does not exist or is not a directory: {project_path}")
         return None
 
-    scene_file_path = os.path.join(project_path, 'scene.json')
-    if not os.path.exists(scene_file_path):
+    if not project.is_file('scene.json'):
         logging.error(f"scene.json not found in project: {project_path}")
         return None
 
+    if streaming is None:
+        streaming = not project.is_parsed('scene.json') and project.stat('scene.json')[0] >= STREAMING_THRESHOLD
+
     stl_ir = {
         "version": "1.0",
         "scene": {
@@ -32,62 +109,52 @@ def parse_project_to_ir(project_path):
         }
     }
 
-    with open(scene_file_path, 'r') as f:
-        scene_data = json.load(f)
+    counts = {}
+    for key, value in _scene_members(project, streaming):
+        index = counts.get(key, 0)
+        counts[key] = index + 1
 
-    # Simulate parsing general properties
-    if "general" in scene_data and "properties" in scene_data["general"]:
-        for key, prop in scene_data["general"]["properties"].items():
-            if key == "unsupported_prop": # Example of an unsupported property
-                logging.warning(f"Unsupported general property found: {key}")
-    
-    # Simulate parsing layers
-    if "layers" in scene_data:
-        for i, layer in enumerate(scene_data["layers"]):
-            layer_type = layer.get("type")
-            if layer_type in ["image", "video"]:
-                stl_ir["scene"]["layers"].append({
-                    "name": layer.get("name", f"Layer {i}"),
-                    "type": layer_type,
-                    "source": layer.get("file")
-                    # In a real implementation, we would normalize coordinates, etc.
-                })
-            else:
-                logging.warning(f"Unsupported layer type found: {layer_type}")
+        # Simulate parsing general properties
+        if key == "general" and "properties" in value:
+            for prop_key, prop in value["properties"].items():
+                if prop_key == "unsupported_prop": # Example of an unsupported property
+                    logging.warning(f"Unsupported general property found: {prop_key}")
+
+        # Simulate parsing layers
+        elif key == "layers":
+            _parse_layer(stl_ir, value, index)
+
+        elif key == "objects":
+            _parse_object(stl_ir, value, index)
 
-    # Simulate parsing effects
-    if "effects" in scene_data:
-        for effect in scene_data["effects"]:
-            if effect.get("type") == "unsupported_effect":
-                logging.warning(f"Unsupported effect type found: {effect.get('name')}")
+        # Simulate parsing effects
+        elif key == "effects":
+            if value.get("type") == "unsupported_effect":
+                logging.warning(f"Unsupported effect type found: {value.get('name')}")
     
     logging.info("Scene parsing complete. See warnings for unsupported features.")
     return stl_ir
 
 def handle_pkg_input(pkg_path, emit_ir_path):
     """
-    Handles .pkg file inputs by unpacking them using RePKG and emitting IR.
+    Handles .pkg file inputs by reading them with the native PKG reader and emitting IR.
+    Only scene.json is read from the container; nothing is unpacked to disk.
     """
-    with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            logging.info(f"Unpacking {pkg_path} to {temp_dir}...")
-            # Ensure RePKG is available in the environment path
-            subprocess.run(['RePKG', 'unpack', '-i', pkg_path, '-o', temp_dir], check=True, capture_output=True, text=True)
-            
-            logging.info("Unpacking complete. Parsing for STL IR...")
-            stl_ir = parse_project_to_ir(temp_dir)
-            
-            if stl_ir and emit_ir_path:
-                with open(emit_ir_path, 'w') as f:
-                    json.dump(stl_ir, f, indent=4)
-                logging.info(f"STL IR successfully generated at {emit_ir_path}")
-            elif not emit_ir_path:
-                logging.error("No output path provided for the IR file (--emit-ir).")
-
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to unpack {pkg_path}: {e}")
-        except FileNotFoundError:
-            logging.error("RePKG not found. Please ensure it is installed and in your PATH.")
+    try:
+        logging.info(f"Reading {pkg_path}...")
+        source = PkgSource(pkg_path)
+        stl_ir = parse_project_to_ir(source)
+
+        if stl_ir and emit_ir_path:
+            write_ir(stl_ir, emit_ir_path)
+            logging.info(f"STL IR successfully generated at {emit_ir_path}")
+        elif not emit_ir_path:
+            logging.error("No output path provided for the IR file (--emit-ir).")
+
+    except PkgFormatError as e:
+        logging.error(f"Failed to read {pkg_path}: {e}")
+    except FileNotFoundError:
+        logging.error(f"PKG file not found: {pkg_path}")
 
 if __name__ == '__main__':
     # Example usage (for testing)
@@ -0,0 +1,157 @@
+"""
+Native reader for Wallpaper Engine .pkg containers.
+
+Layout (all integers are little-endian int32):
+    header:  length-prefixed magic string, e.g. "PKGV0001"
+    count:   number of entries
+    entries: count x (length-prefixed name, offset, length)
+    data:    entry payloads; offsets are relative to the end of the entry table
+"""
+import io
+import mmap
+import os
+import struct
+
+PKG_MAGIC_PREFIX = b"PKGV"
+# Guards against reading garbage as a header from a file that is not a .pkg.
+MAX_STRING_LENGTH = 4096
+
+_INT32 = struct.Struct("<i")
+
+
+class PkgFormatError(ValueError):
+    """Raised when a file is not a valid Wallpaper Engine .pkg container."""
+
+
+class PkgFile:
+    """
+    Memory-maps a .pkg file and parses its entry table. Entry payloads are never
+    copied up front; entry_view() returns a zero-copy memoryview into the mapping.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size == 0:
+                raise PkgFormatError(f"Empty .pkg file: {self.path}")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.version, self.entries = self._read_table(size)
+        except Exception:
+            self.close()
+            raise
+
+    def _read_table(self, size):
+        view = memoryview(self._map)
+        pos = 0
+
+        def read_int():
+            nonlocal pos
+            if pos + 4 > size:
+                raise PkgFormatError(f"Truncated .pkg header in {self.path}")
+            value = _INT32.unpack_from(view, pos)[0]
+            pos += 4
+            return value
+
+        def read_string():
+            nonlocal pos
+            length = read_int()
+            if length < 0 or length > MAX_STRING_LENGTH or pos + length > size:
+                raise PkgFormatError(f"Invalid string length {length} in {self.path}")
+            value = bytes(view[pos:pos + length])
+            pos += length
+            return value
+
+        version = read_string()
+        if not version.startswith(PKG_MAGIC_PREFIX):
+            raise PkgFormatError(f"Not a Wallpaper Engine .pkg file: {self.path}")
+
+        count = read_int()
+        if count < 0:
+            raise PkgFormatError(f"Invalid entry count {count} in {self.path}")
+        table = []
+        for _ in range(count):
+            name = read_string().decode('utf-8').replace("\\", "/")
+            offset = read_int()
+            length = read_int()
+            table.append((name, offset, length))
+
+        data_start = pos
+        entries = {}
+        for name, offset, length in table:
+            start = data_start + offset
+            if offset < 0 or length < 0 or start + length > size:
+                raise PkgFormatError(f"Entry '{name}' lies outside of {self.path}")
+            entries[name] = (start, length)
+        view.release()
+        return version.decode('ascii', errors='replace'), entries
+
+    def entry_view(self, name):
+        """Returns a read-only, zero-copy memoryview of an entry's bytes."""
+        start, length = self.entries[name]
+        return memoryview(self._map)[start:start + length]
+
+    def open(self, name):
+        return PkgEntryReader(self.entry_view(name))
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds an entry view; the mapping closes with the process.
+                pass
+            self._map = None
+        if getattr(self, "_file", None) is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PkgEntryReader(io.RawIOBase):
+    """
+    Binary file object over an entry view, for streaming consumers. It is a proper
+    io.RawIOBase, so it can be wrapped in io.TextIOWrapper or io.BufferedReader.
+    """
+    def __init__(self, view):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        end = min(self._pos + len(buffer), len(self._view))
+        count = end - self._pos
+        buffer[:count] = self._view[self._pos:end]
+        self._pos = end
+        return count
+
+    def read(self, size=-1):
+        # Slices the view directly instead of going through readinto().
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        chunk = self._view[self._pos:end].tobytes()
+        self._pos = end
+        return chunk
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=0):
+        base = {0: 0, 1: self._pos, 2: len(self._view)}[whence]
+        self._pos = max(0, min(base + offset, len(self._view)))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
@@ -0,0 +1,116 @@
+"""
+Lightweight per-stage timing spans for conversions.
+
+A StageTimer records, for each span, wall time, CPU time, bytes read and written
+by the process and its peak RSS so far. Spans go into the conversion log and can
+be exported as a Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+"""
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not recorded.
+    resource = None
+
+PROC_IO_PATH = "/proc/self/io"
+# Files written to an output folder with --profile.
+PROFILE_NAME = "profile.pstats"
+TRACE_NAME = "trace.json"
+
+
+def io_counters(include_self=False):
+    """
+    Returns (bytes_read, bytes_written) for this process, counting every read and
+    write call including cached I/O, or (None, None) where the OS does not expose it.
+    include_self counts this call's own read of /proc, so that the difference to a
+    later call without it measures only the I/O in between.
+    """
+    try:
+        with open(PROC_IO_PATH, 'rb') as f:
+            data = f.read()
+        fields = dict(line.split(b":", 1) for line in data.splitlines() if b":" in line)
+        return int(fields[b"rchar"]) + (len(data) if include_self else 0), int(fields[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of this process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageTimer:
+    """
+    Collects timing spans for one conversion. listener, if given, is called with
+    each span (without its thread id) as soon as the span ends.
+    """
+    def __init__(self, name=None, listener=None):
+        self.name = name
+        self.listener = listener
+        self.spans = []
+        self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, stage):
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        start_read, start_written = io_counters(include_self=True)
+        try:
+            yield
+        finally:
+            end_read, end_written = io_counters()
+            self.spans.append({
+                "stage": stage,
+                "start_seconds": round(start_wall - self._origin, 6),
+                "wall_seconds": round(time.perf_counter() - start_wall, 6),
+                "cpu_seconds": round(time.process_time() - start_cpu, 6),
+                "bytes_read": None if start_read is None else end_read - start_read,
+                "bytes_written": None if start_written is None else end_written - start_written,
+                "peak_rss_bytes": peak_rss_bytes(),
+                "thread": threading.get_ident(),
+            })
+            if self.listener:
+                self.listener(self._public(self.spans[-1]))
+
+    @staticmethod
+    def _public(span):
+        return {key: value for key, value in span.items() if key != "thread"}
+
+    def to_list(self):
+        """Spans for the conversion log, without the thread ids used by the trace."""
+        return [self._public(span) for span in self.spans]
+
+    def chrome_trace(self):
+        """Returns the spans in Chrome's trace event format (complete "X" events)."""
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.name or "converter"}}]
+        for span in self.spans:
+            events.append({
+                "name": span["stage"],
+                "cat": "stage",
+                "ph": "X",
+                "ts": round(span["start_seconds"] * 1e6, 3),
+                "dur": round(span["wall_seconds"] * 1e6, 3),
+                "pid": pid,
+                "tid": span["thread"],
+                "args": {key: span[key] for key in ("cpu_seconds", "bytes_read", "bytes_written", "peak_rss_bytes")},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def span(timer, stage):
+    """timer.span(stage), or a no-op context when timer is None."""
+    return timer.span(stage) if timer is not None else contextlib.nullcontext()
@@ -0,0 +1,307 @@
+"""
+Long-lived conversion service (python -m converter.orchestrator --serve ADDRESS).
+
+Clients connect to a Unix socket, or to HOST:PORT over TCP, and send one JSON
+object per line:
+
+    {"input": "wallpapers/1001", "output": "output/web/1001", "options": {"max_texture": 2048}}
+
+Optional keys are "type", "strict_shaders", "emit_ir" and "options" (keyword
+arguments of process_single_wallpaper, see JOB_OPTIONS). Each job is answered with
+JSON lines:
+- "accepted";
+- "log" (console output);
+- "stage" (each timed stage as it ends, with its wall time only);
+- "assets" (bytes copied so far);
+- finally "result", holding the job's result entries.
+{"command": "ping"} answers with the service's counters.
+
+Jobs run on a thread pool in one process. Imports, shader and mapper registries
+and the index of every wallpaper folder stay warm between jobs, so a small
+wallpaper converts in milliseconds instead of paying interpreter startup.
+
+Because jobs share the process, the CPU time, I/O bytes and peak RSS a StageTimer
+records would include other jobs' work; stage events and result timings only
+carry wall time. Traces written with the "profile" option keep the process-wide
+figures.
+"""
+import collections
+import io
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from converter.orchestrator import process_single_wallpaper
+from converter.vfs import ProjectIndex
+
+# Keyword arguments of process_single_wallpaper a job may set under "options".
+JOB_OPTIONS = {"force", "hash_inputs", "max_texture", "texture_target_size", "atlas_threshold", "ir_cache", "ir_format",
+               "profile", "asset_workers", "optimize", "inline_threshold", "hashed_names"}
+# Span fields that describe one job alone; the rest are process-wide.
+JOB_TIMING_KEYS = ("stage", "start_seconds", "wall_seconds")
+# Wallpaper folders whose index is kept between jobs (least recently used are dropped).
+MAX_CACHED_INDEXES = 64
+
+
+def parse_address(address):
+    """Returns ("tcp", (host, port)) for "HOST:PORT" or ":PORT", else ("unix", path)."""
+    host, _, port = address.rpartition(":")
+    if port.isdigit() and os.sep not in host:
+        return "tcp", (host or "127.0.0.1", int(port))
+    return "unix", address
+
+
+class _JobOutput(io.TextIOBase):
+    """
+    Stands in for sys.stdout while the service runs: print() output from a job's
+    thread becomes "log" events for that job, everything else reaches the console.
+    """
+    def __init__(self, console):
+        self.console = console
+        self._local = threading.local()
+
+    def bind(self, emit):
+        self._local.emit = emit
+        self._local.pending = ""
+
+    def unbind(self):
+        if self._local.pending:
+            self._local.emit({"event": "log", "line": self._local.pending})
+        self._local.emit = None
+
+    def write(self, text):
+        emit = getattr(self._local, "emit", None)
+        if emit is None:
+            return self.console.write(text)
+        lines = (self._local.pending + text).split("\n")
+        self._local.pending = lines.pop()
+        for line in lines:
+            if line:
+                emit({"event": "log", "line": line})
+        return len(text)
+
+    def flush(self):
+        if getattr(self._local, "emit", None) is None:
+            self.console.flush()
+
+
+class ConversionService:
+    """Runs conversion jobs on a pool of worker threads, sharing caches between jobs."""
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.stats = {"jobs": 0, "failed": 0, "warm_indexes": 0}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._indexes = collections.OrderedDict()
+        # Jobs writing to the same output folder run one after another.
+        self._output_locks = collections.defaultdict(threading.Lock)
+        self._output = None
+
+    def start(self):
+        """Routes print() output from job threads to their clients."""
+        if self._output is None:
+            self._output = _JobOutput(sys.stdout)
+            sys.stdout = self._output
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        if self._output is not None:
+            sys.stdout = self._output.console
+            self._output = None
+
+    def _index_for(self, input_path):
+        """Returns a current ProjectIndex for a wallpaper folder, reusing the cached one when unchanged."""
+        if not input_path.is_dir():
+            return input_path
+        key = str(input_path.resolve())
+        with self._lock:
+            cached = self._indexes.pop(key, None)
+        index = cached.refresh() if cached else ProjectIndex(input_path)
+        with self._lock:
+            if index is cached:
+                self.stats["warm_indexes"] += 1
+            self._indexes[key] = index
+            while len(self._indexes) > MAX_CACHED_INDEXES:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _job_args(self, request):
+        if not isinstance(request, dict) or not request.get("input") or not (request.get("output") or request.get("emit_ir")):
+            raise ValueError('A job needs "input" and "output" (or "emit_ir").')
+        options = request.get("options") or {}
+        unknown = set(options) - JOB_OPTIONS
+        if unknown:
+            raise ValueError(f"Unknown option(s): {', '.join(sorted(unknown))}")
+        return {
+            "input_path": Path(request["input"]),
+            "output_base_path": Path(request.get("output") or "."),
+            "forced_type": request.get("type"),
+            "emit_ir_path": request.get("emit_ir"),
+            "strict_shaders": bool(request.get("strict_shaders")),
+            "options": options,
+        }
+
+    @staticmethod
+    def _job_timing(span):
+        return {key: span[key] for key in JOB_TIMING_KEYS if key in span}
+
+    def _execute(self, job, emit):
+        start = time.perf_counter()
+        results = []
+        event = {"event": "result", "results": results}
+
+        def progress(progress_event):
+            if progress_event.get("event") == "stage":
+                progress_event = dict(self._job_timing(progress_event), event="stage")
+            emit(progress_event)
+
+        if self._output:
+            self._output.bind(emit)
+        try:
+            with self._lock:
+                output_lock = self._output_locks[str(job["output_base_path"].resolve())]
+            with output_lock:
+                process_single_wallpaper(self._index_for(job["input_path"]), job["output_base_path"], job["forced_type"],
+                                         job["emit_ir_path"], job["strict_shaders"], results, progress=progress, **job["options"])
+        except Exception as e:
+            event["error"] = str(e)
+        finally:
+            if self._output:
+                self._output.unbind()
+        for entry in results:
+            if "timings" in entry:
+                entry["timings"] = [self._job_timing(span) for span in entry["timings"]]
+        failed = "error" in event or any(entry.get("status") in ("failed", "ir_failed") for entry in results)
+        with self._lock:
+            self.stats["jobs"] += 1
+            self.stats["failed"] += failed
+        event["duration_seconds"] = round(time.perf_counter() - start, 6)
+        emit(event)
+
+    def run(self, request):
+        """Queues one job and yields its events, ending with "result" (or a single "error")."""
+        try:
+            job = self._job_args(request)
+        except ValueError as e:
+            yield {"event": "error", "error": str(e)}
+            return
+        job_id = next(self._ids)
+        events = queue.Queue()
+        self.pool.submit(self._execute, job, events.put)
+        yield {"event": "accepted", "job": job_id}
+        while True:
+            event = events.get()
+            event["job"] = job_id
+            yield event
+            if event["event"] == "result":
+                return
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request per line and streams each job's events back."""
+    def handle(self):
+        service = self.server.service
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            try:
+                request = json.loads(raw)
+            except ValueError as e:
+                self._send({"event": "error", "error": f"Invalid JSON: {e}"})
+                continue
+            if isinstance(request, dict) and request.get("command") == "ping":
+                self._send(dict(service.stats, event="pong"))
+                continue
+            for event in service.run(request):
+                self._send(event)
+
+    def _send(self, event):
+        self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # No Unix sockets on this platform; use HOST:PORT instead.
+    _UnixServer = None
+
+
+def _remove_stale_socket(path):
+    """Removes a socket file left behind by a service that is no longer running."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.remove(path)
+    else:
+        raise OSError(f"A conversion service is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def make_server(address, service):
+    """Binds a server for address (see parse_address) that hands its jobs to service."""
+    kind, target = parse_address(address)
+    if kind == "unix":
+        if _UnixServer is None:
+            raise OSError("Unix sockets are not available on this platform; serve on HOST:PORT instead.")
+        _remove_stale_socket(target)
+        server = _UnixServer(target, _JobHandler)
+    else:
+        server = _TCPServer(target, _JobHandler)
+    server.service = service
+    return server
+
+
+def serve(address, workers=None):
+    """Runs the conversion service on address until interrupted."""
+    service = ConversionService(workers)
+    server = make_server(address, service)
+    print(f"Conversion service listening on {address} with {service.workers} worker(s). Press Ctrl+C to stop.")
+    service.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if parse_address(address)[0] == "unix" and os.path.exists(address):
+            os.remove(address)
+        print("Conversion service stopped.")
+
+
+def submit(address, request, timeout=None):
+    """
+    Sends one job (or command) to a running service and yields its events until the
+    job's "result", or a single "error" or "pong".
+    """
+    kind, target = parse_address(address)
+    family = socket.AF_UNIX if kind == "unix" else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(target)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as lines:
+            for line in lines:
+                event = json.loads(line)
+                yield event
+                if event["event"] in ("result", "error", "pong"):
+                    return
@@ -1,6 +1,10 @@
+import copy
 import json
 import os
 import logging
+import threading
+import time
+from types import MappingProxyType
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -9,66 +13,205 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 SHADER_REGISTRY_PATH = os.path.join(os.path.dirname(__file__), 'registry.json')
 SHADER_TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), 'templates')
 
+# How often (in seconds) the registry re-checks file mtimes for changes.
+REGISTRY_CHECK_INTERVAL = 2.0
+
+
+class Shader:
+    """Represents a shader with its properties. Instances are immutable and shared."""
+    __slots__ = ("name", "uniforms", "template_content")
+
+    def __init__(self, name, uniforms=None, template_content=None):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "uniforms", MappingProxyType(dict(uniforms or {})))
+        object.__setattr__(self, "template_content", template_content)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"Shader '{self.name}' is immutable")
+
+    def __repr__(self):
+        return f"Shader(name={self.name!r}, known={self.is_known()})"
+
+    def is_known(self):
+        """Checks if the shader is a known and mapped shader."""
+        return self.template_content is not None
+
+
+class ShaderRegistry:
+    """
+    Process-wide shader registry.
+
+    Loads registry.json and pre-indexes every template once, then serves lookups
+    from memory. Each registry directory holds a registry.json and a templates/
+    folder; directories registered later override shaders of the same name. The
+    files are re-read only when one of their mtimes changes.
+    """
+    def __init__(self, directories=None, check_interval=REGISTRY_CHECK_INTERVAL):
+        self.directories = list(directories or [])
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._mtimes = None
+        self._last_check = 0.0
+        self._shaders_info = {}
+        self._templates = {}
+        self._templates_by_file = {}
+        self._shaders = {}
+        self._fallbacks = {}
+
+    def register_directory(self, directory):
+        """Adds a directory with its own registry.json and templates/ folder."""
+        with self._lock:
+            directory = os.path.abspath(directory)
+            if directory not in self.directories:
+                self.directories.append(directory)
+                self._mtimes = None
+
+    def _watched_files(self):
+        for directory in self.directories:
+            yield os.path.join(directory, 'registry.json')
+            templates_dir = os.path.join(directory, 'templates')
+            if os.path.isdir(templates_dir):
+                yield templates_dir
+                for name in os.listdir(templates_dir):
+                    yield os.path.join(templates_dir, name)
+
+    def _current_mtimes(self):
+        mtimes = {}
+        for path in self._watched_files():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _load(self, mtimes):
+        shaders_info = {}
+        templates = {}
+        templates_by_file = {}
+        for directory in self.directories:
+            # Pre-index every template in the directory, so lookups never touch the disk.
+            templates_dir = os.path.join(directory, 'templates')
+            directory_templates = {}
+            if os.path.isdir(templates_dir):
+                for template_name in os.listdir(templates_dir):
+                    template_path = os.path.join(templates_dir, template_name)
+                    if os.path.isfile(template_path):
+                        with open(template_path, 'r') as f:
+                            directory_templates[template_name] = f.read()
+            templates_by_file.update(directory_templates)
+
+            registry_path = os.path.join(directory, 'registry.json')
+            if not os.path.exists(registry_path):
+                logging.error("Shader registry not found at %s", registry_path)
+                continue
+            with open(registry_path, 'r') as f:
+                registry = json.load(f)
+            for shader_name, info in registry.get("shaders", {}).items():
+                shaders_info[shader_name] = info
+                templates.pop(shader_name, None)
+                if info.get("template") in directory_templates:
+                    templates[shader_name] = directory_templates[info["template"]]
+
+        self._shaders_info = shaders_info
+        self._templates = templates
+        self._templates_by_file = templates_by_file
+        self._shaders = {}
+        self._fallbacks = {}
+        self._mtimes = mtimes
+
+    def refresh(self, force=False):
+        """Reloads the registry if any watched file changed (or always, with force=True)."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._mtimes is not None and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            mtimes = self._current_mtimes()
+            if force or mtimes != self._mtimes:
+                self._load(mtimes)
+
+    def data(self):
+        """Returns a copy of the merged registry in the registry.json layout."""
+        self.refresh()
+        return {"shaders": copy.deepcopy(self._shaders_info)}
+
+    def info(self, shader_name):
+        """Returns a copy of a shader's registry entry, so callers cannot alter the cache."""
+        self.refresh()
+        return copy.deepcopy(self._shaders_info.get(shader_name))
+
+    def template(self, shader_name):
+        self.refresh()
+        return self._templates.get(shader_name)
+
+    def template_by_file(self, template_name):
+        """Looks up a template by file name; later directories win."""
+        self.refresh()
+        return self._templates_by_file.get(template_name)
+
+    def shader(self, shader_name):
+        """Returns the shared Shader instance for a known shader, or None."""
+        self.refresh()
+        with self._lock:
+            if shader_name not in self._shaders:
+                info = self._shaders_info.get(shader_name)
+                template_content = self._templates.get(shader_name)
+                if not info or template_content is None:
+                    return None
+                self._shaders[shader_name] = Shader(shader_name, info.get("uniforms"), template_content)
+            return self._shaders[shader_name]
+
+    def fallback(self, shader_name):
+        """Returns the shared placeholder Shader for an unknown shader name."""
+        with self._lock:
+            if shader_name not in self._fallbacks:
+                self._fallbacks[shader_name] = Shader(name=shader_name)
+            return self._fallbacks[shader_name]
+
+
+registry = ShaderRegistry([os.path.dirname(SHADER_REGISTRY_PATH)])
+
+
+def register_shader_directory(directory):
+    """Registers an extra directory of shaders (registry.json + templates/) with the shared registry."""
+    registry.register_directory(directory)
+
+
 def load_shader_registry():
-    """Loads the shader registry from the JSON file."""
-    if not os.path.exists(SHADER_REGISTRY_PATH):
-        logging.error("Shader registry not found at %s", SHADER_REGISTRY_PATH)
-        return {}
-    with open(SHADER_REGISTRY_PATH, 'r') as f:
-        return json.load(f)
+    """Returns the shader registry, loaded once and cached until its files change."""
+    return registry.data()
 
 def get_shader_template(template_name):
     """
-    Reads and returns the content of a shader template.
+    Returns the content of a shader template.
     Returns None if the template is not found.
     """
-    template_path = os.path.join(SHADER_TEMPLATES_DIR, template_name)
-    if not os.path.exists(template_path):
+    template_content = registry.template_by_file(template_name)
+    if template_content is None:
         logging.error("Shader template not found: %s", template_name)
-        return None
-    with open(template_path, 'r') as f:
-        return f.read()
+    return template_content
 
 def get_shader_info(shader_name):
     """
     Retrieves shader information from the registry.
     Returns None if the shader is not found.
     """
-    registry = load_shader_registry()
-    return registry.get("shaders", {}).get(shader_name)
-
-class Shader:
-    """Represents a shader with its properties."""
-    def __init__(self, name, uniforms=None, template_content=None):
-        self.name = name
-        self.uniforms = uniforms or {}
-        self.template_content = template_content
-
-    def is_known(self):
-        """Checks if the shader is a known and mapped shader."""
-        return self.template_content is not None
+    return registry.info(shader_name)
 
 def get_shader(shader_name, use_fallback=True):
     """
-    Factory function to create a Shader object.
-    
-    If the shader is known, it loads its template and uniform mappings.
+    Factory function returning a shared, immutable Shader object.
+
+    If the shader is known, it carries its template and uniform mappings.
     If the shader is unknown, it either returns a fallback shader or None.
     """
-    shader_info = get_shader_info(shader_name)
-    
-    if shader_info:
-        template_content = get_shader_template(shader_info["template"])
-        if template_content:
-            return Shader(
-                name=shader_name,
-                uniforms=shader_info["uniforms"],
-                template_content=template_content
-            )
+    shader = registry.shader(shader_name)
+    if shader:
+        return shader
 
     # Fallback for unknown shaders
     if use_fallback:
         logging.warning("Unknown shader '%s'. Using fallback.", shader_name)
-        return Shader(name=shader_name)  # Creates a placeholder for an unknown shader
+        return registry.fallback(shader_name)  # Creates a placeholder for an unknown shader
 
-    return None
\ No newline at end of file
+    return None
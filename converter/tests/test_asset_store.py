@@ -0,0 +1,133 @@
+import unittest
+import json
+import os
+import shutil
+from pathlib import Path
+from converter.asset_store import AssetStore, hash_file, HASHED_NAME_LENGTH
+from converter.generator_scene import SceneGenerator
+
+class TestAssetStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_asset_store_dir")
+        self.source_dir = self.test_dir / "source"
+        self.assets_dir = self.test_dir / "assets"
+        (self.source_dir / "a").mkdir(parents=True, exist_ok=True)
+        (self.source_dir / "b").mkdir(parents=True, exist_ok=True)
+        self.assets_dir.mkdir(parents=True, exist_ok=True)
+
+        (self.source_dir / "a" / "texture.png").write_bytes(b"same bytes")
+        (self.source_dir / "b" / "copy_of_texture.png").write_bytes(b"same bytes")
+        (self.source_dir / "b" / "texture.png").write_bytes(b"different bytes")
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_identical_content_is_stored_once(self):
+        store = AssetStore(str(self.assets_dir))
+        first = store.add(str(self.source_dir / "a" / "texture.png"))
+        second = store.add(str(self.source_dir / "b" / "copy_of_texture.png"))
+
+        self.assertEqual(first, "texture.png")
+        self.assertEqual(second, first)
+        self.assertEqual(os.listdir(self.assets_dir), ["texture.png"])
+        self.assertEqual(store.stats["unique_blobs"], 1)
+        self.assertEqual(store.stats["bytes_deduplicated"], len(b"same bytes"))
+
+    def test_basename_collision_does_not_overwrite(self):
+        store = AssetStore(str(self.assets_dir))
+        first = store.add(str(self.source_dir / "a" / "texture.png"))
+        second = store.add(str(self.source_dir / "b" / "texture.png"))
+
+        self.assertNotEqual(first, second)
+        content_hash = hash_file(str(self.source_dir / "b" / "texture.png"))
+        self.assertEqual(second, f"texture-{content_hash[:12]}.png")
+        self.assertEqual((self.assets_dir / first).read_bytes(), b"same bytes")
+        self.assertEqual((self.assets_dir / second).read_bytes(), b"different bytes")
+
+    def test_hardlink_mode(self):
+        store = AssetStore(str(self.assets_dir), hardlink=True)
+        name = store.add(str(self.source_dir / "a" / "texture.png"))
+        self.assertEqual((self.assets_dir / name).read_bytes(), b"same bytes")
+        self.assertEqual(sum(store.stats["methods"].values()), 1)
+
+    def test_generator_rewrites_ir_to_deduplicated_paths(self):
+        ir_path = self.test_dir / "ir.json"
+        output_dir = self.test_dir / "output"
+        with open(ir_path, "w") as f:
+            json.dump({"scene": {"layers": [
+                {"name": "one", "source": "a/texture.png"},
+                {"name": "two", "source": "b/copy_of_texture.png"},
+                {"name": "three", "source": "b/texture.png"},
+            ]}}, f)
+
+        generator = SceneGenerator(str(ir_path), str(output_dir), source_dir=str(self.source_dir))
+        generator._copy_assets()
+
+        sources = [layer["source"] for layer in generator.ir["scene"]["layers"]]
+        self.assertEqual(sources[0], "./assets/texture.png")
+        self.assertEqual(sources[1], sources[0])
+        self.assertNotEqual(sources[2], sources[0])
+        self.assertEqual(len(os.listdir(output_dir / "assets")), 2)
+
+    def test_concurrent_copy_is_deterministic(self):
+        for index in range(20):
+            (self.source_dir / "a" / f"layer{index}.png").write_bytes(b"layer %d" % index)
+        layers = [{"source": "b/texture.png"}, {"source": "a/texture.png"}, {"source": "b/copy_of_texture.png"}]
+        layers += [{"source": f"a/layer{index}.png"} for index in range(20)]
+
+        outputs = []
+        for workers in (1, 8):
+            output_dir = self.test_dir / f"output{workers}"
+            progress = []
+            generator = SceneGenerator({"scene": {"layers": [dict(layer) for layer in layers]}}, str(output_dir),
+                                       source_dir=str(self.source_dir), asset_workers=workers,
+                                       progress=lambda done, total: progress.append((done, total)))
+            generator._copy_assets()
+            outputs.append(generator.ir)
+
+            total = sum(len(f.read_bytes()) for f in (output_dir / "assets").iterdir())
+            self.assertEqual(len(progress), 22)
+            self.assertEqual(progress[-1], (total, total))
+            self.assertEqual(sorted(progress), progress)
+
+        self.assertEqual(outputs[0], outputs[1])
+        sources = [layer["source"] for layer in outputs[1]["scene"]["layers"]]
+        # Names follow IR order: the first texture.png keeps the plain name.
+        self.assertEqual(sources[0], "./assets/texture.png")
+        self.assertEqual(sources[1], sources[2])
+        self.assertEqual((self.test_dir / "output8" / "assets" / "texture.png").read_bytes(), b"different bytes")
+
+    def test_hashed_names_and_manifest(self):
+        layers = [{"name": "one", "source": "a/texture.png"}, {"name": "two", "source": "b/texture.png"}]
+        output_dir = self.test_dir / "output"
+        generator = SceneGenerator({"name": "Hashed", "scene": {"layers": [dict(layer) for layer in layers]}}, str(output_dir),
+                                   source_dir=str(self.source_dir), write_debug_json=False, hashed_names=True)
+        generator.generate()
+
+        first = hash_file(str(self.source_dir / "a" / "texture.png"))
+        second = hash_file(str(self.source_dir / "b" / "texture.png"))
+        # The second texture.png keeps its usual collision name as its logical name.
+        collision = f"texture-{second[:12]}.png"
+        with open(output_dir / "asset-manifest.json") as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["assets/texture.png"], f"assets/texture.{first[:HASHED_NAME_LENGTH]}.png")
+        self.assertEqual(manifest[f"assets/{collision}"], f"assets/texture.{second[:HASHED_NAME_LENGTH]}.png")
+        script = manifest["script.js"]
+        self.assertRegex(script, r"^script\.[0-9a-f]{16}\.js$")
+        self.assertIn(f'src="./{script}"', (output_dir / "index.html").read_text())
+        self.assertIn(f"./assets/texture.{first[:HASHED_NAME_LENGTH]}.png", (output_dir / script).read_text())
+        self.assertFalse((output_dir / "script.js").exists())
+
+        # A plain rebuild over the hashed one drops the hashed files and the manifest.
+        previous = generator.asset_store.entries
+        generator = SceneGenerator({"scene": {"layers": [dict(layer) for layer in layers]}}, str(output_dir),
+                                   source_dir=str(self.source_dir), write_debug_json=False, previous_assets=previous)
+        generator.generate()
+        self.assertEqual(generator.asset_store.stats["files_reused"], 0)
+        self.assertEqual(sorted(os.listdir(output_dir / "assets")), [collision, "texture.png"])
+        self.assertEqual(sorted(os.listdir(output_dir)), ["assets", "index.html", "readme.md", "script.js"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import json
+import os
+import shutil
+from pathlib import Path
+from converter.atlas import MaxRectsPacker, decode_png, pack_sprites, spritesheet_json
+from converter.textures import encode_png
+from converter.generator_scene import SceneGenerator
+from converter.validator import check_output
+
+def solid(width, height, value):
+    return bytes([value, value, value, 255]) * (width * height)
+
+class TestAtlas(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_atlas_dir")
+        (self.test_dir / "source").mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_packer_places_without_overlap(self):
+        packer = MaxRectsPacker(64, 64)
+        placed = []
+        for width, height in [(32, 32), (32, 16), (16, 16), (16, 48), (30, 10)]:
+            x, y = packer.insert(width, height)
+            self.assertLessEqual(x + width, 64)
+            self.assertLessEqual(y + height, 64)
+            for ox, oy, ow, oh in placed:
+                self.assertTrue(x >= ox + ow or x + width <= ox or y >= oy + oh or y + height <= oy)
+            placed.append((x, y, width, height))
+        self.assertIsNone(packer.insert(65, 1))
+
+    def test_decode_png_round_trip(self):
+        rgba = bytes(range(4 * 3 * 2 * 4))[:3 * 2 * 4]
+        self.assertEqual(decode_png(encode_png(3, 2, rgba)), (3, 2, rgba))
+        self.assertIsNone(decode_png(b"not a png"))
+
+    def test_pack_sprites_blits_frames(self):
+        sprites = [("a", 4, 4, solid(4, 4, 10)), ("b", 2, 3, solid(2, 3, 20)), ("c", 5, 1, solid(5, 1, 30))]
+        pages = pack_sprites(sprites, page_size=16, padding=1)
+        self.assertEqual(len(pages), 1)
+        page = pages[0]
+        for key, width, height, rgba in sprites:
+            x, y, w, h = page["frames"][key]
+            self.assertEqual((w, h), (width, height))
+            for row in range(h):
+                offset = ((y + row) * page["width"] + x) * 4
+                self.assertEqual(page["rgba"][offset:offset + w * 4], rgba[row * w * 4:(row + 1) * w * 4])
+
+        data = spritesheet_json(page, "atlas-0.png")
+        self.assertEqual(data["meta"]["image"], "atlas-0.png")
+        self.assertEqual(data["frames"]["b"]["frame"]["w"], 2)
+
+    def test_pack_sprites_spills_to_new_page(self):
+        sprites = [(str(i), 8, 8, solid(8, 8, i)) for i in range(3)]
+        self.assertEqual(len(pack_sprites(sprites, page_size=16, padding=0)), 1)
+        self.assertEqual(len(pack_sprites(sprites, page_size=10, padding=0)), 3)
+
+    def test_generator_packs_small_layers(self):
+        (self.test_dir / "source" / "star.png").write_bytes(encode_png(8, 8, solid(8, 8, 200)))
+        (self.test_dir / "source" / "moon.png").write_bytes(encode_png(16, 12, solid(16, 12, 100)))
+        (self.test_dir / "source" / "sky.png").write_bytes(encode_png(64, 64, solid(64, 64, 50)))
+        ir_path = self.test_dir / "ir.json"
+        with open(ir_path, "w") as f:
+            json.dump({"scene": {"layers": [{"source": name} for name in ("star.png", "moon.png", "sky.png")]}}, f)
+
+        out_dir = self.test_dir / "out"
+        generator = SceneGenerator(str(ir_path), str(out_dir), source_dir=str(self.test_dir / "source"), atlas_threshold=32)
+        generator.generate()
+
+        self.assertEqual(generator.atlas_pages, ["./assets/atlas-0.json"])
+        with open(out_dir / "assets" / "atlas-0.json") as f:
+            frames = json.load(f)["frames"]
+        self.assertEqual(set(frames), {"./assets/star.png", "./assets/moon.png"})
+        self.assertEqual(sorted(os.listdir(out_dir / "assets")), ["atlas-0.json", "atlas-0.png", "sky.png"])
+
+        script = (out_dir / "script.js").read_text()
+        self.assertIn('const atlasPages = ["./assets/atlas-0.json"]', script)
+        self.assertIn('const assets = ["./assets/sky.png"]', script)
+        # Layers name packed images by their frame, which the validator accepts.
+        self.assertIn('"src": "./assets/star.png"', script)
+        self.assertEqual(check_output(out_dir).missing, [])
+
+    def test_atlas_pages_leave_user_assets_alone(self):
+        (self.test_dir / "source" / "star.png").write_bytes(encode_png(8, 8, solid(8, 8, 200)))
+        (self.test_dir / "source" / "moon.png").write_bytes(encode_png(16, 12, solid(16, 12, 100)))
+        (self.test_dir / "source" / "atlas-map.png").write_bytes(encode_png(64, 64, solid(64, 64, 50)))
+        (self.test_dir / "source" / "atlas-0.png").write_bytes(encode_png(48, 48, solid(48, 48, 70)))
+        ir_path = self.test_dir / "ir.json"
+        with open(ir_path, "w") as f:
+            json.dump({"scene": {"layers": [{"source": name} for name in ("star.png", "moon.png", "atlas-map.png", "atlas-0.png")]}}, f)
+
+        out_dir = self.test_dir / "out"
+        generator = SceneGenerator(str(ir_path), str(out_dir), source_dir=str(self.test_dir / "source"), atlas_threshold=32)
+        generator.generate()
+        assets = sorted(os.listdir(out_dir / "assets"))
+        self.assertIn("atlas-map.png", assets)
+        self.assertIn("atlas-0.png", assets)
+        self.assertEqual(len(generator.atlas_pages), 1)
+        # The page is named around the user's atlas-0.png instead of overwriting it.
+        with open(out_dir / "assets" / "atlas-0.json") as f:
+            self.assertNotEqual(json.load(f)["meta"]["image"], "atlas-0.png")
+        self.assertEqual((out_dir / "assets" / "atlas-0.png").read_bytes(), (self.test_dir / "source" / "atlas-0.png").read_bytes())
+        self.assertNotIn("star.png", {entry["name"] for entry in generator.asset_store.entries.values()})
+
+        # An incremental run re-copies the packed sprites and prunes nothing it still needs.
+        again = SceneGenerator(str(ir_path), str(out_dir), source_dir=str(self.test_dir / "source"), atlas_threshold=32,
+                               previous_assets=generator.asset_store.entries)
+        again.generate()
+        self.assertEqual(sorted(os.listdir(out_dir / "assets")), assets)
+        self.assertEqual(check_output(out_dir).missing, [])
+
+        # Without the atlas, the earlier pages are removed as unused.
+        plain = SceneGenerator(str(ir_path), str(out_dir), source_dir=str(self.test_dir / "source"),
+                               previous_assets=again.asset_store.entries)
+        plain.generate()
+        self.assertEqual(sorted(os.listdir(out_dir / "assets")), ["atlas-0.png", "atlas-map.png", "moon.png", "star.png"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import json
+import shutil
+from pathlib import Path
+from converter.benchmarks.corpus import make_wallpaper
+from converter.benchmarks.runner import STAGES, compare, run_suite, scale_cases
+from converter.parser import parse_project_to_ir
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_benchmarks_dir")
+        self.test_dir.mkdir(exist_ok=True)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_synthetic_wallpaper_parses(self):
+        make_wallpaper(self.test_dir / "wallpaper", layers=6, assets=2, asset_size=8, effects=3, particles=2)
+        ir = parse_project_to_ir(self.test_dir / "wallpaper")
+        self.assertEqual(len(ir["scene"]["layers"]), 6)
+        self.assertEqual(len(ir["scene"]["effects"]), 3)
+        self.assertEqual(len(ir["scene"]["particles"]), 2)
+        self.assertEqual(len(list((self.test_dir / "wallpaper" / "materials").iterdir())), 2)
+
+    def test_run_suite_times_every_stage(self):
+        document = run_suite({"tiny": {"layers": 3, "assets": 2, "asset_size": 8}}, repeat=1, work_dir=str(self.test_dir))
+        stages = document["cases"]["tiny"]["stages"]
+        self.assertEqual(set(stages), set(STAGES))
+        self.assertTrue(all(timing["runs"] == 1 for timing in stages.values()))
+        json.dumps(document)
+
+    def test_compare_flags_regressions(self):
+        def document(seconds):
+            return {"cases": {"case": {"params": {"layers": 1}, "stages": {
+                "parse": {"median": seconds}, "detect": {"median": 0.0001 * seconds / 0.1}}}}}
+        regressions = compare(document(0.1), document(0.15), threshold=0.2)
+        self.assertEqual([(r["case"], r["stage"], r["ratio"]) for r in regressions], [("case", "parse", 1.5)])
+        self.assertEqual(compare(document(0.1), document(0.11), threshold=0.2), [])
+
+    def test_scale_cases(self):
+        cases = scale_cases("layers=10,100")
+        self.assertEqual(list(cases), ["layers=10", "layers=100"])
+        self.assertEqual(cases["layers=100"]["layers"], 100)
+        with self.assertRaises(ValueError):
+            scale_cases("colour=1")
+
+if __name__ == '__main__':
+    unittest.main()
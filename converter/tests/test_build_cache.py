@@ -0,0 +1,75 @@
+import unittest
+import json
+import os
+import shutil
+from pathlib import Path
+from converter.build_cache import BuildManifest, fingerprint_tree
+from converter.orchestrator import process_single_wallpaper
+
+class TestBuildCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_build_cache_dir")
+        self.input_dir = self.test_dir / "input"
+        self.output_dir = self.test_dir / "output"
+        (self.input_dir / "materials").mkdir(parents=True, exist_ok=True)
+        (self.input_dir / "materials" / "bg.png").write_bytes(b"background")
+        with open(self.input_dir / "scene.json", "w") as f:
+            json.dump({"layers": [{"name": "bg", "type": "image", "file": "materials/bg.png"}]}, f)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _convert(self, **options):
+        results = []
+        process_single_wallpaper(self.input_dir, self.output_dir, None, None, False, results, **options)
+        self.assertEqual(len(results), 1)
+        return results[0]
+
+    def test_fingerprint_tree(self):
+        fingerprints = fingerprint_tree(str(self.input_dir), with_hash=True)
+        self.assertEqual(set(fingerprints), {"scene.json", "materials/bg.png"})
+        self.assertEqual(fingerprints["materials/bg.png"]["size"], len(b"background"))
+        self.assertIn("sha256", fingerprints["materials/bg.png"])
+
+    def test_manifest_freshness(self):
+        self.output_dir.mkdir(parents=True)
+        (self.output_dir / "index.html").write_text("<html></html>")
+        manifest = BuildManifest(self.output_dir)
+        inputs = manifest.fingerprint_inputs(str(self.input_dir))
+        manifest.record("stage", inputs, ["index.html"], {"opt": 1})
+        manifest.save()
+
+        manifest = BuildManifest(self.output_dir)
+        self.assertTrue(manifest.is_fresh("stage", inputs, {"opt": 1}))
+        self.assertFalse(manifest.is_fresh("stage", inputs, {"opt": 2}))
+        self.assertFalse(BuildManifest(self.output_dir, force=True).is_fresh("stage", inputs, {"opt": 1}))
+
+        os.remove(self.output_dir / "index.html")
+        self.assertFalse(manifest.is_fresh("stage", inputs, {"opt": 1}))
+
+    def test_unchanged_rebuild_is_skipped(self):
+        first = self._convert()
+        self.assertNotIn("cached", first)
+        self.assertTrue((self.output_dir / "assets" / "bg.png").is_file())
+
+        second = self._convert()
+        self.assertTrue(second.get("cached"))
+        self.assertEqual(second["status"], first["status"])
+
+        forced = self._convert(force=True)
+        self.assertNotIn("cached", forced)
+
+    def test_changed_scene_reuses_assets(self):
+        self._convert()
+        with open(self.input_dir / "scene.json", "w") as f:
+            json.dump({"layers": [{"name": "background", "type": "image", "file": "materials/bg.png"}]}, f)
+
+        result = self._convert()
+        self.assertNotIn("cached", result)
+        self.assertEqual(result["assets"]["files_reused"], 1)
+        self.assertEqual(result["assets"]["bytes_written"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from converter.effect_chain import IDENTITY_MATRIX, compile_effects, effect_type, multiply_color_matrices, optimize_chain
+
+HALF_RED = [0.5, 0, 0, 0, 0.1,
+            0, 1, 0, 0, 0,
+            0, 0, 1, 0, 0,
+            0, 0, 0, 1, 0]
+
+class TestEffectChain(unittest.TestCase):
+
+    def _stats(self):
+        return {"merged": 0, "dropped": 0, "fused": 0}
+
+    def test_multiply_color_matrices(self):
+        self.assertEqual(multiply_color_matrices(IDENTITY_MATRIX, HALF_RED), HALF_RED)
+        # r' = 0.5 * (0.5 * r + 0.1) + 0.1
+        product = multiply_color_matrices(HALF_RED, HALF_RED)
+        self.assertAlmostEqual(product[0], 0.25)
+        self.assertAlmostEqual(product[4], 0.15)
+
+    def test_matrices_merge_across_dropped_identities(self):
+        stats = self._stats()
+        chain = optimize_chain([
+            {"filter": "ColorMatrixFilter", "settings": {"matrix": HALF_RED}},
+            {"filter": "BlurFilter", "settings": {"strength": 0}},
+            {"filter": "ColorMatrixFilter", "settings": {"matrix": [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]}},
+            {"filter": "ColorMatrixFilter", "settings": {"matrix": HALF_RED}},
+            {"filter": "BlurFilter", "settings": {"strength": 4}},
+        ], {}, stats)
+        self.assertEqual([spec["filter"] for spec in chain], ["ColorMatrixFilter", "BlurFilter"])
+        self.assertAlmostEqual(chain[0]["settings"]["matrix"][0], 0.25)
+        self.assertEqual(stats, {"merged": 1, "dropped": 2, "fused": 0})
+
+    def test_layer_effects_are_compiled_and_fused(self):
+        ir = {"scene": {"layers": [{"name": "bg", "type": "image", "source": "./assets/bg.png"},
+                                   {"name": "plain", "type": "image", "source": "./assets/plain.png"}],
+                        "effects": [
+                            {"name": "colorGrading", "matrix": HALF_RED, "layer": "bg"},
+                            {"file": "effects/waterripple/effect.json", "settings": {"scale": 50}, "layer": "bg"},
+                            {"name": "colorGrading", "matrix": HALF_RED, "layer": "bg"},
+                            {"type": "scroll", "layer": "bg"},
+                            {"name": "blurprecise", "layer": "bg"},
+                            {"name": "sparkle", "layer": "bg"},
+                        ]}}
+        stats = compile_effects(ir)
+        bg, plain = ir["scene"]["layers"]
+        self.assertNotIn("filters", plain)
+        self.assertEqual([spec["filter"] for spec in bg["filters"]], ["ShaderFilter", "BlurFilter"])
+        self.assertNotIn("animations", bg)
+        self.assertEqual(stats["animations"], 1)
+        self.assertEqual((stats["passes_before"], stats["passes_after"]), (4, 2))
+        self.assertEqual(stats["unmapped"], ["sparkle"])
+
+        settings = bg["filters"][0]["settings"]
+        self.assertEqual(settings["fused"], ["ColorMatrixFilter", "DisplacementFilter", "ColorMatrixFilter"])
+        # Both matrices end up in one column-major mat4 plus offsets.
+        self.assertAlmostEqual(settings["uniforms"]["u_matrix"][0], 0.25)
+        self.assertAlmostEqual(settings["uniforms"]["u_offset"][0], 0.15)
+        shader = ir["scene"]["effect_shaders"][settings["shader"]]
+        self.assertEqual(shader.count("texture2D(uSampler"), 1)
+        self.assertIn("uniform mat4 u_matrix;", shader)
+
+    def test_effect_type_matches_wallpaper_engine_folders(self):
+        self.assertEqual(effect_type({"file": "effects/waterripple/effect.json"}), "waterRipple")
+        self.assertEqual(effect_type({"file": "effects\\colorgrading\\effect.json"}), "colorGrading")
+        self.assertEqual(effect_type({"type": "FoliageSway"}), "foliageSway")
+        self.assertEqual(effect_type({"name": "Ripples", "file": "effects/waterflow/effect.json"}), "waterFlow")
+        self.assertEqual(effect_type({"name": "sparkle"}), "sparkle")
+        self.assertEqual(effect_type({}), "unknown")
+
+if __name__ == '__main__':
+    unittest.main()
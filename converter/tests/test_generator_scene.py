@@ -0,0 +1,65 @@
+import unittest
+import shutil
+from pathlib import Path
+from converter.generator_scene import SceneGenerator
+
+class TestSceneRuntime(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_generator_scene_dir")
+        self.test_dir.mkdir(exist_ok=True)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _script(self, ir):
+        generator = SceneGenerator(ir, str(self.test_dir / "out"))
+        generator._generate_js()
+        return generator, (self.test_dir / "out" / "script.js").read_text()
+
+    def test_runtime_layers_come_from_the_scene(self):
+        generator, script = self._script({"scene": {"layers": [
+            {"name": "sky", "type": "image", "source": "./assets/sky.png"},
+            {"name": "hills", "type": "image", "source": "./assets/hills.png", "depth": 2},
+            {"name": "intro", "type": "video", "source": "./assets/intro.mp4"},
+            {"name": "missing", "type": "image", "source": "missing.png"},
+        ]}, "layers": [{"file": "./assets/legacy.png", "depth": 1}]})
+
+        self.assertEqual(generator._runtime_layers(), [
+            {"name": "sky", "src": "./assets/sky.png", "depth": 0},
+            {"name": "hills", "src": "./assets/hills.png", "depth": 2},
+            {"name": None, "src": "./assets/legacy.png", "depth": 1},
+        ])
+        self.assertIn('"src": "./assets/hills.png"', script)
+
+    def test_parallax_runs_per_frame_and_idles(self):
+        _, script = self._script({"scene": {"layers": []}})
+        # Pointer events only store the target; nothing walks app.stage.children per event.
+        self.assertNotIn("app.stage.children.forEach", script)
+        self.assertIn("parallax.targetX = e.clientX", script)
+        self.assertIn("if (!busy) app.ticker.stop();", script)
+        self.assertIn("visibilitychange", script)
+
+    def test_widgets_come_from_ui_entries(self):
+        generator, script = self._script({"scene": {
+            "layers": [],
+            "audio": [{"name": "Music", "source": "./assets/music.mp3"}],
+            "ui": {
+                "Clock": {"type": "clock", "format": "24h"},
+                "Bars": {"type": "audio_bars", "bars": 16},
+                "Hidden": {"type": "date", "visible": False},
+                "Slider": {"type": "slider"},
+            },
+        }})
+        self.assertEqual(generator._runtime_widgets(), [
+            {"type": "clock", "format": "24h", "name": "Clock"},
+            {"type": "audio", "bars": 16, "name": "Bars"},
+        ])
+        self.assertIn('const audioSources = ["./assets/music.mp3"]', script)
+        # Text is only reassigned when the formatted value changes, never per frame.
+        self.assertIn("if (value !== text.text)", script)
+        self.assertEqual(script.count("getByteFrequencyData"), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import io
+import json
+import shutil
+import struct
+from pathlib import Path
+from converter import images
+from converter.images import variant_sizes, read_image_size
+from converter.textures import encode_png, TEX_FORMAT_RGBA8888
+from converter.generator_scene import SceneGenerator
+from converter.tests.test_textures import build_tex
+
+class TestImages(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_images_dir")
+        (self.test_dir / "source").mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _generator(self, sources, max_texture):
+        ir_path = self.test_dir / "ir.json"
+        with open(ir_path, "w") as f:
+            json.dump({"scene": {"layers": [{"source": source} for source in sources]}}, f)
+        generator = SceneGenerator(str(ir_path), str(self.test_dir / "out"), source_dir=str(self.test_dir / "source"), max_texture=max_texture)
+        generator._copy_assets()
+        return generator
+
+    def test_variant_sizes(self):
+        self.assertEqual(variant_sizes(2048), [2048, 1024, 512])
+        self.assertEqual(variant_sizes(300), [300])
+        self.assertEqual(variant_sizes(100), [100])
+
+    def test_read_image_size(self):
+        png = encode_png(3, 2, bytes(24))
+        self.assertEqual(read_image_size(io.BytesIO(png)), (3, 2))
+
+        # SOI, an APP0 segment, then SOF0 with height 480 and width 640
+        jpeg = b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 6) + b"JFIF" + b"\xff\xc0" + struct.pack(">HBHH", 11, 8, 480, 640) + b"\x03"
+        self.assertEqual(read_image_size(io.BytesIO(jpeg)), (640, 480))
+        self.assertIsNone(read_image_size(io.BytesIO(b"not an image at all......")))
+
+    def test_tex_variants_come_from_mipmaps(self):
+        mips = [(1024, 1024, bytes(1024 * 1024 * 4)), (512, 512, bytes(512 * 512 * 4)), (256, 256, bytes(256 * 256 * 4))]
+        (self.test_dir / "source" / "sky.tex").write_bytes(build_tex(TEX_FORMAT_RGBA8888, mips))
+
+        generator = self._generator(["sky.tex"], 512)
+        primary = generator.ir["scene"]["layers"][0]["source"]
+        self.assertEqual(primary, "./assets/sky@512.png")
+        self.assertEqual(generator.asset_variants[primary], [
+            {"width": 256, "src": "./assets/sky@256.png"},
+            {"width": 512, "src": "./assets/sky@512.png"},
+        ])
+
+    def test_small_image_is_kept_as_is(self):
+        (self.test_dir / "source" / "icon.png").write_bytes(encode_png(4, 4, bytes(64)))
+        generator = self._generator(["icon.png"], 2048)
+        self.assertEqual(generator.ir["scene"]["layers"][0]["source"], "./assets/icon.png")
+        self.assertEqual(generator.asset_variants, {})
+
+    @unittest.skipIf(images.Image is None, "Pillow is not installed")
+    def test_large_png_is_downscaled(self):
+        (self.test_dir / "source" / "bg.png").write_bytes(encode_png(1200, 600, bytes(1200 * 600 * 4)))
+        generator = self._generator(["bg.png"], 1024)
+        primary = generator.ir["scene"]["layers"][0]["source"]
+        self.assertEqual(primary, "./assets/bg@1024.png")
+        self.assertEqual([v["width"] for v in generator.asset_variants[primary]], [256, 512, 1024])
+        with open(self.test_dir / "out" / "assets" / "bg@1024.png", "rb") as f:
+            self.assertEqual(read_image_size(f), (1024, 512))
+
+        generator._generate_js()
+        with open(self.test_dir / "out" / "script.js") as f:
+            script = f.read()
+        self.assertIn("resolveAsset", script)
+        self.assertIn("./assets/bg@512.png", script)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import json
+import shutil
+from pathlib import Path
+from converter.ir_binary import BinaryIR, IRFormatError, decode_ir, encode_ir, read_ir, write_ir
+from converter.orchestrator import process_single_wallpaper
+
+IR = {
+    "version": "1.0",
+    "scene": {
+        "layers": [
+            {"name": f"Layer {i}", "type": "image", "source": f"materials/{i}.png",
+             "transform": [1.0, 0.0, 0.5 * i, -2.25], "keyframes": [0, 250, -1, 2 ** 40], "depth": i}
+            for i in range(20)
+        ],
+        "particles": [],
+        "effects": [{"name": "scroll", "settings": {"speedX": 0, "speedY": -0.1}}],
+        "shaders": [],
+        "audio": [],
+        "ui": {"Clock": {"type": "clock", "visible": True, "format": None}},
+        "mixed": [1, 1.5, "two", False, None, 2 ** 70, [], {}],
+    },
+}
+
+class TestIrBinary(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_ir_binary_dir")
+        self.test_dir.mkdir(exist_ok=True)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_round_trip_is_lossless(self):
+        data = encode_ir(IR)
+        decoded = decode_ir(data)
+        self.assertEqual(decoded, IR)
+        # Ints and floats keep their JSON types.
+        self.assertEqual(json.dumps(decoded, sort_keys=True), json.dumps(IR, sort_keys=True))
+        self.assertLess(len(data), len(json.dumps(IR, separators=(',', ':'))))
+
+    def test_lazy_layer_access(self):
+        reader = BinaryIR(encode_ir(IR))
+        self.assertEqual(reader.layer_count(), 20)
+        self.assertEqual(reader.layer(13), IR["scene"]["layers"][13])
+        self.assertEqual(reader.get("scene", "ui", "Clock", "type"), "clock")
+        self.assertEqual(reader.get("scene", "mixed", 5), 2 ** 70)
+        self.assertIsNone(reader.layer(20))
+        self.assertEqual(reader.get("scene", "missing", default=[]), [])
+
+    def test_rejects_other_data(self):
+        with self.assertRaises(IRFormatError):
+            BinaryIR(b"{\"version\": \"1.0\"}")
+        with self.assertRaises(IRFormatError):
+            BinaryIR(encode_ir(IR)[:4] + b"\x63\x00\x00\x00" + b"\x00" * 8)
+
+    def test_write_and_read_by_extension(self):
+        write_ir(IR, self.test_dir / "ir.stlb")
+        write_ir(IR, self.test_dir / "ir.json")
+        self.assertEqual((self.test_dir / "ir.stlb").read_bytes()[:4], b"STLB")
+        self.assertEqual(read_ir(self.test_dir / "ir.stlb"), IR)
+        self.assertEqual(read_ir(self.test_dir / "ir.json"), IR)
+
+    def test_orchestrator_caches_binary_ir(self):
+        wallpaper_dir = self.test_dir / "wallpaper"
+        wallpaper_dir.mkdir()
+        with open(wallpaper_dir / "scene.json", "w") as f:
+            json.dump({"layers": [{"name": "bg", "type": "image", "file": "bg.png"}]}, f)
+        output_dir = self.test_dir / "output"
+
+        results = []
+        process_single_wallpaper(wallpaper_dir, output_dir, None, None, False, results, ir_format="binary")
+        self.assertEqual(BinaryIR.open(output_dir / "ir.stlb").layer(0)["name"], "bg")
+        self.assertFalse((output_dir / "ir.json").exists())
+
+        emitted = self.test_dir / "emitted.stlb"
+        process_single_wallpaper(wallpaper_dir, output_dir, None, str(emitted), False, results)
+        self.assertEqual(read_ir(emitted), read_ir(output_dir / "ir.stlb"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import io
+import json
+import shutil
+import tracemalloc
+from pathlib import Path
+from unittest import mock
+from converter.json_stream import iter_members, top_level_keys
+from converter.parser import parse_project_to_ir
+from converter.detector import detect_wallpaper_type
+from converter.vfs import PkgSource
+from converter.tests.test_pkg import write_pkg
+
+SCENE = {
+    "general": {"properties": {"note": "quote \" and brackets ]}"}},
+    "objects": [
+        {"name": "Sky", "image": "models/sky.json", "depth": 0.1, "effects": [{"name": "scroll", "speedX": 1}]},
+        {"name": "Clock", "ui": {"type": "clock"}},
+        {"name": "Rain", "particle": "particles/rain.json"},
+        {"name": "Theme", "sound": ["sounds/theme.mp3"]},
+    ],
+    "empty": [],
+    "layers": [{"name": "bg", "type": "image", "file": "materials/bg.png"}],
+    "version": 3,
+}
+
+class TestJsonStream(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_json_stream_dir")
+        self.test_dir.mkdir(exist_ok=True)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_iter_members_with_tiny_chunks(self):
+        data = json.dumps(SCENE, indent=2).encode("utf-8")
+        for chunk_size in (1, 3, 1 << 16):
+            members = list(iter_members(io.BytesIO(data), ("objects", "empty"), chunk_size=chunk_size))
+            self.assertEqual([value for key, value in members if key == "objects"], SCENE["objects"])
+            self.assertEqual({key: value for key, value in members if key != "objects"},
+                             {key: SCENE[key] for key in ("general", "layers", "version")})
+            self.assertEqual(top_level_keys(io.BytesIO(data), chunk_size=chunk_size), list(SCENE))
+
+    def test_malformed_input_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_members(io.StringIO('{"objects": [{"a": 1}'), ("objects",)))
+
+    def test_streaming_and_loaded_parse_agree(self):
+        with open(self.test_dir / "scene.json", "w") as f:
+            json.dump(SCENE, f)
+        streamed = parse_project_to_ir(self.test_dir, streaming=True)
+        self.assertEqual(streamed, parse_project_to_ir(self.test_dir, streaming=False))
+        self.assertEqual([layer["name"] for layer in streamed["scene"]["layers"]], ["Sky", "bg"])
+        self.assertEqual(streamed["scene"]["layers"][0]["depth"], 0.1)
+        self.assertEqual(streamed["scene"]["ui"], {"Clock": {"type": "clock"}})
+        self.assertEqual(streamed["scene"]["effects"], [{"name": "scroll", "speedX": 1, "layer": "Sky"}])
+        self.assertEqual(len(streamed["scene"]["particles"]), 1)
+
+    def test_streaming_memory_scales_with_one_object(self):
+        objects = [{"name": f"Object {i}", "image": f"models/{i}.json", "padding": "x" * 2000} for i in range(2000)]
+        with open(self.test_dir / "scene.json", "w") as f:
+            json.dump({"objects": objects}, f)
+        file_size = (self.test_dir / "scene.json").stat().st_size
+
+        tracemalloc.start()
+        try:
+            ir = parse_project_to_ir(self.test_dir, streaming=True)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(ir["scene"]["layers"]), 2000)
+        # Only the IR grows with the scene; the document is never held as a whole.
+        self.assertLess(peak, file_size / 4)
+
+    def test_large_scene_detection_reads_keys_only(self):
+        with open(self.test_dir / "scene.json", "w") as f:
+            json.dump({"layers": []}, f)
+        with mock.patch("converter.detector.STREAMING_THRESHOLD", 0):
+            self.assertEqual(detect_wallpaper_type(self.test_dir), ("parallax", {"scene_file": "scene.json"}))
+
+    def test_streaming_from_pkg(self):
+        write_pkg(self.test_dir / "scene.pkg", {"scene.json": json.dumps(SCENE).encode("utf-8")})
+        with mock.patch("converter.detector.STREAMING_THRESHOLD", 0):
+            self.assertEqual(detect_wallpaper_type(PkgSource(self.test_dir / "scene.pkg"))[0], "parallax")
+        streamed = parse_project_to_ir(PkgSource(self.test_dir / "scene.pkg"), streaming=True)
+        self.assertEqual(streamed, parse_project_to_ir(self.test_dir / "scene.pkg", streaming=False))
+        self.assertEqual([layer["name"] for layer in streamed["scene"]["layers"]], ["Sky", "bg"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import gzip
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from converter.optimize import minify_html, minify_js, optimize_output
+from converter.orchestrator import process_single_wallpaper
+from converter.validator import check_output
+
+class TestOptimize(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_optimize_dir")
+        self.wallpaper_dir = self.test_dir / "wallpaper"
+        self.wallpaper_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.wallpaper_dir / "scene.json", "w") as f:
+            json.dump({"objects": [
+                {"name": "icon", "image": "icon.png", "depth": 1},
+                {"name": "background", "image": "background.jpg"},
+                {"name": "intro", "file": "intro.mp4"},
+            ]}, f)
+        (self.wallpaper_dir / "icon.png").write_bytes(b"\x89PNG tiny icon")
+        (self.wallpaper_dir / "background.jpg").write_bytes(b"\xff\xd8" + b"j" * 5000)
+        (self.wallpaper_dir / "intro.mp4").write_bytes(b"m" * 5000)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_minify_js_keeps_strings(self):
+        source = """
+        // comment
+        const url = "https://example.com/a.png"; // trailing
+        /* block */ const quote = 'it\\'s // not a comment';
+        """
+        self.assertEqual(minify_js(source),
+                         'const url = "https://example.com/a.png";\nconst quote = \'it\\\'s // not a comment\';\n')
+        self.assertEqual(minify_html("<html>\n    <body>\n        <p>Hi</p>\n    </body>\n</html>\n"),
+                         "<html><body><p>Hi</p></body></html>\n")
+
+    def test_optimized_export(self):
+        output_dir = self.test_dir / "output"
+        results = []
+        process_single_wallpaper(self.wallpaper_dir, output_dir, None, None, False, results, optimize=True, inline_threshold=1024)
+        entry = results[0]
+        self.assertEqual(entry["status"], "success")
+        self.assertEqual(entry["optimize"]["inlined"], ["icon.png"])
+
+        script = (output_dir / "script.js").read_text()
+        self.assertIn("data:image/png;base64,", script)
+        self.assertNotIn("//", script.replace("https://", "").replace("data:", ""))
+        self.assertFalse((output_dir / "assets" / "icon.png").exists())
+        self.assertEqual(gzip.decompress((output_dir / "script.js.gz").read_bytes()), script.encode())
+        # Media is never recompressed.
+        self.assertFalse((output_dir / "assets" / "intro.mp4.gz").exists())
+        self.assertFalse((output_dir / "assets" / "background.jpg.gz").exists())
+        self.assertEqual(check_output(output_dir).unreferenced, [])
+
+        # Build metadata is rewritten after this stage and never gets sidecars.
+        process_single_wallpaper(self.wallpaper_dir, output_dir, None, None, False, [], optimize=True, force=True)
+        self.assertFalse((output_dir / "debug.json.gz").exists())
+        self.assertFalse((output_dir / ".build-manifest.json.gz").exists())
+        self.assertFalse((output_dir / "ir.json.gz").exists())
+
+    def test_hashed_script_is_renamed_after_optimizing(self):
+        output_dir = self.test_dir / "output"
+        results = []
+        process_single_wallpaper(self.wallpaper_dir, output_dir, None, None, False, results, optimize=True, hashed_names=True)
+        with open(output_dir / "asset-manifest.json") as f:
+            script = json.load(f)["script.js"]
+        digest = hashlib.sha256((output_dir / script).read_bytes()).hexdigest()
+        self.assertEqual(script, f"script.{digest[:16]}.js")
+        self.assertIn(f'src="./{script}"', (output_dir / "index.html").read_text())
+        self.assertEqual([path.name for path in output_dir.glob("script.*.js")], [script])
+        self.assertEqual(results[0]["status"], "success")
+
+    def test_stale_sidecars_are_removed(self):
+        (self.test_dir / "out").mkdir()
+        (self.test_dir / "out" / "old.js.gz").write_bytes(b"stale")
+        (self.test_dir / "out" / "data.json").write_text(json.dumps(list(range(200))))
+        stats = optimize_output(self.test_dir / "out")
+        self.assertFalse((self.test_dir / "out" / "old.js.gz").exists())
+        self.assertTrue((self.test_dir / "out" / "data.json.gz").exists())
+        self.assertGreaterEqual(stats["sidecars"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import json
+import shutil
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from converter.orchestrator import find_wallpaper_dirs, process_all_wallpapers, process_single_wallpaper
+from converter.generator_scene import SceneGenerator
+
+class TestOrchestrator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_orchestrator_dir")
+        self.collection_dir = self.test_dir / "collection"
+        self.output_dir = self.test_dir / "output"
+        self.collection_dir.mkdir(parents=True, exist_ok=True)
+
+        for name in ["1001", "1002"]:
+            wallpaper_dir = self.collection_dir / name
+            wallpaper_dir.mkdir()
+            with open(wallpaper_dir / "scene.json", "w") as f:
+                json.dump({"layers": [{"name": "bg", "type": "image", "file": "bg.png"}]}, f)
+        # Not a wallpaper: no markers inside
+        (self.collection_dir / "notes").mkdir()
+        (self.collection_dir / "notes" / "readme.txt").touch()
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_find_wallpaper_dirs(self):
+        wallpaper_dirs = find_wallpaper_dirs(self.collection_dir)
+        self.assertEqual([d.name for d in wallpaper_dirs], ["1001", "1002"])
+
+    def test_process_all_wallpapers_parallel(self):
+        results = []
+        console = StringIO()
+        with redirect_stdout(console):
+            process_all_wallpapers(self.collection_dir, self.output_dir, None, False, 2, results)
+        self.assertIn(f"Found 2 wallpapers in {self.collection_dir}.", console.getvalue())
+
+        self.assertEqual([r["wallpaper_name"] for r in results], ["1001", "1002"])
+        for entry in results:
+            self.assertIn("duration_seconds", entry)
+            self.assertEqual(entry["output_dir"], str(self.output_dir / entry["wallpaper_name"]))
+            self.assertTrue((self.output_dir / entry["wallpaper_name"] / "index.html").is_file())
+
+    def test_process_all_wallpapers_single_fallback(self):
+        single_dir = self.collection_dir / "1001"
+        results = []
+        process_all_wallpapers(single_dir, self.output_dir, None, False, 4, results)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["output_dir"], str(self.output_dir))
+
+    def test_generator_accepts_ir_in_memory(self):
+        (self.collection_dir / "1001" / "bg.png").write_bytes(b"png")
+        ir = {"scene": {"layers": [{"source": "bg.png"}]}}
+        generator = SceneGenerator(ir, str(self.output_dir), source_dir=str(self.collection_dir / "1001"), write_debug_json=False)
+        generator.generate()
+        self.assertIs(generator.ir, ir)
+        self.assertEqual(ir["scene"]["layers"][0]["source"], "./assets/bg.png")
+        self.assertFalse((self.output_dir / "debug.json").exists())
+
+    def test_ir_cache_is_optional(self):
+        results = []
+        process_single_wallpaper(self.collection_dir / "1001", self.output_dir, None, None, False, results, ir_cache=False)
+        self.assertTrue((self.output_dir / "index.html").is_file())
+        self.assertFalse((self.output_dir / "ir.json").exists())
+
+        process_single_wallpaper(self.collection_dir / "1002", self.output_dir / "cached", None, None, False, results)
+        ir_text = (self.output_dir / "cached" / "ir.json").read_text()
+        self.assertNotIn("\n", ir_text)
+        self.assertEqual(json.loads(ir_text)["scene"]["layers"][0]["source"], "bg.png")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import json
+import shutil
+import struct
+from pathlib import Path
+from converter.pkg import PkgFile, PkgFormatError
+from converter.vfs import open_source, PkgSource
+from converter.parser import handle_pkg_input
+from converter.orchestrator import process_all_wallpapers, process_single_wallpaper
+
+def write_pkg(path, entries, magic=b"PKGV0001"):
+    """Writes a minimal Wallpaper Engine .pkg container holding the given {name: bytes} entries."""
+    def string(value):
+        return struct.pack("<i", len(value)) + value
+    table = string(magic) + struct.pack("<i", len(entries))
+    data = b""
+    for name, payload in entries.items():
+        table += string(name.encode("utf-8")) + struct.pack("<ii", len(data), len(payload))
+        data += payload
+    Path(path).write_bytes(table + data)
+
+class TestPkg(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_pkg_dir")
+        self.test_dir.mkdir(exist_ok=True)
+        self.pkg_path = self.test_dir / "scene.pkg"
+        scene = {"layers": [{"name": "bg", "type": "image", "file": "materials/bg.png"}]}
+        write_pkg(self.pkg_path, {
+            "scene.json": json.dumps(scene).encode("utf-8"),
+            "materials/bg.png": b"background",
+            "materials/unused.png": b"never read",
+        })
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_entry_table_and_views(self):
+        with PkgFile(self.pkg_path) as pkg:
+            self.assertEqual(pkg.version, "PKGV0001")
+            self.assertEqual(set(pkg.entries), {"scene.json", "materials/bg.png", "materials/unused.png"})
+            view = pkg.entry_view("materials/bg.png")
+            self.assertIsInstance(view, memoryview)
+            self.assertEqual(view.tobytes(), b"background")
+            view.release()
+
+    def test_invalid_file(self):
+        bad_path = self.test_dir / "bad.pkg"
+        bad_path.write_bytes(b"\x04\x00\x00\x00ABCD")
+        with self.assertRaises(PkgFormatError):
+            PkgFile(bad_path)
+
+    def test_pkg_source(self):
+        source = open_source(self.pkg_path)
+        self.assertIsInstance(source, PkgSource)
+        self.assertTrue(source.is_file("scene.json"))
+        self.assertEqual(source.listdir("materials"), ["bg.png", "unused.png"])
+        self.assertEqual(source.stat("materials/bg.png")[0], len(b"background"))
+
+    def test_handle_pkg_input(self):
+        ir_path = self.test_dir / "ir.json"
+        handle_pkg_input(str(self.pkg_path), str(ir_path))
+        with open(ir_path) as f:
+            ir = json.load(f)
+        self.assertEqual(ir["scene"]["layers"][0]["source"], "materials/bg.png")
+
+    def test_web_export_from_pkg(self):
+        output_dir = self.test_dir / "output"
+        results = []
+        process_single_wallpaper(self.pkg_path, output_dir, None, None, False, results)
+
+        self.assertEqual(results[0]["wallpaper_name"], "scene")
+        self.assertEqual((output_dir / "assets" / "bg.png").read_bytes(), b"background")
+        self.assertFalse((output_dir / "assets" / "unused.png").exists())
+
+    def test_batch_over_pkg_is_a_single_wallpaper(self):
+        with self.assertRaises(ValueError):
+            open_source(self.pkg_path).subsource("materials")
+        results = []
+        process_all_wallpapers(self.pkg_path, self.test_dir / "batch", None, False, 1, results)
+        self.assertEqual([entry["wallpaper_name"] for entry in results], ["scene"])
+        self.assertTrue((self.test_dir / "batch" / "index.html").exists())
+
+if __name__ == '__main__':
+    unittest.main()
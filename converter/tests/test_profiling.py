@@ -0,0 +1,55 @@
+import unittest
+import json
+import pstats
+import shutil
+from pathlib import Path
+from converter.profiling import StageTimer, io_counters
+from converter.orchestrator import process_single_wallpaper
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_profiling_dir")
+        (self.test_dir / "wallpaper").mkdir(parents=True, exist_ok=True)
+        with open(self.test_dir / "wallpaper" / "scene.json", "w") as f:
+            json.dump({"layers": [{"name": "bg", "type": "image", "file": "bg.png"}]}, f)
+        (self.test_dir / "wallpaper" / "bg.png").write_bytes(b"png" * 1000)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_span_records_metrics(self):
+        timer = StageTimer("test")
+        with timer.span("read"):
+            (self.test_dir / "wallpaper" / "bg.png").read_bytes()
+        span = timer.to_list()[0]
+        self.assertEqual(span["stage"], "read")
+        self.assertGreaterEqual(span["wall_seconds"], 0)
+        self.assertGreaterEqual(span["cpu_seconds"], 0)
+        if io_counters()[0] is not None:
+            self.assertGreaterEqual(span["bytes_read"], 3000)
+
+        trace = timer.chrome_trace()
+        self.assertEqual([event["ph"] for event in trace["traceEvents"]], ["M", "X"])
+        self.assertEqual(trace["traceEvents"][1]["name"], "read")
+
+    def test_orchestrator_records_timings_and_profile(self):
+        output_dir = self.test_dir / "output"
+        results = []
+        process_single_wallpaper(self.test_dir / "wallpaper", output_dir, None, None, False, results, profile=True)
+
+        stages = [span["stage"] for span in results[0]["timings"]]
+        self.assertEqual(stages, ["index", "fingerprint", "detect", "parse", "effects", "assets", "generate", "validate", "manifest"])
+        self.assertIn("process_single_wallpaper", str(pstats.Stats(str(output_dir / "profile.pstats")).stats))
+        with open(output_dir / "trace.json") as f:
+            self.assertEqual(len(json.load(f)["traceEvents"]), len(stages) + 1)
+        self.assertEqual(results[0]["validation"]["unreferenced"], [])
+
+        # Profile dumps do not invalidate the incremental build.
+        cached = []
+        process_single_wallpaper(self.test_dir / "wallpaper", output_dir, None, None, False, cached)
+        self.assertTrue(cached[0].get("cached"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import json
+import shutil
+import threading
+from pathlib import Path
+from converter.service import ConversionService, make_server, parse_address, submit
+
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_service_dir")
+        self.wallpaper_dir = self.test_dir / "wallpaper"
+        self.wallpaper_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.wallpaper_dir / "scene.json", "w") as f:
+            json.dump({"layers": [{"name": "bg", "type": "image", "file": "bg.png"}]}, f)
+        (self.wallpaper_dir / "bg.png").write_bytes(b"png" * 1000)
+
+        self.address = str(self.test_dir / "service.sock")
+        self.service = ConversionService(workers=2)
+        self.server = make_server(self.address, self.service)
+        self.service.start()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("localhost:8765"), ("tcp", ("localhost", 8765)))
+        self.assertEqual(parse_address(":8765"), ("tcp", ("127.0.0.1", 8765)))
+        self.assertEqual(parse_address("/run/wpe.sock"), ("unix", "/run/wpe.sock"))
+
+    def test_jobs_stream_progress_and_results(self):
+        job = {"input": str(self.wallpaper_dir), "output": str(self.test_dir / "output")}
+        events = list(submit(self.address, job, timeout=30))
+        kinds = [event["event"] for event in events]
+        self.assertEqual(kinds[0], "accepted")
+        self.assertEqual(kinds[-1], "result")
+        self.assertIn("log", kinds)
+        self.assertIn("assets", kinds)
+        self.assertEqual([event["stage"] for event in events if event["event"] == "stage"][-1], "manifest")
+        # Process-wide figures would include other jobs' work; only wall time is sent.
+        self.assertNotIn("cpu_seconds", [event for event in events if event["event"] == "stage"][0])
+        self.assertEqual(set(events[-1]["results"][0]["timings"][0]), {"stage", "start_seconds", "wall_seconds"})
+        self.assertEqual(events[-1]["results"][0]["status"], "success")
+        self.assertTrue((self.test_dir / "output" / "index.html").exists())
+
+        # The second run reuses the warm index and the build manifest.
+        events = list(submit(self.address, job, timeout=30))
+        self.assertTrue(events[-1]["results"][0]["cached"])
+        stats = list(submit(self.address, {"command": "ping"}, timeout=30))[0]
+        self.assertEqual((stats["jobs"], stats["failed"], stats["warm_indexes"]), (2, 0, 1))
+
+    def test_invalid_jobs_are_rejected(self):
+        events = list(submit(self.address, {"input": str(self.wallpaper_dir), "output": "x", "options": {"colour": 1}}, timeout=30))
+        self.assertEqual([event["event"] for event in events], ["error"])
+        self.assertIn("colour", events[0]["error"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import json
+import os
+import shutil
+from pathlib import Path
+from converter.shaders import ShaderRegistry, SHADER_REGISTRY_PATH, get_shader
+
+class TestShaderRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_shaders_dir")
+        (self.test_dir / "templates").mkdir(parents=True, exist_ok=True)
+        (self.test_dir / "templates" / "glow.glsl").write_text("void main() { /* glow */ }")
+        self._write_registry({"glow": {"template": "glow.glsl", "uniforms": {"strength": "u_strength"}}})
+        self.builtin_dir = os.path.dirname(SHADER_REGISTRY_PATH)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _write_registry(self, shaders):
+        with open(self.test_dir / "registry.json", "w") as f:
+            json.dump({"shaders": shaders}, f)
+
+    def test_shared_immutable_instances(self):
+        first = get_shader("ripple")
+        second = get_shader("ripple")
+        self.assertIs(first, second)
+        with self.assertRaises(AttributeError):
+            first.name = "other"
+        with self.assertRaises(TypeError):
+            first.uniforms["time"] = "u_other"
+
+    def test_info_is_a_copy(self):
+        registry = ShaderRegistry([str(self.test_dir)])
+        registry.info("glow")["uniforms"]["strength"] = "u_other"
+        self.assertEqual(registry.info("glow")["uniforms"], {"strength": "u_strength"})
+        self.assertEqual(dict(registry.shader("glow").uniforms), {"strength": "u_strength"})
+
+    def test_registered_directory(self):
+        registry = ShaderRegistry([self.builtin_dir])
+        self.assertIsNone(registry.shader("glow"))
+
+        registry.register_directory(str(self.test_dir))
+        glow = registry.shader("glow")
+        self.assertTrue(glow.is_known())
+        self.assertIn("glow", glow.template_content)
+        self.assertIsNotNone(registry.shader("ripple"))
+
+    def test_invalidates_on_mtime_change(self):
+        registry = ShaderRegistry([str(self.test_dir)], check_interval=0)
+        self.assertIsNone(registry.info("pulse"))
+
+        (self.test_dir / "templates" / "pulse.glsl").write_text("void main() {}")
+        self._write_registry({"pulse": {"template": "pulse.glsl", "uniforms": {}}})
+        stat = os.stat(self.test_dir / "registry.json")
+        os.utime(self.test_dir / "registry.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNotNone(registry.info("pulse"))
+        self.assertTrue(registry.shader("pulse").is_known())
+
+if __name__ == '__main__':
+    unittest.main()
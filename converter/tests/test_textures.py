@@ -0,0 +1,139 @@
+import unittest
+import io
+import json
+import shutil
+import struct
+import zlib
+from pathlib import Path
+from converter import textures
+from converter.textures import (
+    read_tex_info, decode_tex, select_mipmap, lz4_decompress, TexFormatError,
+    TEX_FORMAT_RGBA8888, TEX_FORMAT_DXT1, TEX_FORMAT_DXT5,
+)
+from converter.generator_scene import SceneGenerator
+from converter.orchestrator import process_single_wallpaper
+
+def lz4_literals(data):
+    """Encodes data as a single literal-only LZ4 sequence."""
+    length = len(data)
+    if length < 15:
+        return bytes([length << 4]) + data
+    extra, rest = b"", length - 15
+    while rest >= 255:
+        extra += b"\xff"
+        rest -= 255
+    return b"\xf0" + extra + bytes([rest]) + data
+
+def build_tex(tex_format, mipmaps, image_size=None, lz4=False):
+    """Builds a TEXB0003 .tex file; mipmaps is a list of (width, height, payload)."""
+    width, height = mipmaps[0][0], mipmaps[0][1]
+    image_width, image_height = image_size or (width, height)
+    out = b"TEXV0005\x00TEXI0001\x00"
+    out += struct.pack("<7i", tex_format, 0, width, height, image_width, image_height, 0)
+    out += b"TEXB0003\x00" + struct.pack("<ii", 1, -1) + struct.pack("<i", len(mipmaps))
+    for mip_width, mip_height, payload in mipmaps:
+        stored = lz4_literals(payload) if lz4 else payload
+        out += struct.pack("<5i", mip_width, mip_height, 1 if lz4 else 0, len(payload), len(stored)) + stored
+    return out
+
+def png_pixels(png):
+    """Returns (width, height, rgba) from a PNG written by encode_png."""
+    width, height = struct.unpack(">II", png[16:24])
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + idat_length])
+    stride = width * 4 + 1
+    return width, height, b"".join(raw[y * stride + 1:(y + 1) * stride] for y in range(height))
+
+class TestTextures(unittest.TestCase):
+
+    def test_lz4_overlapping_match(self):
+        # "ab" literal, then a 6-byte match at offset 2 -> "abababab"
+        compressed = bytes([(2 << 4) | 2]) + b"ab" + struct.pack("<H", 2) + bytes([0x10]) + b"c"
+        self.assertEqual(lz4_decompress(compressed, 9), b"ababababc")
+        with self.assertRaises(TexFormatError):
+            lz4_decompress(compressed, 10)
+
+    def test_select_mipmap(self):
+        mips = [(8, 8, bytes(256)), (4, 4, bytes(64)), (2, 2, bytes(16)), (1, 1, bytes(4))]
+        info = read_tex_info(io.BytesIO(build_tex(TEX_FORMAT_RGBA8888, mips)))
+        self.assertEqual([m.width for m in info.mipmaps], [8, 4, 2, 1])
+        self.assertEqual(select_mipmap(info), 0)
+        self.assertEqual(select_mipmap(info, 4), 1)
+        self.assertEqual(select_mipmap(info, 3), 1)
+        self.assertEqual(select_mipmap(info, 64), 0)
+
+    def test_decode_rgba_lz4_picks_small_mip(self):
+        big = bytes([255, 0, 0, 255]) * 64
+        small = bytes([0, 255, 0, 128]) * 16
+        tex = build_tex(TEX_FORMAT_RGBA8888, [(8, 8, big), (4, 4, small)], lz4=True)
+
+        png, extension, width, height = decode_tex(io.BytesIO(tex), max_size=4)
+        self.assertEqual((extension, width, height), (".png", 4, 4))
+        self.assertEqual(png_pixels(png), (4, 4, small))
+
+        png, _, width, _ = decode_tex(io.BytesIO(tex))
+        self.assertEqual(width, 8)
+        self.assertEqual(png_pixels(png)[2], big)
+
+    def test_decode_crops_to_image_size(self):
+        payload = bytes(range(4)) * 16
+        tex = build_tex(TEX_FORMAT_RGBA8888, [(4, 4, payload)], image_size=(3, 2))
+        png, _, width, height = decode_tex(io.BytesIO(tex))
+        self.assertEqual((width, height), (3, 2))
+        self.assertEqual(png_pixels(png)[2], bytes(range(4)) * 6)
+
+    def test_dxt1_block(self):
+        # c0 = pure red, c1 = pure blue, all pixels use index 0 except the last (index 1)
+        block = struct.pack("<HHI", 0xF800, 0x001F, 1 << 30)
+        rgba = textures._decode_dxt_python(block, 4, 4, TEX_FORMAT_DXT1)
+        self.assertEqual(rgba[:4], bytes([255, 0, 0, 255]))
+        self.assertEqual(rgba[-4:], bytes([0, 0, 255, 255]))
+
+    @unittest.skipIf(textures.np is None, "NumPy is not installed")
+    def test_numpy_and_python_dxt_decoders_agree(self):
+        seed = bytes((i * 97 + 13) % 256 for i in range(16 * 4 * 3))
+        for tex_format, block_size in [(TEX_FORMAT_DXT1, 8), (TEX_FORMAT_DXT5, 16), (textures.TEX_FORMAT_DXT3, 16)]:
+            payload = seed[:block_size * 6]
+            expected = textures._decode_dxt_python(payload, 10, 7, tex_format)
+            actual = textures._decode_dxt_numpy(payload, 10, 7, tex_format)
+            self.assertEqual(actual, expected, f"format {tex_format}")
+
+    def test_generator_decodes_tex_assets(self):
+        test_dir = Path("temp_test_textures_dir")
+        try:
+            (test_dir / "source" / "materials").mkdir(parents=True, exist_ok=True)
+            tex = build_tex(TEX_FORMAT_RGBA8888, [(2, 2, bytes(16)), (1, 1, bytes(4))], lz4=True)
+            (test_dir / "source" / "materials" / "sky.tex").write_bytes(tex)
+            ir_path = test_dir / "ir.json"
+            with open(ir_path, "w") as f:
+                json.dump({"scene": {"layers": [{"source": "materials/sky.tex"}]}}, f)
+
+            generator = SceneGenerator(str(ir_path), str(test_dir / "out"), source_dir=str(test_dir / "source"), texture_target_size=1)
+            generator._copy_assets()
+            self.assertEqual(generator.ir["scene"]["layers"][0]["source"], "./assets/sky.png")
+            png = (test_dir / "out" / "assets" / "sky.png").read_bytes()
+            self.assertEqual(png_pixels(png)[:2], (1, 1))
+        finally:
+            if test_dir.exists():
+                shutil.rmtree(test_dir)
+
+    def test_orchestrator_passes_texture_target_size(self):
+        test_dir = Path("temp_test_textures_orchestrator_dir")
+        try:
+            (test_dir / "source" / "materials").mkdir(parents=True, exist_ok=True)
+            tex = build_tex(TEX_FORMAT_RGBA8888, [(2, 2, bytes(16)), (1, 1, bytes(4))])
+            (test_dir / "source" / "materials" / "sky.tex").write_bytes(tex)
+            with open(test_dir / "source" / "scene.json", "w") as f:
+                json.dump({"layers": [], "objects": [{"name": "sky", "image": "materials/sky.tex"}]}, f)
+
+            results = []
+            process_single_wallpaper(test_dir / "source", test_dir / "out", None, None, False, results, texture_target_size=1)
+            self.assertEqual(results[0]["status"], "success")
+            png = (test_dir / "out" / "assets" / "sky.png").read_bytes()
+            self.assertEqual(png_pixels(png)[:2], (1, 1))
+        finally:
+            if test_dir.exists():
+                shutil.rmtree(test_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import json
+import shutil
+from pathlib import Path
+from converter.validator import check_output, validate_output
+
+class TestValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_validator_dir")
+        (self.test_dir / "assets").mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _write(self, rel_path, content=""):
+        path = self.test_dir / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def test_reference_graph_spans_html_js_css_and_spritesheets(self):
+        self._write("index.html", """<!DOCTYPE html><html><head>
+            <link rel="stylesheet" href="style.css?v=2">
+            <style>body { background: url('assets/bg.jpg'); }</style>
+            </head><body>
+            <img srcset="assets/small.png 1x, assets/large.png 2x">
+            <script src="/js/pixi.min.js"></script>
+            <script src="https://example.com/external.js"></script>
+            <script defer src="./script.js"></script>
+            </body></html>""")
+        self._write("style.css", "@import 'fonts.css';\n.logo { background-image: url(\"assets/logo.svg\"); }")
+        self._write("fonts.css", "@font-face { src: url(assets/font.woff2); }")
+        self._write("script.js", 'const assets = ["./assets/layer.png"];\nconst atlasPages = ["./assets/atlas-0.json"];')
+        self._write("assets/atlas-0.json", json.dumps({"frames": {}, "meta": {"image": "atlas-0.png"}}))
+        for name in ["bg.jpg", "small.png", "large.png", "logo.svg", "font.woff2", "layer.png", "atlas-0.png", "stale.png"]:
+            self._write(f"assets/{name}")
+        self._write("readme.md")
+        self._write("ir.json", "{}")
+
+        report = check_output(self.test_dir)
+        self.assertEqual(report.missing, [])
+        self.assertEqual(report.unreferenced, ["assets/stale.png"])
+        self.assertIn("assets/atlas-0.png", report.references["assets/atlas-0.json"])
+        self.assertEqual(report.references["style.css"], {"fonts.css", "assets/logo.svg"})
+        self.assertTrue(validate_output(self.test_dir))
+
+    def test_missing_references_fail(self):
+        self._write("index.html", '<video controls><source src="missing.mp4"></video><script src="script.js"></script>')
+        self._write("script.js", "PIXI.Sprite.from('./assets/gone.png');")
+
+        findings = {}
+        self.assertFalse(validate_output(self.test_dir, report_into=findings))
+        self.assertEqual(findings["missing"], [
+            {"file": "index.html", "reference": "missing.mp4"},
+            {"file": "script.js", "reference": "./assets/gone.png"},
+        ])
+
+    def test_missing_index(self):
+        report = check_output(self.test_dir)
+        self.assertFalse(report.is_valid)
+        self.assertEqual(len(report.errors), 1)
+
+if __name__ == '__main__':
+    unittest.main()
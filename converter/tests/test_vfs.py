@@ -0,0 +1,99 @@
+import unittest
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path
+from converter.vfs import open_source, DirectorySource, ZipSource, ProjectIndex
+from converter.detector import detect_wallpaper_type
+from converter.parser import parse_project_to_ir
+from converter.orchestrator import process_single_wallpaper, find_wallpaper_dirs
+
+class TestVfs(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_vfs_dir")
+        self.test_dir.mkdir(exist_ok=True)
+        self.zip_path = self.test_dir / "wallpaper.zip"
+        scene = {"layers": [{"name": "bg", "type": "image", "file": "materials/bg.png"},
+                            {"name": "fg", "type": "image", "file": "materials/fg.png"}]}
+        with zipfile.ZipFile(self.zip_path, "w") as zf:
+            zf.writestr("1234/scene.json", json.dumps(scene))
+            zf.writestr("1234/materials/bg.png", b"background")
+            zf.writestr("1234/materials/fg.png", b"foreground")
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_zip_source_detects_wrapping_folder(self):
+        source = open_source(self.zip_path)
+        self.assertIsInstance(source, ZipSource)
+        self.assertEqual(source.name, "1234")
+        self.assertTrue(source.is_file("scene.json"))
+        self.assertTrue(source.is_dir("materials"))
+        self.assertEqual(source.listdir("materials"), ["bg.png", "fg.png"])
+        self.assertEqual(source.stat("materials/bg.png")[0], len(b"background"))
+        with source.open("materials/fg.png") as f:
+            self.assertEqual(f.read(), b"foreground")
+        self.assertEqual(set(source.fingerprints()), {"scene.json", "materials/bg.png", "materials/fg.png"})
+
+    def test_open_source_for_directory(self):
+        self.assertIsInstance(open_source(self.test_dir), DirectorySource)
+        with self.assertRaises(FileNotFoundError):
+            open_source(self.test_dir / "missing")
+
+    def test_detect_and_parse_from_zip(self):
+        wallpaper_type, metadata = detect_wallpaper_type(self.zip_path)
+        self.assertEqual(wallpaper_type, "parallax")
+        self.assertEqual(sorted(metadata["image_files"]), ["bg.png", "fg.png"])
+
+        ir = parse_project_to_ir(self.zip_path)
+        self.assertEqual([layer["source"] for layer in ir["scene"]["layers"]], ["materials/bg.png", "materials/fg.png"])
+
+    def test_convert_from_zip_without_extracting(self):
+        output_dir = self.test_dir / "output"
+        results = []
+        process_single_wallpaper(self.zip_path, output_dir, None, None, False, results)
+
+        self.assertEqual(results[0]["wallpaper_name"], "1234")
+        self.assertEqual(results[0]["assets"]["methods"], {"stream": 2})
+        self.assertEqual((output_dir / "assets" / "bg.png").read_bytes(), b"background")
+        self.assertEqual(sorted(os.listdir(output_dir / "assets")), ["bg.png", "fg.png"])
+
+        cached = []
+        process_single_wallpaper(self.zip_path, output_dir, None, None, False, cached)
+        self.assertTrue(cached[0].get("cached"))
+
+    def test_find_wallpaper_dirs_in_zip_collection(self):
+        collection_zip = self.test_dir / "collection.zip"
+        with zipfile.ZipFile(collection_zip, "w") as zf:
+            zf.writestr("1001/scene.json", "{}")
+            zf.writestr("1002/video.mp4", b"")
+            zf.writestr("docs/readme.txt", b"")
+        self.assertEqual([d.name for d in find_wallpaper_dirs(collection_zip)], ["1001", "1002"])
+
+    def test_project_index_answers_from_one_listing(self):
+        project = ProjectIndex(self.zip_path)
+        self.assertEqual(project.name, "1234")
+        self.assertEqual(project.listdir("materials"), ["bg.png", "fg.png"])
+        self.assertEqual(project.files["materials/bg.png"], {"size": len(b"background"), "mtime_ns": project.stat("materials/bg.png")[1], "type": "image"})
+        self.assertEqual(project.files_of_type("image", "materials"), ["materials/bg.png", "materials/fg.png"])
+        self.assertIn("crc32", project.fingerprints()["scene.json"])
+        self.assertIs(ProjectIndex.of(project), project)
+        self.assertIs(open_source(project), project)
+
+    def test_project_index_parses_scene_once(self):
+        project = ProjectIndex(self.zip_path)
+        reads = []
+        read_text = project.source.read_text
+        project.source.read_text = lambda rel_path, encoding='utf-8': reads.append(rel_path) or read_text(rel_path, encoding)
+
+        self.assertEqual(detect_wallpaper_type(project)[0], "parallax")
+        ir = parse_project_to_ir(project)
+        self.assertEqual(len(ir["scene"]["layers"]), 2)
+        self.assertIsNone(project.project)
+        self.assertEqual(reads, ["scene.json"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from converter.orchestrator import process_single_wallpaper, watch_single_wallpaper
+from converter.watch import PollingWatcher, make_watcher
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_watch_dir")
+        self.wallpaper_dir = self.test_dir / "wallpaper"
+        self.output_dir = self.test_dir / "output"
+        (self.wallpaper_dir / "materials").mkdir(parents=True, exist_ok=True)
+        self._write_scene("bg")
+        (self.wallpaper_dir / "materials" / "bg.png").write_bytes(b"background")
+        (self.wallpaper_dir / "materials" / "fg.png").write_bytes(b"foreground")
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def _write_scene(self, name):
+        with open(self.wallpaper_dir / "scene.json", "w") as f:
+            json.dump({"layers": [
+                {"name": name, "type": "image", "file": "materials/bg.png"},
+                {"name": "fg", "type": "image", "file": "materials/fg.png"},
+            ]}, f)
+
+    def _touch(self, path, data):
+        path.write_bytes(data)
+        # Make sure the change is visible even on filesystems with coarse mtimes.
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def test_watchers_report_changed_paths(self):
+        for create in (lambda: PollingWatcher(self.wallpaper_dir, interval=0.01), lambda: make_watcher(self.wallpaper_dir)):
+            watcher = create()
+            try:
+                self.assertEqual(watcher.wait(timeout=0.1), [])
+                self._touch(self.wallpaper_dir / "materials" / "bg.png", b"changed " + watcher.kind.encode())
+                (self.wallpaper_dir / "new").mkdir(exist_ok=True)
+                (self.wallpaper_dir / "new" / "sound.mp3").write_bytes(watcher.kind.encode())
+                self.assertEqual(watcher.wait(timeout=5), ["materials/bg.png", "new/sound.mp3"])
+            finally:
+                watcher.close()
+
+    def _rebuild_after(self, change):
+        results = []
+        watcher = make_watcher(self.wallpaper_dir)
+        threading.Timer(0.05, change).start()
+        watch_single_wallpaper(self.wallpaper_dir, self.output_dir, None, False, results, watcher=watcher, max_rebuilds=1)
+        return results[0]
+
+    def test_rebuilds_only_affected_stages(self):
+        process_single_wallpaper(self.wallpaper_dir, self.output_dir, None, None, False, [])
+
+        entry = self._rebuild_after(lambda: self._touch(self.wallpaper_dir / "materials" / "bg.png", b"new background"))
+        self.assertEqual(entry["status"], "success")
+        self.assertEqual((entry["assets"]["files_reused"], entry["assets"]["unique_blobs"]), (1, 1))
+        with open(self.output_dir / "ir.json") as f:
+            self.assertEqual(json.load(f)["scene"]["layers"][0]["name"], "bg")
+
+        entry = self._rebuild_after(lambda: self._write_scene("renamed"))
+        self.assertEqual((entry["assets"]["files_reused"], entry["assets"]["unique_blobs"]), (2, 0))
+        with open(self.output_dir / "ir.json") as f:
+            self.assertEqual(json.load(f)["scene"]["layers"][0]["name"], "renamed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import json
+import shutil
+import zipfile
+from pathlib import Path
+from unittest import mock
+from converter import asset_store
+from converter.orchestrator import export_single_wallpaper_to_zip
+from converter.validator import check_output
+from converter.zip_output import ZipOutput
+
+class TestZipOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = Path("temp_test_zip_output_dir")
+        self.wallpaper_dir = self.test_dir / "wallpaper"
+        self.wallpaper_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.wallpaper_dir / "scene.json", "w") as f:
+            json.dump({"objects": [
+                {"name": "background", "image": "background.png"},
+                {"name": "copy", "image": "copy.png", "depth": 1},
+                {"name": "intro", "file": "intro.mp4"},
+            ]}, f)
+        (self.wallpaper_dir / "background.png").write_bytes(b"\x89PNG" + b"p" * 4000)
+        (self.wallpaper_dir / "copy.png").write_bytes(b"\x89PNG" + b"p" * 4000)
+        (self.wallpaper_dir / "intro.mp4").write_bytes(b"m" * 20000)
+
+    def tearDown(self):
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_export_streams_into_archive(self):
+        zip_path = self.test_dir / "export.zip"
+        results = []
+        export_single_wallpaper_to_zip(self.wallpaper_dir, zip_path, None, results)
+        self.assertEqual(results[0]["status"], "success")
+        self.assertFalse((self.test_dir / "export.zip.partial").exists())
+        # Nothing is staged next to the archive.
+        self.assertEqual(sorted(path.name for path in self.test_dir.iterdir()), ["export.zip", "wallpaper"])
+
+        with zipfile.ZipFile(zip_path) as archive:
+            entries = {info.filename: info for info in archive.infolist()}
+        assets = [name for name in entries if name.startswith("assets/")]
+        # Identical images are stored once.
+        self.assertEqual(len(assets), 2)
+        for name in assets:
+            self.assertEqual(entries[name].compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(entries["script.js"].compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(entries["index.html"].compress_type, zipfile.ZIP_DEFLATED)
+
+        report = check_output(zip_path)
+        self.assertTrue(report.is_valid)
+        self.assertEqual(report.unreferenced, [])
+
+    def test_assets_are_hashed_while_written(self):
+        zip_path = self.test_dir / "export.zip"
+        results = []
+        with mock.patch.object(asset_store, "hash_file", wraps=asset_store.hash_file) as hash_file:
+            export_single_wallpaper_to_zip(self.wallpaper_dir, zip_path, None, results)
+        self.assertEqual(results[0]["status"], "success")
+        # Only the two images of equal size are read ahead of writing, to find the duplicate.
+        self.assertEqual(sorted(Path(call.args[0]).name for call in hash_file.call_args_list), ["background.png", "copy.png"])
+        with zipfile.ZipFile(zip_path) as archive:
+            self.assertEqual(archive.read("assets/intro.mp4"), b"m" * 20000)
+
+    def test_failed_export_leaves_no_archive(self):
+        zip_path = self.test_dir / "broken.zip"
+        with self.assertRaises(RuntimeError):
+            with ZipOutput(zip_path) as output:
+                output.write_bytes("index.html", "<html></html>")
+                raise RuntimeError("generation failed")
+        self.assertFalse(zip_path.exists())
+        self.assertFalse((self.test_dir / "broken.zip.partial").exists())
+
+if __name__ == '__main__':
+    unittest.main()
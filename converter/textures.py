@@ -0,0 +1,408 @@
+"""
+Decoder for Wallpaper Engine .tex textures.
+
+A .tex file is a header followed by one or more images, each stored as a chain of
+mipmaps (largest first). Mipmap payloads are raw pixels, DXT1/3/5 blocks or an
+embedded image file, optionally LZ4-compressed. The decoder reads the header and
+mipmap table, seeks past every payload, and only then reads and decompresses the
+single mipmap that best matches the requested size.
+
+NumPy is used for pixel conversion when it is installed; otherwise a pure-Python
+fallback produces identical output.
+"""
+import struct
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # Optional: speeds up block decoding considerably.
+    np = None
+
+try:
+    import lz4.block as lz4_block
+except ImportError:  # Optional: the pure-Python decoder below is used instead.
+    lz4_block = None
+
+# TexFormat values from the .tex header
+TEX_FORMAT_RGBA8888 = 0
+TEX_FORMAT_DXT5 = 4
+TEX_FORMAT_DXT3 = 6
+TEX_FORMAT_DXT1 = 7
+TEX_FORMAT_RG88 = 8
+TEX_FORMAT_R8 = 9
+
+# TexFlags
+TEX_FLAG_IS_GIF = 4
+
+# FreeImage format ids for mipmaps that embed a regular image file
+FREE_IMAGE_UNKNOWN = -1
+FREE_IMAGE_EXTENSIONS = {0: ".bmp", 2: ".jpg", 13: ".png", 25: ".gif", 17: ".tga", 35: ".webp"}
+
+DXT_BLOCK_SIZES = {TEX_FORMAT_DXT1: 8, TEX_FORMAT_DXT3: 16, TEX_FORMAT_DXT5: 16}
+
+_INT32 = struct.Struct("<i")
+
+
+class TexFormatError(ValueError):
+    """Raised when a .tex file is malformed or uses an unsupported feature."""
+
+
+class TexMipmap:
+    """Location and encoding of one mipmap payload inside the .tex stream."""
+    __slots__ = ("width", "height", "lz4", "decompressed_size", "offset", "size")
+
+    def __init__(self, width, height, lz4, decompressed_size, offset, size):
+        self.width = width
+        self.height = height
+        self.lz4 = lz4
+        self.decompressed_size = decompressed_size
+        self.offset = offset
+        self.size = size
+
+
+class TexInfo:
+    """Parsed .tex header plus the mipmap table of the first image."""
+    def __init__(self, format, flags, texture_width, texture_height, image_width, image_height,
+                 container_version, image_format, mipmaps):
+        self.format = format
+        self.flags = flags
+        self.texture_width = texture_width
+        self.texture_height = texture_height
+        self.image_width = image_width
+        self.image_height = image_height
+        self.container_version = container_version
+        self.image_format = image_format
+        self.mipmaps = mipmaps
+
+    @property
+    def is_embedded_image(self):
+        """True when mipmaps hold an encoded image file (png/jpg/...) instead of raw pixels."""
+        return self.image_format != FREE_IMAGE_UNKNOWN
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise TexFormatError("Unexpected end of .tex data")
+    return data
+
+
+def _read_int(stream):
+    return _INT32.unpack(_read_exact(stream, 4))[0]
+
+
+def _read_nstring(stream, max_length=256):
+    """Reads a null-terminated string."""
+    chars = bytearray()
+    while True:
+        byte = _read_exact(stream, 1)
+        if byte == b"\x00":
+            return chars.decode("ascii", errors="replace")
+        chars += byte
+        if len(chars) > max_length:
+            raise TexFormatError("Unterminated string in .tex header")
+
+
+def read_tex_info(stream):
+    """
+    Parses the header and the first image's mipmap table from a seekable binary
+    stream. Payloads are skipped with seek(), so no pixel data is read.
+    """
+    magic = _read_nstring(stream)
+    if not magic.startswith("TEXV"):
+        raise TexFormatError(f"Not a .tex file (magic {magic!r})")
+    if not _read_nstring(stream).startswith("TEXI"):
+        raise TexFormatError("Missing TEXI header")
+
+    tex_format, flags, texture_width, texture_height, image_width, image_height = struct.unpack("<6i", _read_exact(stream, 24))
+    _read_exact(stream, 4)  # unused
+
+    container_magic = _read_nstring(stream)
+    if not container_magic.startswith("TEXB"):
+        raise TexFormatError(f"Unknown image container {container_magic!r}")
+    container_version = int(container_magic[4:] or 0)
+    image_count = _read_int(stream)
+    image_format = FREE_IMAGE_UNKNOWN
+    if container_version >= 3:
+        image_format = _read_int(stream)
+    if container_version >= 4:
+        if _read_int(stream) == 1:
+            raise TexFormatError("Video textures (mp4 in .tex) are not supported")
+        # Non-video TEXB0004 containers use the TEXB0003 mipmap layout.
+        container_version = 3
+    if container_version not in (1, 2, 3):
+        raise TexFormatError(f"Unsupported image container {container_magic!r}")
+    if image_count < 1:
+        raise TexFormatError(".tex file contains no images")
+
+    mipmap_count = _read_int(stream)
+    mipmaps = []
+    for _ in range(mipmap_count):
+        width, height = struct.unpack("<2i", _read_exact(stream, 8))
+        lz4, decompressed_size = False, None
+        if container_version >= 2:
+            lz4 = _read_int(stream) == 1
+            decompressed_size = _read_int(stream)
+        size = _read_int(stream)
+        offset = stream.tell()
+        mipmaps.append(TexMipmap(width, height, lz4, decompressed_size, offset, size))
+        stream.seek(size, 1)
+
+    if not mipmaps:
+        raise TexFormatError(".tex image has no mipmaps")
+    return TexInfo(tex_format, flags, texture_width, texture_height, image_width, image_height,
+                   container_version, image_format, mipmaps)
+
+
+def select_mipmap(info, max_size=None):
+    """
+    Picks the smallest mipmap whose longer side is still at least max_size, or the
+    largest mipmap when none is that big (or no limit is given).
+    """
+    if not max_size:
+        return 0
+    best = 0
+    for index, mipmap in enumerate(info.mipmaps):
+        if max(mipmap.width, mipmap.height) >= max_size:
+            best = index
+    return best
+
+
+def lz4_decompress(data, decompressed_size):
+    """Decompresses a raw LZ4 block (no frame header) of known output size."""
+    if lz4_block is not None:
+        return lz4_block.decompress(bytes(data), uncompressed_size=decompressed_size)
+
+    src = memoryview(data)
+    dst = bytearray()
+    pos, end = 0, len(src)
+    while pos < end:
+        token = src[pos]
+        pos += 1
+        literal_length = token >> 4
+        if literal_length == 15:
+            while True:
+                extra = src[pos]
+                pos += 1
+                literal_length += extra
+                if extra != 255:
+                    break
+        dst += src[pos:pos + literal_length]
+        pos += literal_length
+        if pos >= end:
+            break  # the last sequence carries literals only
+
+        offset = src[pos] | (src[pos + 1] << 8)
+        pos += 2
+        if offset == 0 or offset > len(dst):
+            raise TexFormatError("Corrupt LZ4 data")
+        match_length = token & 0x0F
+        if match_length == 15:
+            while True:
+                extra = src[pos]
+                pos += 1
+                match_length += extra
+                if extra != 255:
+                    break
+        match_length += 4
+
+        start = len(dst) - offset
+        if match_length <= offset:
+            dst += dst[start:start + match_length]
+        else:
+            # Overlapping match: the copied bytes repeat with period `offset`.
+            pattern = dst[start:]
+            repeats, remainder = divmod(match_length, offset)
+            dst += pattern * repeats + pattern[:remainder]
+
+    if len(dst) != decompressed_size:
+        raise TexFormatError(f"LZ4 output size mismatch ({len(dst)} != {decompressed_size})")
+    return bytes(dst)
+
+
+def _expand565(color):
+    r = (color >> 11) & 0x1F
+    g = (color >> 5) & 0x3F
+    b = color & 0x1F
+    return (r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)
+
+
+def _decode_dxt_python(payload, width, height, tex_format):
+    block_size = DXT_BLOCK_SIZES[tex_format]
+    blocks_x, blocks_y = (width + 3) // 4, (height + 3) // 4
+    full_width = blocks_x * 4
+    out = bytearray(full_width * blocks_y * 4 * 4)
+    for by in range(blocks_y):
+        for bx in range(blocks_x):
+            block = payload[(by * blocks_x + bx) * block_size:(by * blocks_x + bx + 1) * block_size]
+            color_block = block[-8:]
+            c0, c1, indices = struct.unpack("<HHI", color_block)
+            r0, g0, b0 = _expand565(c0)
+            r1, g1, b1 = _expand565(c1)
+            palette = [(r0, g0, b0, 255), (r1, g1, b1, 255)]
+            if c0 > c1 or tex_format != TEX_FORMAT_DXT1:
+                palette.append(((2 * r0 + r1) // 3, (2 * g0 + g1) // 3, (2 * b0 + b1) // 3, 255))
+                palette.append(((r0 + 2 * r1) // 3, (g0 + 2 * g1) // 3, (b0 + 2 * b1) // 3, 255))
+            else:
+                palette.append(((r0 + r1) // 2, (g0 + g1) // 2, (b0 + b1) // 2, 255))
+                palette.append((0, 0, 0, 0))
+
+            alphas = None
+            if tex_format == TEX_FORMAT_DXT3:
+                bits = int.from_bytes(block[:8], "little")
+                alphas = [((bits >> (4 * i)) & 0x0F) * 17 for i in range(16)]
+            elif tex_format == TEX_FORMAT_DXT5:
+                a0, a1 = block[0], block[1]
+                bits = int.from_bytes(block[2:8], "little")
+                alpha_palette = _dxt5_alpha_palette(a0, a1)
+                alphas = [alpha_palette[(bits >> (3 * i)) & 0x07] for i in range(16)]
+
+            for i in range(16):
+                r, g, b, a = palette[(indices >> (2 * i)) & 0x03]
+                if alphas is not None:
+                    a = alphas[i]
+                y, x = by * 4 + i // 4, bx * 4 + i % 4
+                offset = (y * full_width + x) * 4
+                out[offset:offset + 4] = bytes((r, g, b, a))
+    return _crop_rows(bytes(out), full_width, width, height)
+
+
+def _dxt5_alpha_palette(a0, a1):
+    if a0 > a1:
+        return [a0, a1] + [((7 - i) * a0 + i * a1) // 7 for i in range(1, 7)]
+    return [a0, a1] + [((5 - i) * a0 + i * a1) // 5 for i in range(1, 5)] + [0, 255]
+
+
+def _crop_rows(rgba, full_width, width, height):
+    if full_width == width:
+        return rgba[:width * height * 4]
+    stride = full_width * 4
+    return b"".join(rgba[y * stride:y * stride + width * 4] for y in range(height))
+
+
+def _decode_dxt_numpy(payload, width, height, tex_format):
+    block_size = DXT_BLOCK_SIZES[tex_format]
+    blocks_x, blocks_y = (width + 3) // 4, (height + 3) // 4
+    count = blocks_x * blocks_y
+    blocks = np.frombuffer(payload, dtype=np.uint8, count=count * block_size).reshape(count, block_size)
+
+    color = blocks[:, -8:]
+    c0 = color[:, 0].astype(np.uint32) | (color[:, 1].astype(np.uint32) << 8)
+    c1 = color[:, 2].astype(np.uint32) | (color[:, 3].astype(np.uint32) << 8)
+    indices = color[:, 4:8].copy().view("<u4").reshape(count)
+
+    def expand(c):
+        r, g, b = (c >> 11) & 0x1F, (c >> 5) & 0x3F, c & 0x1F
+        return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=1).astype(np.int32)
+
+    rgb0, rgb1 = expand(c0), expand(c1)
+    four_color = (c0 > c1) if tex_format == TEX_FORMAT_DXT1 else np.ones(count, dtype=bool)
+    rgb2 = np.where(four_color[:, None], (2 * rgb0 + rgb1) // 3, (rgb0 + rgb1) // 2)
+    rgb3 = np.where(four_color[:, None], (rgb0 + 2 * rgb1) // 3, 0)
+    palette = np.empty((count, 4, 4), dtype=np.uint8)
+    palette[:, 0, :3], palette[:, 1, :3], palette[:, 2, :3], palette[:, 3, :3] = rgb0, rgb1, rgb2, rgb3
+    palette[:, :3, 3] = 255
+    palette[:, 3, 3] = np.where(four_color, 255, 0)
+
+    shifts = np.arange(16, dtype=np.uint32)
+    selectors = (indices[:, None] >> (2 * shifts)) & 0x03
+    pixels = palette[np.arange(count)[:, None], selectors]  # (count, 16, 4)
+
+    if tex_format == TEX_FORMAT_DXT3:
+        bits = blocks[:, :8].copy().view("<u8").reshape(count)
+        pixels[:, :, 3] = ((bits[:, None] >> (4 * shifts.astype(np.uint64))) & 0x0F) * 17
+    elif tex_format == TEX_FORMAT_DXT5:
+        a0 = blocks[:, 0].astype(np.int32)
+        a1 = blocks[:, 1].astype(np.int32)
+        steps = np.arange(1, 7)
+        eight = np.concatenate([a0[:, None], a1[:, None], ((7 - steps) * a0[:, None] + steps * a1[:, None]) // 7], axis=1)
+        steps = np.arange(1, 5)
+        six = np.concatenate([a0[:, None], a1[:, None], ((5 - steps) * a0[:, None] + steps * a1[:, None]) // 5,
+                              np.zeros((count, 1), dtype=np.int32), np.full((count, 1), 255, dtype=np.int32)], axis=1)
+        alpha_palette = np.where((a0 > a1)[:, None], eight, six).astype(np.uint8)
+        raw = np.zeros((count, 8), dtype=np.uint8)
+        raw[:, :6] = blocks[:, 2:8]
+        bits = raw.view("<u8").reshape(count)
+        alpha_selectors = (bits[:, None] >> (3 * shifts.astype(np.uint64))) & 0x07
+        pixels[:, :, 3] = alpha_palette[np.arange(count)[:, None], alpha_selectors]
+
+    image = pixels.reshape(blocks_y, blocks_x, 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(blocks_y * 4, blocks_x * 4, 4)
+    return np.ascontiguousarray(image[:height, :width]).tobytes()
+
+
+def _to_rgba(pixels, width, height, tex_format):
+    """Converts a decompressed mipmap payload into tightly packed RGBA8 rows."""
+    if tex_format in DXT_BLOCK_SIZES:
+        expected = ((width + 3) // 4) * ((height + 3) // 4) * DXT_BLOCK_SIZES[tex_format]
+        if len(pixels) < expected:
+            raise TexFormatError("DXT payload is shorter than its dimensions require")
+        decode = _decode_dxt_numpy if np is not None else _decode_dxt_python
+        return decode(bytes(pixels), width, height, tex_format)
+
+    channels = {TEX_FORMAT_RGBA8888: 4, TEX_FORMAT_RG88: 2, TEX_FORMAT_R8: 1}.get(tex_format)
+    if channels is None:
+        raise TexFormatError(f"Unsupported .tex pixel format {tex_format}")
+    if len(pixels) < width * height * channels:
+        raise TexFormatError("Pixel payload is shorter than its dimensions require")
+    pixels = bytes(pixels[:width * height * channels])
+    if channels == 4:
+        return pixels
+
+    if np is not None:
+        src = np.frombuffer(pixels, dtype=np.uint8).reshape(-1, channels)
+        out = np.empty((src.shape[0], 4), dtype=np.uint8)
+        out[:, 0] = out[:, 1] = out[:, 2] = src[:, 0]
+        out[:, 3] = src[:, 1] if channels == 2 else 255
+        return out.tobytes()
+
+    out = bytearray(width * height * 4)
+    out[0::4] = out[1::4] = out[2::4] = pixels[0::channels]
+    out[3::4] = pixels[1::2] if channels == 2 else b"\xff" * (width * height)
+    return bytes(out)
+
+
+def encode_png(width, height, rgba, compression_level=6):
+    """Encodes tightly packed RGBA8 rows as a PNG file."""
+    stride = width * 4
+    if np is not None:
+        rows = np.frombuffer(rgba, dtype=np.uint8).reshape(height, stride)
+        raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rows], axis=1).tobytes()
+    else:
+        raw = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, compression_level)) + chunk(b"IEND", b"")
+
+
+def decode_tex(stream, max_size=None):
+    """
+    Decodes a .tex stream into a web-ready image.
+
+    Only the mipmap chosen by select_mipmap(info, max_size) is read and
+    decompressed. Returns (data, extension, width, height), where data is PNG
+    bytes, or the embedded image file as-is for textures that wrap one.
+    """
+    info = read_tex_info(stream)
+    mipmap_index = select_mipmap(info, max_size)
+    mipmap = info.mipmaps[mipmap_index]
+
+    stream.seek(mipmap.offset)
+    payload = _read_exact(stream, mipmap.size)
+    if mipmap.lz4:
+        payload = lz4_decompress(payload, mipmap.decompressed_size)
+
+    # Lower mipmaps keep the aspect of the visible image region.
+    scale = 2 ** mipmap_index
+    width = max(1, min(mipmap.width, (info.image_width or mipmap.width * scale) // scale))
+    height = max(1, min(mipmap.height, (info.image_height or mipmap.height * scale) // scale))
+
+    if info.is_embedded_image:
+        return payload, FREE_IMAGE_EXTENSIONS.get(info.image_format, ".bin"), width, height
+
+    rgba = _to_rgba(payload, mipmap.width, mipmap.height, info.format)
+    if (width, height) != (mipmap.width, mipmap.height):
+        rgba = _crop_rows(rgba, mipmap.width, width, height)
+    return encode_png(width, height, rgba), ".png", width, height
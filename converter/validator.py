@@ -1,51 +1,276 @@
+import io
+import json
 import os
-from pathlib import Path
+import posixpath
 import re
+import zipfile
+from html.parser import HTMLParser
+from pathlib import Path
+
+from converter.asset_store import ASSET_MANIFEST_NAME
+from converter.build_cache import VOLATILE_OUTPUTS
+from converter.optimize import is_sidecar
+
+# Outputs that are not meant to be referenced by the page itself.
+METADATA_OUTPUTS = VOLATILE_OUTPUTS | {"readme.md", "ir.json", "ir.stlb", ASSET_MANIFEST_NAME}
+
+# Tags and attributes whose values are resources the page loads.
+RESOURCE_ATTRIBUTES = {
+    "script": ("src",), "img": ("src", "srcset"), "video": ("src", "poster"), "audio": ("src",),
+    "source": ("src", "srcset"), "track": ("src",), "iframe": ("src",), "embed": ("src",),
+    "object": ("data",), "image": ("href",),
+}
+# <link rel=...> values that load a resource.
+RESOURCE_LINK_RELS = {"stylesheet", "icon", "preload", "prefetch", "modulepreload", "manifest", "apple-touch-icon"}
+# File types looked for in JavaScript string literals.
+JS_ASSET_EXTENSIONS = ("png", "jpg", "jpeg", "gif", "webp", "bmp", "svg", "mp4", "webm", "mp3", "ogg", "wav",
+                       "json", "css", "js", "woff", "woff2", "ttf")
+
+_JS_ASSET = re.compile(r"""["'`]((?:\./|\.\./)?[^"'`\s<>]+?\.(?:%s))(?:[?#][^"'`\s]*)?["'`]""" % "|".join(JS_ASSET_EXTENSIONS), re.IGNORECASE)
+_CSS_URL = re.compile(r"""url\(\s*["']?([^"')]+?)["']?\s*\)|@import\s+["']([^"']+)["']""", re.IGNORECASE)
+_EXTERNAL_PREFIXES = ("http://", "https://", "//", "data:", "blob:", "javascript:", "mailto:", "about:", "#")
+
+CHUNK_SIZE = 1 << 16
+
+
+class ValidationReport:
+    """Reference graph of an output folder and the problems found in it."""
+    def __init__(self, output_path):
+        self.output_path = output_path
+        # Referencing file -> set of referenced output paths (POSIX, relative to the output root).
+        self.references = {}
+        # (referencing file, reference as written) pairs that do not resolve to an output file.
+        self.missing = []
+        # Output files that nothing references.
+        self.unreferenced = []
+        self.errors = []
+
+    @property
+    def is_valid(self):
+        return not self.errors and not self.missing
+
+    def to_dict(self):
+        return {
+            "missing": [{"file": source, "reference": ref} for source, ref in self.missing],
+            "unreferenced": self.unreferenced,
+            "errors": self.errors,
+        }
+
+
+class _ReferenceParser(HTMLParser):
+    """Incremental HTML tokenizer that collects resource URLs, inline CSS and inline scripts."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.urls = []
+        self.css = []
+        self.scripts = []
+        self._inline = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for name in RESOURCE_ATTRIBUTES.get(tag, ()):
+            value = attrs.get(name)
+            if not value:
+                continue
+            if name == "srcset":
+                self.urls.extend(candidate.split()[0] for candidate in value.split(",") if candidate.strip())
+            else:
+                self.urls.append(value)
+        if tag == "link" and attrs.get("href"):
+            if RESOURCE_LINK_RELS & set((attrs.get("rel") or "").lower().split()):
+                self.urls.append(attrs["href"])
+        if attrs.get("style"):
+            self.css.append(attrs["style"])
+        if tag == "style" or (tag == "script" and not attrs.get("src")):
+            self._inline = tag
+
+    def handle_endtag(self, tag):
+        if tag == self._inline:
+            self._inline = None
+
+    def handle_data(self, data):
+        if self._inline == "style":
+            self.css.append(data)
+        elif self._inline == "script":
+            self.scripts.append(data)
+
+
+def list_output(output_path):
+    """Returns the set of files below output_path (POSIX paths relative to it) from one scandir walk."""
+    files = set()
+    stack = [(str(output_path), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, prefix + entry.name + "/"))
+                else:
+                    files.add(prefix + entry.name)
+    return files
+
+
+def _resolve(base_file, reference):
+    """
+    Resolves a reference relative to the file it appears in. Returns None for
+    external, inline and site-absolute URLs (e.g. /js/pixi.min.js, served by the host).
+    """
+    reference = reference.strip()
+    if not reference or reference.lower().startswith(_EXTERNAL_PREFIXES) or reference.startswith("/"):
+        return None
+    reference = re.split(r"[?#]", reference, 1)[0]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_file), reference))
+
+
+def _scan_html(f):
+    parser = _ReferenceParser()
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+        parser.feed(chunk)
+    parser.close()
+    references = list(parser.urls)
+    for css in parser.css:
+        references.extend(_css_references(css))
+    for script in parser.scripts:
+        references.extend(match.group(1) for match in _JS_ASSET.finditer(script))
+    return references
+
+
+def _css_references(text):
+    return [url or imported for url, imported in _CSS_URL.findall(text)]
 
-def validate_output(output_path: Path):
+
+def _scan_lines(f, extract):
+    references = []
+    for line in f:
+        references.extend(extract(line))
+    return references
+
+
+def _load_json(f):
+    try:
+        return json.load(f)
+    except ValueError:
+        return None
+
+
+def _scan_json(f):
+    """Spritesheets (and similar manifests) name their image in meta.image."""
+    data = _load_json(f)
+    meta = data.get("meta") if isinstance(data, dict) else None
+    return [meta["image"]] if isinstance(meta, dict) and isinstance(meta.get("image"), str) else []
+
+
+def _spritesheet_frames(f):
+    """Frame names of a spritesheet; runtimes such as Pixi cache frames under these names."""
+    data = _load_json(f)
+    frames = data.get("frames") if isinstance(data, dict) else None
+    return list(frames) if isinstance(frames, dict) else []
+
+
+def _references_in(open_text, rel_path):
+    extension = posixpath.splitext(rel_path)[1].lower()
+    if extension in (".html", ".htm"):
+        scan = _scan_html
+    elif extension in (".js", ".mjs"):
+        scan = lambda f: _scan_lines(f, lambda line: [match.group(1) for match in _JS_ASSET.finditer(line)])
+    elif extension == ".css":
+        scan = lambda f: _scan_lines(f, _css_references)
+    elif extension == ".json":
+        scan = _scan_json
+    else:
+        return []
+    with open_text(rel_path) as f:
+        return scan(f)
+
+
+def check_output(output_path: Path, entry="index.html"):
+    """
+    Builds the reference graph of an export, starting at index.html and following
+    HTML resources, JS asset strings, CSS url()/@import and spritesheet images.
+    All lookups go against one cached listing of the folder. Prints nothing, so it
+    can run over many output folders in one pass. References to frames of a reached
+    spritesheet (e.g. an atlas-packed image) count as resolved.
+
+    output_path may also be a .zip archive (see --out-zip); its entries are checked
+    without extracting it.
+    """
+    output_path = Path(output_path)
+    report = ValidationReport(output_path)
+    if output_path.is_file() and output_path.suffix.lower() == ".zip":
+        with zipfile.ZipFile(output_path) as archive:
+            files = {name for name in archive.namelist() if not name.endswith("/")}
+            _check(report, files, lambda rel_path: io.TextIOWrapper(archive.open(rel_path), encoding='utf-8', errors='replace'), entry)
+        return report
+    if not output_path.is_dir():
+        report.errors.append(f"Output path is not a directory or does not exist: {output_path}")
+        return report
+    _check(report, list_output(output_path),
+           lambda rel_path: open(os.path.join(str(output_path), rel_path), 'r', encoding='utf-8', errors='replace'), entry)
+    return report
+
+
+def _check(report, files, open_text, entry):
+    if entry not in files:
+        report.errors.append(f"{entry} not found in output directory: {report.output_path}")
+        return
+
+    reached = {entry}
+    queue = [entry]
+    unresolved = []
+    while queue:
+        current = queue.pop()
+        targets = report.references.setdefault(current, set())
+        # Scripts resolve URLs against the page that loads them, not their own location.
+        base = entry if current.endswith((".js", ".mjs")) else current
+        for reference in _references_in(open_text, current):
+            target = _resolve(base, reference)
+            if target is None:
+                continue
+            if target not in files:
+                unresolved.append((current, reference, target))
+                continue
+            targets.add(target)
+            if target not in reached:
+                reached.add(target)
+                queue.append(target)
+
+    if unresolved:
+        frames = set()
+        for path in reached:
+            if path.endswith(".json"):
+                with open_text(path) as f:
+                    frames.update(_resolve(entry, name) for name in _spritesheet_frames(f))
+        report.missing = [(current, reference) for current, reference, target in unresolved if target not in frames]
+
+    report.unreferenced = sorted(path for path in files - reached
+                                 if posixpath.basename(path) not in METADATA_OUTPUTS and not is_sidecar(path, files))
+
+
+def validate_output(output_path: Path, report_into: dict = None):
     """
     Validates the generated web export output for valid references and assets.
-    Returns True if valid, False otherwise.
+    Returns True if valid, False otherwise. Unreferenced assets are reported as
+    warnings but do not fail validation. If report_into is given, the findings
+    are stored in it (see ValidationReport.to_dict).
     """
     print(f"Validating output in {output_path}")
-    if not output_path.is_dir():
-        print(f"Validation Error: Output path is not a directory or does not exist: {output_path}")
-        return False
-
-    index_html_path = output_path / "index.html"
-    if not index_html_path.is_file():
-        print(f"Validation Error: index.html not found in output directory: {output_path}")
-        return False
-
-    with open(index_html_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-
-    is_valid = True
-
-    # Regex to find src attributes in video, img, script tags
-    src_pattern = re.compile(r'(?:<video[^>]*?src=["\']([^"\']+)["\']|<source[^>]*?src=["\']([^"\']+)["\']|<img[^>]*?src=["\']([^"\']+)["\']|<script[^>]*?src=["\']([^"\']+)["\'])')
-    for match in src_pattern.finditer(html_content):
-        src = next(filter(None, match.groups())) # Get the first non-None group
-        if src and not src.startswith(("http://", "https://")):
-            if not (output_path / src).exists():
-                print(f"Validation Warning: Resource '{src}' referenced in HTML not found in output.")
-                is_valid = False
-
-    # Regex to find href attributes in link tags (for stylesheets)
-    href_pattern = re.compile(r'<link[^>]*?href=["\']([^"\']+)["\'][^>]*?rel=["\']stylesheet["\']')
-    for match in href_pattern.finditer(html_content):
-        href = match.group(1)
-        if href and not href.startswith(("http://", "https://")):
-            if not (output_path / href).exists():
-                print(f"Validation Warning: Stylesheet '{href}' referenced in HTML not found in output.")
-                is_valid = False
-
-    if is_valid:
+    report = check_output(output_path)
+    if report_into is not None:
+        report_into.update(report.to_dict())
+
+    for error in report.errors:
+        print(f"Validation Error: {error}")
+    for source, reference in report.missing:
+        print(f"Validation Warning: Resource '{reference}' referenced in {source} not found in output.")
+    for path in report.unreferenced:
+        print(f"Validation Warning: '{path}' is not referenced by the export and only adds to its size.")
+
+    if report.is_valid:
         print("Output validated successfully: No broken references found.")
     else:
         print("Output validation completed with warnings/errors.")
 
-    return is_valid
+    return report.is_valid
 
 if __name__ == "__main__":
     import shutil
@@ -0,0 +1,424 @@
+import calendar
+import copy
+import hashlib
+import json
+import os
+import posixpath
+import zipfile
+from pathlib import Path
+
+from converter.build_cache import fingerprint_tree
+from converter.pkg import PkgFile
+
+# Root-level names that identify the top of a wallpaper inside an archive.
+ROOT_MARKERS = ("scene.json", "project.json")
+
+# File kinds recorded by ProjectIndex, keyed by lower-case extension.
+FILE_TYPES = {
+    ".png": "image", ".jpg": "image", ".jpeg": "image", ".gif": "image", ".bmp": "image", ".webp": "image",
+    ".tex": "texture",
+    ".mp4": "video", ".webm": "video",
+    ".mp3": "audio", ".ogg": "audio", ".wav": "audio",
+    ".json": "json",
+    ".frag": "shader", ".vert": "shader", ".glsl": "shader",
+    ".mdl": "model",
+}
+
+
+class DirectorySource:
+    """
+    Read-only view of an unpacked wallpaper folder. Paths are POSIX-style and
+    relative to the folder root.
+    """
+    def __init__(self, root):
+        self.root = str(root)
+        self.name = Path(self.root).name
+
+    def __repr__(self):
+        return f"DirectorySource({self.root!r})"
+
+    def _full(self, rel_path):
+        return os.path.join(self.root, *[part for part in rel_path.split("/") if part])
+
+    def exists(self):
+        return os.path.isdir(self.root)
+
+    def is_file(self, rel_path):
+        return os.path.isfile(self._full(rel_path))
+
+    def is_dir(self, rel_path):
+        return os.path.isdir(self._full(rel_path))
+
+    def listdir(self, rel_path=""):
+        try:
+            return os.listdir(self._full(rel_path))
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+    def open(self, rel_path):
+        return open(self._full(rel_path), 'rb')
+
+    def read_text(self, rel_path, encoding='utf-8'):
+        with open(self._full(rel_path), 'r', encoding=encoding) as f:
+            return f.read()
+
+    def stat(self, rel_path):
+        """Returns (size, mtime_ns) for a file."""
+        st = os.stat(self._full(rel_path))
+        return st.st_size, st.st_mtime_ns
+
+    def local_path(self, rel_path):
+        """Returns a real filesystem path for the entry, enabling reflinks and hardlinks."""
+        return self._full(rel_path)
+
+    def uri(self, rel_path):
+        return os.path.abspath(self._full(rel_path))
+
+    def subsource(self, rel_path):
+        return DirectorySource(self._full(rel_path))
+
+    def fingerprints(self, with_hash=False):
+        return fingerprint_tree(self.root, with_hash=with_hash)
+
+
+class ZipSource:
+    """
+    Read-only view of a wallpaper inside a zip archive. Entries are read (and
+    decompressed) on demand, so nothing is extracted to disk.
+
+    If the archive wraps the wallpaper in a single top-level folder, that folder
+    is used as the root.
+    """
+    def __init__(self, archive_path, root=None):
+        self.archive_path = str(archive_path)
+        self._zip = None
+        self._index()
+        self.root = self._detect_root() if root is None else root.strip("/")
+        self.name = posixpath.basename(self.root) if self.root else Path(self.archive_path).stem
+
+    def __repr__(self):
+        return f"ZipSource({self.archive_path!r}, root={self.root!r})"
+
+    def __getstate__(self):
+        # Open archive handles cannot cross process boundaries; reopen lazily.
+        state = self.__dict__.copy()
+        state["_zip"] = None
+        return state
+
+    @property
+    def zip(self):
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.archive_path, 'r')
+        return self._zip
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def _index(self):
+        self._infos = {}
+        dir_names = []
+        for info in self.zip.infolist():
+            name = info.filename.rstrip("/")
+            if not name:
+                continue
+            if info.is_dir():
+                dir_names.append(name)
+            else:
+                self._infos[name] = info
+        self._dirs = _build_tree(self._infos, dir_names)
+
+    def _detect_root(self):
+        top = self._dirs[""]
+        if any(marker in top for marker in ROOT_MARKERS):
+            return ""
+        top_dirs = [name for name in top if name in self._dirs]
+        if len(top) == 1 and len(top_dirs) == 1:
+            return top_dirs[0]
+        return ""
+
+    def _member(self, rel_path):
+        rel_path = rel_path.strip("/")
+        if rel_path in ("", "."):
+            return self.root
+        rel_path = posixpath.normpath(rel_path)
+        return f"{self.root}/{rel_path}" if self.root else rel_path
+
+    def exists(self):
+        return os.path.isfile(self.archive_path) and self.root in self._dirs
+
+    def is_file(self, rel_path):
+        return self._member(rel_path) in self._infos
+
+    def is_dir(self, rel_path):
+        return self._member(rel_path) in self._dirs
+
+    def listdir(self, rel_path=""):
+        return sorted(self._dirs.get(self._member(rel_path), ()))
+
+    def open(self, rel_path):
+        return self.zip.open(self._infos[self._member(rel_path)], 'r')
+
+    def read_text(self, rel_path, encoding='utf-8'):
+        return self.zip.read(self._infos[self._member(rel_path)]).decode(encoding)
+
+    def stat(self, rel_path):
+        info = self._infos[self._member(rel_path)]
+        return info.file_size, _zip_mtime_ns(info)
+
+    def local_path(self, rel_path):
+        return None
+
+    def uri(self, rel_path):
+        return f"{os.path.abspath(self.archive_path)}!{self._member(rel_path)}"
+
+    def subsource(self, rel_path):
+        # Share the already-built index instead of re-reading the central directory.
+        sub = copy.copy(self)
+        sub.root = self._member(rel_path)
+        sub.name = posixpath.basename(sub.root)
+        return sub
+
+    def fingerprints(self, with_hash=False):
+        """Fingerprints every entry from the archive's central directory; nothing is decompressed."""
+        prefix = self.root + "/" if self.root else ""
+        fingerprints = {}
+        for name, info in self._infos.items():
+            if name.startswith(prefix):
+                fingerprints[name[len(prefix):]] = {"size": info.file_size, "mtime_ns": _zip_mtime_ns(info), "crc32": info.CRC}
+        return fingerprints
+
+
+class PkgSource:
+    """
+    Read-only view of a Wallpaper Engine .pkg container. The file is memory-mapped
+    once and entries are served as lazy, zero-copy views, so only the entries that
+    are actually read (e.g. scene.json and referenced assets) are ever touched.
+    """
+    def __init__(self, pkg_path):
+        self.pkg_path = str(pkg_path)
+        self.name = Path(self.pkg_path).stem
+        self.root = ""
+        self._pkg = None
+        self._dirs = _build_tree(self.pkg.entries)
+        self._mtime_ns = os.stat(self.pkg_path).st_mtime_ns
+
+    def __repr__(self):
+        return f"PkgSource({self.pkg_path!r})"
+
+    def __getstate__(self):
+        # Memory maps cannot cross process boundaries; remap lazily.
+        state = self.__dict__.copy()
+        state["_pkg"] = None
+        return state
+
+    @property
+    def pkg(self):
+        if self._pkg is None:
+            self._pkg = PkgFile(self.pkg_path)
+        return self._pkg
+
+    def close(self):
+        if self._pkg is not None:
+            self._pkg.close()
+            self._pkg = None
+
+    def _member(self, rel_path):
+        rel_path = rel_path.strip("/")
+        return "" if rel_path in ("", ".") else posixpath.normpath(rel_path)
+
+    def exists(self):
+        return os.path.isfile(self.pkg_path)
+
+    def is_file(self, rel_path):
+        return self._member(rel_path) in self.pkg.entries
+
+    def is_dir(self, rel_path):
+        return self._member(rel_path) in self._dirs
+
+    def listdir(self, rel_path=""):
+        return sorted(self._dirs.get(self._member(rel_path), ()))
+
+    def open(self, rel_path):
+        return self.pkg.open(self._member(rel_path))
+
+    def read_text(self, rel_path, encoding='utf-8'):
+        with self.open(rel_path) as f:
+            return f.read().decode(encoding)
+
+    def stat(self, rel_path):
+        # Entries carry no timestamps of their own; the container's mtime stands in.
+        return self.pkg.entries[self._member(rel_path)][1], self._mtime_ns
+
+    def local_path(self, rel_path):
+        return None
+
+    def uri(self, rel_path):
+        return f"{os.path.abspath(self.pkg_path)}!{self._member(rel_path)}"
+
+    def subsource(self, rel_path):
+        raise ValueError(f"{self.name} is a .pkg container holding a single wallpaper; it has no wallpaper subfolders.")
+
+    def fingerprints(self, with_hash=False):
+        fingerprints = {}
+        for name, (_, length) in self.pkg.entries.items():
+            fingerprint = {"size": length, "mtime_ns": self._mtime_ns}
+            if with_hash:
+                view = self.pkg.entry_view(name)
+                fingerprint["sha256"] = hashlib.sha256(view).hexdigest()
+                view.release()
+            fingerprints[name] = fingerprint
+        return fingerprints
+
+
+class ProjectIndex:
+    """
+    In-memory index of a wallpaper, built from a single listing of its source (one
+    os.scandir walk for folders, the central directory or entry table for archives).
+
+    ProjectIndex is itself a source: existence checks, listings, stats and
+    fingerprints are answered from the index, while reads go to the wrapped source.
+    scene.json and project.json are parsed at most once, on first use, so the
+    detector, parser and generator can share one index without touching the
+    filesystem again.
+    """
+    def __init__(self, source, listing=None):
+        self.source = open_source(source)
+        self.name = self.source.name
+        self.root = self.source.root
+        self.files = {}
+        # Fingerprints double as the listing (and keep the CRC-32 of zip entries).
+        self._listing = self.source.fingerprints() if listing is None else listing
+        for rel_path, fingerprint in self._listing.items():
+            self.files[rel_path] = {
+                "size": fingerprint["size"],
+                "mtime_ns": fingerprint["mtime_ns"],
+                "type": FILE_TYPES.get(posixpath.splitext(rel_path)[1].lower(), "other"),
+            }
+        self._dirs = _build_tree(self.files)
+        self._json = {}
+
+    def __repr__(self):
+        return f"ProjectIndex({self.source!r})"
+
+    @classmethod
+    def of(cls, path):
+        """Returns path unchanged if it is already an index, else indexes it."""
+        return path if isinstance(path, cls) else cls(path)
+
+    def refresh(self):
+        """
+        Lists the source again. Returns this index, with its parsed JSON, if nothing
+        changed, else a new index. Archives are listed once when opened, so only
+        folder indexes ever see changes.
+        """
+        listing = self.source.fingerprints()
+        return self if listing == self._listing else ProjectIndex(self.source, listing)
+
+    def _member(self, rel_path):
+        rel_path = rel_path.strip("/")
+        return "" if rel_path in ("", ".") else posixpath.normpath(rel_path)
+
+    def exists(self):
+        return self.source.exists()
+
+    def is_file(self, rel_path):
+        return self._member(rel_path) in self.files
+
+    def is_dir(self, rel_path):
+        return self._member(rel_path) in self._dirs
+
+    def listdir(self, rel_path=""):
+        return sorted(self._dirs.get(self._member(rel_path), ()))
+
+    def files_of_type(self, file_type, rel_dir=None):
+        """Returns the indexed paths of a kind (see FILE_TYPES), optionally only directly inside rel_dir."""
+        paths = [path for path, entry in self.files.items() if entry["type"] == file_type]
+        if rel_dir is not None:
+            rel_dir = self._member(rel_dir)
+            paths = [path for path in paths if posixpath.dirname(path) == rel_dir]
+        return sorted(paths)
+
+    def open(self, rel_path):
+        return self.source.open(rel_path)
+
+    def read_text(self, rel_path, encoding='utf-8'):
+        return self.source.read_text(rel_path, encoding)
+
+    def stat(self, rel_path):
+        entry = self.files[self._member(rel_path)]
+        return entry["size"], entry["mtime_ns"]
+
+    def local_path(self, rel_path):
+        return self.source.local_path(rel_path)
+
+    def uri(self, rel_path):
+        return self.source.uri(rel_path)
+
+    def subsource(self, rel_path):
+        return ProjectIndex(self.source.subsource(rel_path))
+
+    def fingerprints(self, with_hash=False):
+        if with_hash:
+            return self.source.fingerprints(with_hash=True)
+        return {path: dict(fingerprint) for path, fingerprint in self._listing.items()}
+
+    def load_json(self, rel_path):
+        """
+        Parses a JSON file once and caches the result. Returns None if the file is
+        not in the project; raises ValueError if it is malformed.
+        """
+        rel_path = self._member(rel_path)
+        if rel_path not in self._json:
+            if rel_path not in self.files:
+                return None
+            self._json[rel_path] = json.loads(self.read_text(rel_path))
+        return self._json[rel_path]
+
+    def is_parsed(self, rel_path):
+        """Returns True if load_json() already holds this file in memory."""
+        return self._member(rel_path) in self._json
+
+    @property
+    def scene(self):
+        """The parsed scene.json, or None if there is none."""
+        return self.load_json("scene.json")
+
+    @property
+    def project(self):
+        """The parsed project.json, or None if there is none."""
+        return self.load_json("project.json")
+
+
+def _build_tree(file_names, dir_names=()):
+    """Builds a {directory: set(child names)} index from POSIX-style member names."""
+    dirs = {"": set()}
+    for name in list(file_names) + list(dir_names):
+        parts = name.split("/")
+        for depth in range(len(parts)):
+            dirs.setdefault("/".join(parts[:depth]), set()).add(parts[depth])
+    for name in dir_names:
+        dirs.setdefault(name, set())
+    return dirs
+
+
+def _zip_mtime_ns(info):
+    return calendar.timegm(info.date_time + (0, 0, 0)) * 1_000_000_000
+
+
+def open_source(path):
+    """
+    Returns a source for a wallpaper folder, .zip archive or .pkg container. Sources are passed
+    through unchanged. Raises FileNotFoundError if the path does not exist.
+    """
+    if isinstance(path, (DirectorySource, ZipSource, PkgSource, ProjectIndex)):
+        return path
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Input path does not exist: {path}")
+    if path.is_file() and path.suffix.lower() == ".zip":
+        return ZipSource(path)
+    if path.is_file() and path.suffix.lower() == ".pkg":
+        return PkgSource(path)
+    return DirectorySource(path)
@@ -0,0 +1,157 @@
+"""
+Change detection for --watch.
+
+Both watchers report which files under a folder changed since the last call to
+wait(), by comparing fingerprint_tree snapshots. InotifyWatcher (Linux) sleeps on
+kernel events between snapshots; PollingWatcher re-fingerprints the folder every
+few hundred milliseconds and works everywhere.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from converter.build_cache import fingerprint_tree, fingerprints_match
+
+# Seconds between snapshots when polling.
+POLL_INTERVAL = 0.25
+# Editors often save in several steps; a change is reported once the folder has
+# been quiet for this long.
+DEBOUNCE_SECONDS = 0.05
+
+# inotify(7) event masks.
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects changes below root by re-fingerprinting it every `interval` seconds."""
+    kind = "polling"
+
+    def __init__(self, root, interval=POLL_INTERVAL, exclude=()):
+        self.root = str(root)
+        self.interval = interval
+        self.exclude = set(exclude)
+        self.snapshot = self._fingerprint()
+        self._last_seen = self.snapshot
+
+    def _fingerprint(self):
+        return fingerprint_tree(self.root, exclude=self.exclude)
+
+    def _signal(self, timeout):
+        """Waits up to timeout seconds; returns True if something may have changed."""
+        time.sleep(min(self.interval, timeout) if timeout is not None else self.interval)
+        seen = self._fingerprint()
+        changed = seen != self._last_seen
+        self._last_seen = seen
+        return changed
+
+    def changes(self):
+        """Returns the relative paths added, removed or modified since the last call."""
+        current = self._fingerprint()
+        changed = sorted(
+            rel_path for rel_path in current.keys() | self.snapshot.keys()
+            if not fingerprints_match(self.snapshot.get(rel_path), current.get(rel_path)))
+        self.snapshot = self._last_seen = current
+        return changed
+
+    def wait(self, timeout=None):
+        """
+        Blocks until files change and returns their relative paths, or returns an
+        empty list once timeout seconds pass without a change.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            if not self._signal(remaining):
+                continue
+            while self._signal(DEBOUNCE_SECONDS):
+                pass
+            changed = self.changes()
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(PollingWatcher):
+    """
+    Detects changes with Linux inotify. Every directory below root is watched;
+    new directories are added as they appear. Raises OSError where inotify is
+    unavailable.
+    """
+    kind = "inotify"
+
+    def __init__(self, root, interval=POLL_INTERVAL, exclude=()):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths_by_wd = {}
+        super().__init__(root, interval, exclude)
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self._paths_by_wd[wd] = path
+
+    def _add_tree(self, path):
+        self._add_watch(path)
+        for directory, dirs, _ in os.walk(path):
+            rel_dir = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            dirs[:] = [name for name in dirs if (name if rel_dir == "." else f"{rel_dir}/{name}") not in self.exclude]
+            for name in dirs:
+                self._add_watch(os.path.join(directory, name))
+
+    def _signal(self, timeout):
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._paths_by_wd.get(wd)
+            if directory and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._add_tree(os.path.join(directory, os.fsdecode(name)))
+                except OSError:
+                    pass  # Already gone again; the snapshot diff has the final word.
+        return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def make_watcher(root, interval=POLL_INTERVAL, exclude=(), polling=False):
+    """Returns an InotifyWatcher where the platform supports it, else a PollingWatcher."""
+    if not polling:
+        try:
+            return InotifyWatcher(root, interval, exclude)
+        except (OSError, AttributeError, TypeError):
+            # AttributeError/TypeError: no libc or no inotify symbols (non-Linux).
+            pass
+    return PollingWatcher(root, interval, exclude)
@@ -0,0 +1,94 @@
+"""
+Writes an export straight into a zip archive, for --out-zip.
+
+Entries are streamed into the archive as the generator produces them, so no
+staging directory is needed. Media that is already compressed is stored as it
+is; text is deflated. The archive is written to `<path>.partial` and only
+renamed into place once it is complete, so an interrupted export never leaves
+a truncated archive behind.
+"""
+import os
+import shutil
+import time
+import zipfile
+
+# Formats that do not get smaller when deflated again.
+STORED_EXTENSIONS = {".mp4", ".webm", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp3", ".ogg", ".m4a",
+                     ".woff2", ".zip", ".gz", ".br"}
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class ZipOutput:
+    """
+    A write-only view of an export folder backed by a zip archive. Paths are
+    relative to the export root and use forward slashes. Not thread-safe: the
+    caller writes one entry at a time.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self.partial_path = self.path + ".partial"
+        self.names = set()
+        self.stats = {"entries": 0, "stored": 0, "deflated": 0, "bytes_in": 0}
+        # One timestamp for every entry keeps the archive listing tidy.
+        self._date_time = time.localtime()[:6]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._zip = zipfile.ZipFile(self.partial_path, 'w', allowZip64=True)
+
+    def _info(self, rel_path, size):
+        if rel_path in self.names:
+            raise ValueError(f"Duplicate zip entry: {rel_path}")
+        self.names.add(rel_path)
+        info = zipfile.ZipInfo(rel_path, date_time=self._date_time)
+        stored = os.path.splitext(rel_path)[1].lower() in STORED_EXTENSIONS
+        info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+        # Known up front, so zipfile writes zip64 headers only for entries that need them.
+        info.file_size = size
+        info.external_attr = 0o644 << 16
+        self.stats["entries"] += 1
+        self.stats["stored" if stored else "deflated"] += 1
+        self.stats["bytes_in"] += size
+        return info
+
+    def write_bytes(self, rel_path, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self._zip.open(self._info(rel_path, len(data)), 'w') as entry:
+            entry.write(data)
+
+    def write_stream(self, rel_path, stream, size):
+        with self._zip.open(self._info(rel_path, size), 'w', force_zip64=size >= zipfile.ZIP64_LIMIT) as entry:
+            shutil.copyfileobj(stream, entry, COPY_CHUNK_SIZE)
+
+    def write_file(self, rel_path, src_path):
+        with open(src_path, 'rb') as stream:
+            self.write_stream(rel_path, stream, os.fstat(stream.fileno()).st_size)
+
+    def close(self):
+        """Finishes the archive and moves it into place."""
+        if self._zip is None:
+            return
+        self._zip.close()
+        self._zip = None
+        os.replace(self.partial_path, self.path)
+        self.stats["bytes_out"] = os.path.getsize(self.path)
+
+    def abort(self):
+        """Discards the partial archive."""
+        if self._zip is None:
+            return
+        self._zip.close()
+        self._zip = None
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False